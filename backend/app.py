@@ -55,11 +55,23 @@
 # #except Exception as e:
 #     #print(f"Error adding data: {e}")
 
-from flask import Flask, request, jsonify
+import os
+import sys
+
+# The tracing module is shared with the ML code in ml/model; put it on the path
+# before importing the modules that use it
+ML_MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml", "model"
+)
+if ML_MODEL_DIR not in sys.path:
+    sys.path.append(ML_MODEL_DIR)
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from firestoreAPI import firestore_module as FB
 from datetime import datetime
 import json
+import tracing
 
 app = Flask(__name__)
 CORS(app)
@@ -111,7 +123,8 @@ def get_tasks():
     user_id = request.args.get("userId")
     db = FB.initializeDB()
     doc_ref = db.collection("UserTasks").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserTasks"):
+        doc = doc_ref.get()
 
     if not doc.exists:
         return jsonify([])
@@ -144,7 +157,8 @@ def save_goals():
     doc_ref = db.collection("UserPreferences").document(user_id)
 
     try:
-        doc_ref.set({ "Goals": goals }, merge=True)
+        with tracing.span("firestore.set", collection="UserPreferences"):
+            doc_ref.set({ "Goals": goals }, merge=True)
         print(f"✅ Goals saved for user {user_id}")
         return jsonify({"status": "success", "message": "Goals saved"})
     except Exception as e:
@@ -162,7 +176,8 @@ def load_goals():
     doc_ref = db.collection("UserPreferences").document(user_id)
 
     try:
-        doc = doc_ref.get()
+        with tracing.span("firestore.get", collection="UserPreferences"):
+            doc = doc_ref.get()
         if not doc.exists:
             print(f"⚠️ No goals found for user {user_id}")
             return jsonify({"goals": {}})
@@ -198,5 +213,11 @@ def generate_recommendations():
         return jsonify({ "status": "error", "message": str(e) }), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text format; empty unless TIMELYAI_TRACING is set
+    return Response(tracing.export_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == '__main__':
     app.run(port=8888)
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# firestore_module imports the tracing module shared with the ML code in
+# ml/model, which app.py puts on the path when the backend runs
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "ml",
+        "model",
+    )
+)
@@ -5,6 +5,10 @@ from datetime import datetime
 import pandas as pd
 import os
 
+# Shared with the ML code in ml/model, which the entry point (app.py) puts on
+# sys.path
+import tracing
+
 # import datetime
 
 """
@@ -48,7 +52,8 @@ def loadBaseUserPreferences(db, user_id):
         "sleep_schedule": sleep_schedule,
     }
 
-    doc_ref.set(data)
+    with tracing.span("firestore.set", collection="UserPreferences"):
+        doc_ref.set(data)
     return data
 
 
@@ -57,14 +62,16 @@ def loadUserTasks(db, user_id):
     Initialize a new user document in the "UserTasks" collection with an empty task dictionary.
     """
     doc_ref = db.collection("UserTasks").document(user_id)
-    doc_ref.set({"tasks": {}})
+    with tracing.span("firestore.set", collection="UserTasks"):
+        doc_ref.set({"tasks": {}})
     return True
 
 
 def getUserDocument(db, user_id):
     """Retrieve the entire user document."""
     doc_ref = db.collection("UserPreferences").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserPreferences"):
+        doc = doc_ref.get()
     return doc.to_dict() if doc.exists else None
 
 
@@ -78,12 +85,13 @@ def updateUserGoals(db, user_id, goal, value):
     """
 
     doc_ref = db.collection("UserPreferences").document(user_id)
-    doc_ref.update(
-        {
-            goal: value,
-            # "updatedAt": firestore.SERVER_TIMESTAMP
-        }
-    )
+    with tracing.span("firestore.update", collection="UserPreferences"):
+        doc_ref.update(
+            {
+                goal: value,
+                # "updatedAt": firestore.SERVER_TIMESTAMP
+            }
+        )
     return True
 
 
@@ -104,12 +112,14 @@ def addTask(db, user_id, taskName, taskDuration, taskCategory, taskDeadline):
     """
 
     doc_ref = db.collection("UserTasks").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserTasks"):
+        doc = doc_ref.get()
 
     if not doc.exists:
         print("User document does not exist. Creating a new one.")
         loadUserTasks(db, user_id)  # this sets {"tasks": {}}
-        doc = doc_ref.get()         # re-fetch the newly created doc
+        with tracing.span("firestore.get", collection="UserTasks"):
+            doc = doc_ref.get()         # re-fetch the newly created doc
 
     user_data = doc.to_dict()
     existing_tasks = user_data.get("tasks", {})
@@ -125,9 +135,10 @@ def addTask(db, user_id, taskName, taskDuration, taskCategory, taskDeadline):
         "taskCategory": taskCategory,
         "taskDeadline": taskDeadline
     }
-    doc_ref.update({
-        f"tasks.{task_id}": task_data
-    })
+    with tracing.span("firestore.update", collection="UserTasks"):
+        doc_ref.update({
+            f"tasks.{task_id}": task_data
+        })
 
     return task_id
 
@@ -136,7 +147,8 @@ def updateTask(db, user_id, task_id, taskName, taskDuration, taskCategory, taskD
     """Modify an existing task."""
 
     doc_ref = db.collection("UserTasks").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserTasks"):
+        doc = doc_ref.get()
     if not doc.exists:
         return False
     
@@ -148,7 +160,8 @@ def updateTask(db, user_id, task_id, taskName, taskDuration, taskCategory, taskD
     }
     # doc_ref.set({taskName: task_data})
     # Update the user document with the new task using the generated task_id
-    doc_ref.update({f"tasks.{task_id}": task_data})
+    with tracing.span("firestore.update", collection="UserTasks"):
+        doc_ref.update({f"tasks.{task_id}": task_data})
     return task_id
 
 
@@ -158,7 +171,8 @@ def updateTask(
     """Modify an existing task."""
 
     doc_ref = db.collection("UserTasks").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserTasks"):
+        doc = doc_ref.get()
     if not doc.exists:
         return False
 
@@ -178,7 +192,8 @@ def updateTask(
         print("Task ID doesn't exists.")
         return False
     else:
-        doc_ref.update({f"tasks.{task_id}": task_data})
+        with tracing.span("firestore.update", collection="UserTasks"):
+            doc_ref.update({f"tasks.{task_id}": task_data})
     return True
 
 
@@ -196,7 +211,8 @@ def deleteTask(db, user_id, task_id):
     """
 
     doc_ref = db.collection("UserTasks").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserTasks"):
+        doc = doc_ref.get()
 
     # Check if user exists
     if not doc.exists:
@@ -211,14 +227,16 @@ def deleteTask(db, user_id, task_id):
         return False
 
     # Delete the task using the FieldValue.delete() method
-    doc_ref.update({f"tasks.{task_id}": firestore.DELETE_FIELD})
+    with tracing.span("firestore.update", collection="UserTasks"):
+        doc_ref.update({f"tasks.{task_id}": firestore.DELETE_FIELD})
 
     return True
 
 def updateGoals(db, user_id, goal_category, goal_name, duration):
     """Update user's goal duration."""
     doc_ref = db.collection("UserPreferences").document(user_id)
-    doc = doc_ref.get()
+    with tracing.span("firestore.get", collection="UserPreferences"):
+        doc = doc_ref.get()
     if not doc.exists:
         return False
 
@@ -270,7 +288,8 @@ def loadUserCalendarDataframe(db, df, collection_name, user_id):
     # Write the entire events dictionary to Firestore
     # print(f"Writing {len(events_dict)} events to Firestore document: {user_id}")
 
-    user_doc_ref.set({"events": events_dict})
+    with tracing.span("firestore.set", collection=collection_name):
+        user_doc_ref.set({"events": events_dict})
     print("Successfully wrote events dictionary to Firestore")
 
 
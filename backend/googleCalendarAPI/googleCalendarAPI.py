@@ -11,6 +11,10 @@ import pandas as pd
 import pickle
 import os.path
 
+# Shared with the ML code in ml/model, which the entry point (app.py) puts on
+# sys.path
+import tracing
+
 
 
 
@@ -58,7 +62,7 @@ class GoogleCalendar:
 
         #Timezones
         calendar_id = "primary"
-        calendar = self.service.calendars().get(calendarId=calendar_id).execute()
+        calendar = self._execute(self.service.calendars().get(calendarId=calendar_id))
         self.timezone = calendar['timeZone']
         self.tz = pytz.timezone(self.timezone)
     
@@ -91,6 +95,16 @@ class GoogleCalendar:
         
         # Return calendar service
         return build("calendar", "v3", credentials=creds)
+
+    def _execute(self, request):
+        """
+        Execute a Google API request, timed by a tracing span named after the
+        API method (e.g. calendar.events.list).
+        """
+        with tracing.span(
+            "google_calendar.execute", method=getattr(request, "methodId", "unknown")
+        ):
+            return request.execute()
     
     def create_event(self, summary, description, start_time, end_time, 
                     location=None, attendees=None, reminders=DEFAULT_REMINDERS, 
@@ -186,16 +200,16 @@ class GoogleCalendar:
         
         # Execute the API call, with conferenceDataVersion if needed
         if with_conference:
-            created_event = self.service.events().insert(
+            created_event = self._execute(self.service.events().insert(
                 calendarId=calendar_id,
                 body=event,
                 conferenceDataVersion=1
-            ).execute()
+            ))
         else:
-            created_event = self.service.events().insert(
+            created_event = self._execute(self.service.events().insert(
                 calendarId=calendar_id,
                 body=event
-            ).execute()
+            ))
         
         # Construct an informative message
         event_type_str = "all-day " if all_day else ""
@@ -220,14 +234,14 @@ class GoogleCalendar:
             Updated event object
         """
         # First, get the event
-        event = self.service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+        event = self._execute(self.service.events().get(calendarId=calendar_id, eventId=event_id))
         
         # Update fields
         for key, value in updates.items():
             event[key] = value
         
-        updated_event = self.service.events().update(
-            calendarId=calendar_id, eventId=event_id, body=event).execute()
+        updated_event = self._execute(self.service.events().update(
+            calendarId=calendar_id, eventId=event_id, body=event))
         
         print(f'Event updated: {updated_event["htmlLink"]}')
         return updated_event
@@ -240,7 +254,7 @@ class GoogleCalendar:
             event_id: ID of the event to delete
             calendar_id: Calendar ID containing the event (default from global setting)
         """
-        self.service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        self._execute(self.service.events().delete(calendarId=calendar_id, eventId=event_id))
         print(f'Event {event_id} deleted')
     
     def list_upcoming_events(self, max_results=DEFAULT_MAX_RESULTS, calendar_id=DEFAULT_CALENDAR_ID, 
@@ -263,10 +277,10 @@ class GoogleCalendar:
         time_min_utc = time_min.astimezone(pytz.UTC)
         time_min_str = time_min_utc.isoformat()
         
-        events_result = self.service.events().list(
+        events_result = self._execute(self.service.events().list(
             calendarId=calendar_id, timeMin=time_min_str,
             maxResults=max_results, singleEvents=True,
-            orderBy=order_by).execute()
+            orderBy=order_by))
         
         events = events_result.get('items', [])
     
@@ -301,10 +315,10 @@ class GoogleCalendar:
         
         time_min_str = time_min.isoformat() + 'Z'
         
-        events_result = self.service.events().list(
+        events_result = self._execute(self.service.events().list(
             calendarId=calendar_id, timeMin=time_min_str,
             maxResults=max_results, singleEvents=True,
-            orderBy=order_by, q=query).execute()
+            orderBy=order_by, q=query))
         
         events = events_result.get('items', [])
     
@@ -336,9 +350,9 @@ class GoogleCalendar:
         time_min = start_date.isoformat() + 'Z'
         time_max = end_date.isoformat() + 'Z'
         
-        events_result = self.service.events().list(
+        events_result = self._execute(self.service.events().list(
             calendarId=calendar_id, timeMin=time_min, timeMax=time_max,
-            singleEvents=True, orderBy=order_by).execute()
+            singleEvents=True, orderBy=order_by))
         
         events = events_result.get('items', [])
     
@@ -368,7 +382,7 @@ class GoogleCalendar:
             'timeZone': self.timezone
         }
         
-        created_calendar = self.service.calendars().insert(body=calendar).execute()
+        created_calendar = self._execute(self.service.calendars().insert(body=calendar))
         print(f'Calendar created: {created_calendar["id"]}')
         return created_calendar
     
@@ -379,7 +393,7 @@ class GoogleCalendar:
         Returns:
             List of calendar objects
         """
-        calendar_list = self.service.calendarList().list().execute()
+        calendar_list = self._execute(self.service.calendarList().list())
         calendars = calendar_list.get('items', [])
     
         if not calendars:
@@ -410,7 +424,7 @@ class GoogleCalendar:
             "items": [{"id": calendar_id} for calendar_id in calendar_ids]
         }
         
-        free_busy_request = self.service.freebusy().query(body=body).execute()
+        free_busy_request = self._execute(self.service.freebusy().query(body=body))
         
         print("Busy periods:")
         for calendar_id, calendar_info in free_busy_request['calendars'].items():
@@ -456,7 +470,7 @@ class GoogleCalendar:
             print(f" - {cal_id}")
 
         # Call Google Calendar API to get busy periods
-        free_busy_request = self.service.freebusy().query(body=body).execute()
+        free_busy_request = self._execute(self.service.freebusy().query(body=body))
 
         # Collect all busy periods from all calendars
         all_busy_periods = []
@@ -530,7 +544,7 @@ class GoogleCalendar:
         }
 
         # Get busy periods from Google Calendar API
-        free_busy_request = self.service.freebusy().query(body=body).execute()
+        free_busy_request = self._execute(self.service.freebusy().query(body=body))
 
         # Collect and merge busy periods
         all_busy_periods = []
@@ -579,12 +593,12 @@ class GoogleCalendar:
             end_date = datetime.datetime(year, month + 1, 1)
         
         # Get events
-        events_result = self.service.events().list(
+        events_result = self._execute(self.service.events().list(
             calendarId=calendar_id,
             timeMin=start_date.isoformat() + 'Z',
             timeMax=end_date.isoformat() + 'Z',
             singleEvents=True,
-            orderBy='startTime').execute()
+            orderBy='startTime'))
         
         events = events_result.get('items', [])
         
@@ -667,14 +681,14 @@ class GoogleCalendar:
         # Process each calendar
         for calendar_id in calendar_ids:
             # Get events using existing service
-            events_result = self.service.events().list(
+            events_result = self._execute(self.service.events().list(
                 calendarId=calendar_id,
                 timeMin=time_min_str,
                 timeMax=time_max_str,
                 maxResults=max_results,
                 singleEvents=True,
                 orderBy="startTime"
-            ).execute()
+            ))
             
             events = events_result.get('items', [])
             
@@ -700,7 +714,7 @@ class GoogleCalendar:
         calendar_names = {}
         for calendar_id in calendar_ids:
             try:
-                calendar_info = self.service.calendars().get(calendarId=calendar_id).execute()
+                calendar_info = self._execute(self.service.calendars().get(calendarId=calendar_id))
                 calendar_names[calendar_id] = calendar_info.get('summary', calendar_id)
             except Exception as e:
                 # If we can't get the name, just use the ID
@@ -781,7 +795,7 @@ class GoogleCalendar:
         return df
     
     def get_user_email(self):
-        calendar_list = self.service.calendarList().list().execute()
+        calendar_list = self._execute(self.service.calendarList().list())
         calendars = calendar_list.get('items', [])
         
         return calendars[0]["summary"]
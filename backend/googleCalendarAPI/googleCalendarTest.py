@@ -1,6 +1,18 @@
 import datetime
-from googleCalendarAPI import GoogleCalendar
 import os
+import sys
+
+# googleCalendarAPI imports the tracing module shared with the ML code in
+# ml/model, which app.py puts on the path when the backend runs
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "ml",
+        "model",
+    )
+)
+
+from googleCalendarAPI import GoogleCalendar
 
 def main():
 
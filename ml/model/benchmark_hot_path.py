@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Latency benchmarks for the recommendation hot path.
+
+Times the calls the app makes on every request and reports p50/p95/p99
+latency and throughput for each:
+
+- ``predict_best_time``, with a cold and with a warm prediction cache
+- ``generate_recommendations`` for a short task and for a long task that is
+  split into sessions
+- ``record_binary_feedback`` (logging the feedback; the model update worker
+  applies it in the background)
+- ``train_model`` on train.vw files of several sizes
+- ``add_scheduled_event`` on calendars with several densities of events
+
+Everything runs against copies of the model and data in a temporary
+directory (see contextual_bandits.configure), so benchmarking never writes to
+ml/data or ml/user. Results are
+written as JSON, tagged with the current commit, so runs from two commits can
+be compared with ``--compare``.
+
+Usage:
+    python benchmark_hot_path.py [--backend numpy] [--iterations 200] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import contextual_bandits
+from contextual_bandits import SchedulerSession
+from prediction_engine import model_file_for_backend
+
+BENCHMARK_DIR = os.path.join(contextual_bandits.DATA_DIR, "benchmarks")
+ITERATIONS = 200
+TRAIN_SIZES = [1000, 10000]  # train.vw lines for the train_model benchmarks
+TRAIN_ITERATIONS = 3
+CALENDAR_DENSITIES = [10, 100, 1000]  # scheduled events already on the calendar
+REGRESSION_THRESHOLD = 0.2  # flag a p50 or p95 more than 20% slower than before
+MIN_REGRESSION_MS = 0.05  # ... and at least this much slower, to ignore timer noise
+
+TASK = ("hw", 1.5, 24.0, 6.0)  # task_type, duration, hours_until_due, free time
+LONG_TASK = ("project", 6.0, 96.0, 6.0)
+
+
+def measure(
+    fn: Callable[[], Any],
+    iterations: int,
+    setup: Optional[Callable[[], Any]] = None,
+    warmup: int = 3,
+) -> Dict[str, float]:
+    """
+    Call `fn` repeatedly and summarize its latency.
+
+    Args:
+        fn: The call to time
+        iterations: Number of timed calls
+        setup: Called before every call, outside the timing
+        warmup: Untimed calls made first (lazy loading, caches, ...)
+
+    Returns:
+        A dict with the number of calls, p50/p95/p99/mean/max latency in
+        milliseconds and the throughput in calls per second
+    """
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(warmup + iterations):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                timings.append(elapsed)
+
+    timings_ms = np.asarray(timings) * 1000.0
+    p50, p95, p99 = np.percentile(timings_ms, [50, 95, 99])
+    return {
+        "iterations": iterations,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(timings_ms.mean()),
+        "max_ms": float(timings_ms.max()),
+        "throughput_per_second": float(iterations / (timings_ms.sum() / 1000.0)),
+    }
+
+
+def _isolate(work_dir, backend):
+    """
+    Point contextual_bandits at copies of the model and data in `work_dir`.
+
+    Returns:
+        The (data_dir, user_dir, backend) it was configured with before
+    """
+    cb = contextual_bandits
+    previous = (cb.DATA_DIR, cb.USER_DIR, cb.PREDICTION_BACKEND)
+    source_model = model_file_for_backend(backend, cb.MODEL_FILE)
+    if not os.path.exists(source_model):
+        source_model = model_file_for_backend(backend, cb.SEED_MODEL_FILE)
+    source_train_file = cb.TRAIN_FILE
+
+    data_dir = os.path.join(work_dir, "data")
+    user_dir = os.path.join(work_dir, "user")
+    os.makedirs(data_dir)
+    cb.configure(data_dir=data_dir, user_dir=user_dir, backend=backend)
+    shutil.copyfile(source_train_file, cb.TRAIN_FILE)
+    model_file = model_file_for_backend(backend, cb.MODEL_FILE)
+    if os.path.exists(source_model):
+        os.makedirs(os.path.dirname(model_file))
+        shutil.copyfile(source_model, model_file)
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            cb.train_model()
+    return previous
+
+
+def _write_train_file(source_file, target_file, num_lines):
+    """Write `num_lines` examples by cycling through the lines of source_file."""
+    with open(source_file, "r") as f:
+        lines = [line for line in f if line.strip()]
+    with open(target_file, "w") as f:
+        for i in range(num_lines):
+            f.write(lines[i % len(lines)])
+
+
+def _dense_session(num_events, rng) -> SchedulerSession:
+    """Return a session with `num_events` short events spread over the week."""
+    session = SchedulerSession()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(num_events):
+            start = float(rng.integers(12, 42)) / 2.0  # 6:00 to 20:30
+            session.add_scheduled_event(i % 7, start, start + 0.5, f"event {i}")
+    return session
+
+
+def run_benchmarks(
+    backend=contextual_bandits.PREDICTION_BACKEND,
+    iterations=ITERATIONS,
+    train_sizes=TRAIN_SIZES,
+    calendar_densities=CALENDAR_DENSITIES,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run every hot path benchmark against a private copy of the model.
+
+    Returns:
+        A dict mapping benchmark names to their latency summaries (see measure)
+    """
+    cb = contextual_bandits
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="timelyai-bench-")
+    previous = None
+    try:
+        previous = _isolate(work_dir, backend)
+        session = SchedulerSession()
+
+        print("⏱️ predict_best_time")
+        results["predict_best_time/cold_cache"] = measure(
+            lambda: session.predict_best_time(*TASK, day_of_week=2),
+            iterations,
+            setup=lambda: (
+                cb.PREDICTION_CACHE.clear(),
+                session.reset_recommended_times(),
+            ),
+        )
+        results["predict_best_time/warm_cache"] = measure(
+            lambda: session.predict_best_time(*TASK, day_of_week=2),
+            iterations,
+            setup=session.reset_recommended_times,
+        )
+
+        print("⏱️ generate_recommendations")
+        results["generate_recommendations/single"] = measure(
+            lambda: session.generate_recommendations(*TASK, day_of_week=2),
+            iterations,
+            setup=session.reset_recommended_times,
+        )
+        results["generate_recommendations/split"] = measure(
+            lambda: session.generate_recommendations(
+                *LONG_TASK, day_of_week=2, prefer_splitting=True
+            ),
+            iterations,
+            setup=session.reset_recommended_times,
+        )
+
+        print("⏱️ record_binary_feedback")
+        results["record_binary_feedback"] = measure(
+            lambda: cb.record_binary_feedback(*TASK, 10.0, 2, True, 0.5),
+            iterations,
+        )
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # Apply the logged feedback so it doesn't land in the timings below
+            cb.shutdown()
+
+        print("⏱️ train_model")
+        for size in train_sizes:
+            train_file = os.path.join(work_dir, "data", f"train_{size}.vw")
+            _write_train_file(cb.TRAIN_FILE, train_file, size)
+            results[f"train_model/{size}_examples"] = measure(
+                lambda: cb.train_model(data_file=train_file),
+                TRAIN_ITERATIONS,
+                warmup=1,
+            )
+
+        print("⏱️ add_scheduled_event")
+        rng = np.random.default_rng(0)
+        for density in calendar_densities:
+            dense = _dense_session(density, rng)
+            new_event = (3, 14.25, 15.25, "benchmark event")
+            results[f"add_scheduled_event/{density}_events"] = measure(
+                lambda: dense.add_scheduled_event(*new_event),
+                iterations,
+                setup=lambda: dense.remove_scheduled_event(*new_event),
+            )
+    finally:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            cb.shutdown()
+        if previous is not None:
+            data_dir, user_dir, previous_backend = previous
+            cb.configure(data_dir, user_dir, previous_backend)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare two benchmark runs.
+
+    Returns:
+        The names of benchmarks whose p50 or p95 got more than `threshold`
+        (a fraction) and more than MIN_REGRESSION_MS slower than in the baseline
+    """
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            slower = stats[key] - before[key]
+            if slower > MIN_REGRESSION_MS and slower > before[key] * threshold:
+                regressions.append(name)
+                break
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark latency and throughput of the recommendation hot path"
+    )
+    parser.add_argument("--backend", default=contextual_bandits.PREDICTION_BACKEND)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument(
+        "--train-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=TRAIN_SIZES,
+        help="comma-separated train.vw sizes, in examples",
+    )
+    parser.add_argument(
+        "--calendar-densities",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=CALENDAR_DENSITIES,
+        help="comma-separated numbers of scheduled events",
+    )
+    parser.add_argument("--output", default=None, help="JSON results file")
+    parser.add_argument("--compare", default=None, help="earlier results to compare to")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    results = run_benchmarks(
+        args.backend, args.iterations, args.train_sizes, args.calendar_densities
+    )
+    report = {
+        "commit": commit,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        output = os.path.join(
+            BENCHMARK_DIR, f"hot_path_{commit or 'unknown'}_{args.backend}.json"
+        )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':<42} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/s':>10}")
+    for name, stats in results.items():
+        print(
+            f"{name:<42} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+            f"{stats['p99_ms']:>9.3f} {stats['throughput_per_second']:>10.1f}"
+        )
+    print(f"✅ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"])
+        for name in regressions:
+            before, after = baseline["results"][name], results[name]
+            print(
+                f"⚠️ {name} regressed since {baseline.get('commit')}: "
+                f"p50 {before['p50_ms']:.3f} -> {after['p50_ms']:.3f} ms, "
+                f"p95 {before['p95_ms']:.3f} -> {after['p95_ms']:.3f} ms"
+            )
+        if regressions:
+            raise SystemExit(1)
+        print(f"✅ No regressions against {baseline.get('commit')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -276,12 +276,10 @@ def main():
 
     # Update the model with all the feedback
     print("\n🔄 Updating model with feedback...")
-    # Since we've already recorded all the feedback using record_binary_feedback,
-    # we don't need to pass additional examples to update_model
-    # The update_model function will process the feedback file that was created
-    update_model(
-        "", 0
-    )  # Pass empty example and zero cost as we've already recorded all feedback
+    # All the feedback was already recorded with record_binary_feedback;
+    # update_model applies whatever the background worker has not yet applied
+    # and waits for it, so the predictions below see every example
+    update_model()
 
     # Show how recommendations improve after feedback
     print("\n📊 Showing improved recommendations after feedback")
@@ -1,48 +1,598 @@
-import subprocess
+import atexit
+import copy
+import threading
 import os
+import random
 import json
+import shutil
 import numpy as np
 import pandas as pd
 import tempfile
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Union, Optional
-from event_categories import (
-    get_category_for_event_type,
-    get_default_event_type_for_category,
-    get_event_type_info,
-)
+from event_categories import get_default_event_type_for_category
+import contextual_bandits_helpers
 from contextual_bandits_helpers import (
     TIME_SLOTS,
-    format_vw_example,
     format_day_and_time,
     format_duration,
-    is_time_blocked,
-    get_blocked_reason,
     create_training_example,
     create_prediction_example,
+    resolve_task_window,
+    action_prob_vector,
+    is_relaxation,
+    task_buffer_radius,
 )
+from prediction_engine import TrainingState, create_engine, model_file_for_backend
+from model_registry import ModelRegistry, safe_user_id
+from prediction_cache import PredictionCache, quantize_context
+from feedback_buffer import FeedbackBuffer
+from model_update_worker import ModelUpdateWorker
+from week_occupancy import WeekOccupancy
+from interval_index import EventIndex
+import tracing
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), "data")
 USER_DIR = os.path.join(os.path.dirname(BASE_DIR), "user")
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(USER_DIR, exist_ok=True)
+USER_DATA_DIR = os.path.join(DATA_DIR, "users")  # per-user feedback/training data
+USER_MODEL_DIR = os.path.join(USER_DIR, "users")  # per-user models
+# The shared model the app serves and updates. It is published as new
+# versions (see model_store.py), so it lives outside the repository's tracked
+# files; the model checked in as SEED_MODEL_FILE is only ever read. It is
+# seeded from SEED_MODEL_FILE on first use, not on import.
+LIVE_MODEL_DIR = os.path.join(USER_DIR, "live")
 
 TRAIN_FILE = os.path.join(DATA_DIR, "train.vw")
-TEST_FILE = os.path.join(DATA_DIR, "test.vw")
-MODEL_FILE = os.path.join(USER_DIR, "time_recommendation.model")
-PREDICTIONS_FILE = os.path.join(DATA_DIR, "predictions.txt")
+SEED_MODEL_FILE = os.path.join(USER_DIR, "time_recommendation.model")
+MODEL_FILE = os.path.join(LIVE_MODEL_DIR, "time_recommendation.model")
 FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.vw")
 ACTIONS_FILE = os.path.join(DATA_DIR, "actions.txt")
+FEEDBACK_WAL_FILE = os.path.join(DATA_DIR, "feedback_wal.jsonl")
+
+# Prediction backend: "workspace" keeps the model loaded in-process through the
+# vowpalwabbit bindings, "daemon" talks to a long-lived `vw --daemon` over a
+# local socket, "subprocess" runs the vw binary for every call and "numpy" is a
+# pure NumPy linear bandit that needs no VW at all
+PREDICTION_BACKEND = os.environ.get("TIMELYAI_VW_BACKEND", "workspace")
 
 START_HOUR = 6
 END_HOUR = 22
 TIME_STEP = 0.5
-RECOMMENDED_TIMES = {}
-TASK_BUFFER = 1.0
+# Defined next to the slot helpers that use it; kept here for existing callers
+TASK_BUFFER = contextual_bandits_helpers.TASK_BUFFER
 EVENT_BUFFER = 1.5
-BLOCKED_TIMES = {}
-SCHEDULED_EVENTS = {}
+_PREDICTION_ENGINE = None
+_MODEL_REGISTRY = None
+_FEEDBACK_BUFFER = None
+_MODEL_UPDATE_WORKER = None
+_ENGINE_LOCK = threading.Lock()
+_STORAGE_READY = False
+# Action probabilities for recently seen (quantized) contexts, per model version
+PREDICTION_CACHE = PredictionCache()
+
+# ***************************** SCHEDULER SESSION ******************************
+
+
+class SchedulerSession:
+    """
+    Scheduling state for one user's request: the recommendations made so far,
+    blocked times and scheduled events.
+
+    Each request should build its own session so recommendation requests can
+    run in parallel threads without seeing each other's calendars. A session
+    itself is not meant to be shared between threads.
+    """
+
+    def __init__(self, user_id: Optional[str] = None):
+        """
+        Args:
+            user_id: Firestore user id whose model to use (shared model if None)
+        """
+        self.user_id = user_id
+        self.recommended_times = {}
+        self.blocked_times = WeekOccupancy()
+        self.scheduled_events = EventIndex()
+        # Recommended slots as (day, time slot) boolean matrices, kept in sync
+        # with recommended_times so slot selection is a masked argmax instead
+        # of nested loops
+        self.recommended_mask = np.zeros((7, len(TIME_SLOTS)), dtype=bool)
+        # Recommended slots dilated by TASK_BUFFER
+        self.task_buffer_mask = np.zeros((7, len(TIME_SLOTS)), dtype=bool)
+
+    # ------------------------------------------------------- recommendations
+
+    def generate_recommendations(
+        self,
+        task_type: str,
+        task_duration: float,
+        hours_until_due: float,
+        daily_free_time: float,
+        day_of_week: Optional[int] = None,
+        prefer_splitting: bool = False,
+        long_task_threshold: float = 4.0,
+    ) -> Union[Tuple[float, float, float], List[Tuple[float, float, float]]]:
+        """
+        Predict the best time(s) for a task, handling both short and long tasks.
+
+        Args:
+            task_type: Type of task (e.g., 'hw', 'meeting', 'reading')
+            task_duration: Expected duration in hours
+            hours_until_due: Hours until the task is due
+            daily_free_time: Available free time in the day
+            day_of_week: Day of the week (0=Monday, 6=Sunday)
+            prefer_splitting: Whether to prefer splitting long tasks
+            long_task_threshold: Duration threshold for considering a task "long"
+
+        Returns:
+            For short tasks: A tuple of (day_of_week, time_slot, duration)
+            For long tasks with splitting: A list of tuples [(day_of_week, time_slot, duration), ...]
+        """
+        # If day_of_week is not provided, use the current day
+        if day_of_week is None:
+            day_of_week = datetime.now().weekday()
+
+        # For short tasks, use the standard prediction
+        if task_duration <= long_task_threshold or not prefer_splitting:
+            day, time, duration = self.predict_best_time(
+                task_type,
+                task_duration,
+                hours_until_due,
+                daily_free_time,
+                day_of_week,
+            )
+            return (day, time, duration)
+
+        # For long tasks that should be split
+        num_sessions = int(np.ceil(task_duration / long_task_threshold))
+        session_duration = task_duration / num_sessions
+
+        # Every session shares the same context, so score it once and place
+        # all the sessions together
+        _, _, max_days_ahead = resolve_task_window(
+            task_type, session_duration, hours_until_due
+        )
+        print(f"🔎 Predicting best times for {num_sessions} sessions...")
+        context = (
+            task_type,
+            session_duration,
+            hours_until_due,
+            daily_free_time,
+            day_of_week,
+        )
+        (action_probs,) = predict_action_probs([context], self.user_id)
+
+        return self._place_sessions(
+            action_probs,
+            task_type,
+            session_duration,
+            num_sessions,
+            day_of_week,
+            max_days_ahead,
+        )
+
+    def predict_best_time(
+        self,
+        task_type,
+        task_duration,
+        hours_until_due,
+        daily_free_time,
+        day_of_week=None,
+    ):
+        """
+        Predict the best time to work on a task.
+
+        Args:
+            task_type: Type of task (e.g., 'hw', 'meeting', 'reading')
+            task_duration: Expected duration in hours
+            hours_until_due: Hours until the task is due
+            daily_free_time: Available free time in the day
+            day_of_week: Day of the week (0=Monday, 6=Sunday)
+
+        Returns:
+            A tuple of (day_of_week, recommended_time, duration)
+        """
+        # If day_of_week is not provided, use the current day
+        if day_of_week is None:
+            day_of_week = datetime.now().weekday()
+
+        task_duration, days_until_due, max_days_ahead = resolve_task_window(
+            task_type, task_duration, hours_until_due
+        )
+
+        # Run prediction
+        print("🔎 Predicting best time...")
+        context = (
+            task_type,
+            task_duration,
+            hours_until_due,
+            daily_free_time,
+            day_of_week,
+        )
+        (action_probs,) = predict_action_probs([context], self.user_id)
+
+        return self._assign_time_slot(
+            action_probs,
+            task_type,
+            task_duration,
+            day_of_week,
+            days_until_due,
+            max_days_ahead,
+        )
+
+    def predict_best_times_batch(
+        self, tasks: List[Dict[str, Union[str, float, int, None]]]
+    ) -> List[Tuple[int, float, float]]:
+        """
+        Predict the best times for many tasks with a single model pass.
+
+        All prediction examples are built up front and scored together, then
+        slots are assigned to the tasks in the order given, so earlier tasks in
+        the list get first pick of the week exactly as with repeated
+        predict_best_time calls.
+
+        Args:
+            tasks: List of task contexts, each a dict with the predict_best_time
+                arguments: task_type, task_duration, hours_until_due,
+                daily_free_time and (optionally) day_of_week
+
+        Returns:
+            A list with one (day_of_week, recommended_time, duration) tuple per task
+        """
+        if not tasks:
+            return []
+
+        today = datetime.now().weekday()
+        contexts = []
+        prediction_contexts = []
+        for task in tasks:
+            day_of_week = task.get("day_of_week")
+            if day_of_week is None:
+                day_of_week = today
+
+            task_duration, days_until_due, max_days_ahead = resolve_task_window(
+                task["task_type"], task.get("task_duration"), task["hours_until_due"]
+            )
+            contexts.append(
+                (task_duration, day_of_week, days_until_due, max_days_ahead)
+            )
+            prediction_contexts.append(
+                (
+                    task["task_type"],
+                    task_duration,
+                    task["hours_until_due"],
+                    task["daily_free_time"],
+                    day_of_week,
+                )
+            )
+
+        print(f"🔎 Predicting best times for {len(tasks)} tasks...")
+        all_action_probs = predict_action_probs(prediction_contexts, self.user_id)
+
+        results = []
+        for task, action_probs, context in zip(tasks, all_action_probs, contexts):
+            task_duration, day_of_week, days_until_due, max_days_ahead = context
+            results.append(
+                self._assign_time_slot(
+                    action_probs,
+                    task["task_type"],
+                    task_duration,
+                    day_of_week,
+                    days_until_due,
+                    max_days_ahead,
+                )
+            )
+        return results
+
+    def _assign_time_slot(
+        self,
+        action_probs,
+        task_type,
+        task_duration,
+        day_of_week,
+        days_until_due,
+        max_days_ahead,
+    ):
+        """
+        Pick a free (day, time slot) for a task from the model's action
+        probabilities and record it in recommended_times.
+
+        Returns:
+            A tuple of (day_of_week, recommended_time, duration)
+        """
+        probs = action_prob_vector(action_probs)
+        day_priorities = _day_priorities(day_of_week, days_until_due, max_days_ahead)
+
+        unavailable = self._unavailable_mask(task_type)
+
+        # Take the first day in priority order with a free slot, then the most
+        # likely free slot on that day
+        candidates = ~unavailable[day_priorities]
+        has_free_slot = candidates.any(axis=1)
+        predicted_day = day_of_week
+        if has_free_slot.any():
+            row = int(np.argmax(has_free_slot))
+            predicted_day = day_priorities[row]
+            action_index = int(np.argmax(np.where(candidates[row], probs, -np.inf)))
+        else:
+            # If no suitable time slot found, choose the one with the lowest probability
+            action_index = int(np.argmin(probs))
+            print("⚠️ No suitable time slot found. Choosing the least likely time.")
+
+        predicted_time = TIME_SLOTS[action_index]
+        length = max(1, int(np.ceil(task_duration / TIME_STEP)))
+        self.record_recommendation(predicted_day, action_index, task_type, length)
+
+        print(
+            f"📅 Recommended time: {format_day_and_time(predicted_day, predicted_time)} for {format_duration(task_duration)}"
+        )
+        return (predicted_day, predicted_time, task_duration)
+
+    def _place_sessions(
+        self,
+        action_probs,
+        task_type,
+        session_duration,
+        num_sessions,
+        day_of_week,
+        max_days_ahead,
+    ):
+        """
+        Place all sessions of a split task at once.
+
+        Chooses the free (day, time slot) cells with the highest total
+        probability within the next max_days_ahead days, taking at most an
+        even share of the sessions per day and keeping sessions from
+        overlapping (plus TASK_BUFFER), and records them in recommended_times.
+        When there is not enough free room, the rest go to the least likely
+        slots that don't overlap another session of the task.
+
+        Returns:
+            A list of (day_of_week, recommended_time, duration) tuples in
+            chronological order (fewer than num_sessions only if the sessions
+            can't all fit in the window at all)
+        """
+        probs = action_prob_vector(action_probs)
+        window = [(day_of_week + i) % 7 for i in range(max_days_ahead)]
+        per_day_cap = int(np.ceil(num_sessions / len(window)))
+        radius = 0 if is_relaxation(task_type) else task_buffer_radius()
+        # Slots a session runs over; sessions of the same task must not overlap
+        length = max(1, int(np.ceil(session_duration / TIME_STEP)))
+
+        free = ~self._unavailable_mask(task_type)[window]
+        # Slots taken by this task's own sessions
+        taken = np.zeros_like(free)
+        scores = np.where(free, probs, -np.inf)
+        # Stable sort, so ties go to earlier days and earlier slots
+        order = np.argsort(-scores, axis=None, kind="stable")
+
+        placed = []
+        sessions_per_day = [0] * len(window)
+
+        def place(row, action_index):
+            placed.append((row, action_index))
+            sessions_per_day[row] += 1
+            # Later sessions must not overlap this one, plus TASK_BUFFER
+            first = max(0, action_index - (length - 1) - radius)
+            free[row, first : action_index + length + radius] = False
+            taken[row, max(0, action_index - (length - 1)) : action_index + length] = True
+
+        for cell in order:
+            if len(placed) == num_sessions:
+                break
+            row, action_index = divmod(int(cell), len(TIME_SLOTS))
+            if not free[row, action_index] or sessions_per_day[row] >= per_day_cap:
+                continue
+            place(row, action_index)
+
+        if len(placed) < num_sessions:
+            # Not enough room: put the rest in the least likely slots, as a
+            # single prediction would, still on distinct non-overlapping slots
+            # and on the days with the fewest sessions first
+            print("⚠️ No suitable time slot found. Choosing the least likely time.")
+            by_likelihood = np.argsort(probs, kind="stable")
+            while len(placed) < num_sessions:
+                rows = sorted(range(len(window)), key=lambda r: sessions_per_day[r])
+                cell = next(
+                    (
+                        (row, int(action_index))
+                        for row in rows
+                        for action_index in by_likelihood
+                        if not taken[row, action_index]
+                    ),
+                    None,
+                )
+                if cell is None:
+                    break
+                place(*cell)
+            if len(placed) < num_sessions:
+                print(
+                    f"⚠️ Only {len(placed)} of {num_sessions} sessions fit in the "
+                    f"next {len(window)} days"
+                )
+
+        recommendations = []
+        for row, action_index in sorted(placed):
+            day = window[row]
+            self.record_recommendation(day, action_index, task_type, length)
+            predicted_time = TIME_SLOTS[action_index]
+            print(
+                f"📅 Recommended time: {format_day_and_time(day, predicted_time)} for {format_duration(session_duration)}"
+            )
+            recommendations.append((day, predicted_time, session_duration))
+        return recommendations
+
+    def _unavailable_mask(self, task_type) -> np.ndarray:
+        """
+        Return the (7, len(TIME_SLOTS)) mask of slots a task can't use: blocked,
+        already recommended, or (for non-relaxation tasks) within TASK_BUFFER of
+        another recommendation.
+        """
+        unavailable = self.blocked_times.as_mask() | self.recommended_mask
+        if not is_relaxation(task_type):
+            unavailable = unavailable | self.task_buffer_mask
+        return unavailable
+
+    def record_recommendation(self, day, action_index, task_type, length=1):
+        """
+        Mark a recommendation starting at a slot and running for `length` slots,
+        and dilate it by TASK_BUFFER in the masks.
+        """
+        self.recommended_times[(day, TIME_SLOTS[action_index])] = task_type
+        self.recommended_mask[day, action_index : action_index + length] = True
+        radius = task_buffer_radius()
+        self.task_buffer_mask[
+            day, max(0, action_index - radius) : action_index + length + radius
+        ] = True
+
+    def record_binary_feedback(self, *args, **kwargs) -> None:
+        """Record feedback against this session's user model, see record_binary_feedback."""
+        kwargs.setdefault("user_id", self.user_id)
+        record_binary_feedback(*args, **kwargs)
+
+    def for_user(self, user_id: Optional[str]) -> "SchedulerSession":
+        """Return a session sharing this session's calendar but scoring with another user's model."""
+        session = copy.copy(self)
+        session.user_id = user_id
+        return session
+
+    # -------------------------------------------------------------- calendar
+
+    def reset_recommended_times(self):
+        """Reset the list of recommended times."""
+        # Cleared in place so references to the containers stay valid
+        self.recommended_times.clear()
+        self.recommended_mask[:] = False
+        self.task_buffer_mask[:] = False
+        print("🔄 Reset recommended times")
+
+    def add_blocked_time(self, day_of_week, start_time, end_time, reason="blocked"):
+        """
+        Add a blocked time period to the calendar.
+
+        Args:
+            day_of_week: Day of the week (0=Monday, 6=Sunday)
+            start_time: Start time in 24-hour format (e.g., 14.0 for 2:00 PM)
+            end_time: End time in 24-hour format (e.g., 15.0 for 3:00 PM)
+            reason: Reason for blocking the time (e.g., "meeting", "appointment", "scheduled event")
+        """
+        self.blocked_times.block_range(day_of_week, start_time, end_time, reason)
+
+        print(
+            f"🕒 Blocked time: {format_day_and_time(day_of_week, start_time)} to {format_day_and_time(day_of_week, end_time)} ({reason})"
+        )
+
+    def clear_blocked_times(self):
+        """Clear all blocked times."""
+        self.blocked_times.clear()
+        print("🔄 Cleared all blocked times")
+
+    def clear_scheduled_events(self):
+        """Clear all scheduled events."""
+        self.scheduled_events.clear()
+        print("🔄 Cleared all scheduled events")
+
+    def add_scheduled_event(self, day_of_week, start_time, end_time, event_name):
+        """
+        Add a scheduled event to the calendar.
+
+        Args:
+            day_of_week: Day of the week (0=Monday, 6=Sunday)
+            start_time: Start time in 24-hour format (e.g., 14.0 for 2:00 PM)
+            end_time: End time in 24-hour format (e.g., 15.0 for 3:00 PM)
+            event_name: Name of the scheduled event
+        """
+        # Warn about clashes with events already on the calendar
+        for _, _, other_name in self.scheduled_events.overlapping(
+            day_of_week, start_time, end_time
+        ):
+            print(f"⚠️ {event_name} overlaps with scheduled event: {other_name}")
+
+        # Add to scheduled events
+        self.scheduled_events.add(day_of_week, start_time, end_time, event_name)
+        self._block_scheduled_event(day_of_week, start_time, end_time, event_name)
+
+        print(
+            f"📅 Added scheduled event: {event_name} on {format_day_and_time(day_of_week, start_time)} to {format_day_and_time(day_of_week, end_time)}"
+        )
+
+    def remove_scheduled_event(
+        self, day_of_week, start_time, end_time, event_name=None
+    ):
+        """
+        Remove a scheduled event and free the time it (and its buffer) blocked.
+
+        Args:
+            day_of_week: Day of the week (0=Monday, 6=Sunday)
+            start_time: Start time of the event in 24-hour format
+            end_time: End time of the event in 24-hour format
+            event_name: Name of the event (optional, to pick between identical times)
+
+        Returns:
+            True if the event was found and removed
+        """
+        names = [
+            name
+            for name in self.scheduled_events.find(day_of_week, start_time, end_time)
+            if event_name is None or name == event_name
+        ]
+        if not names:
+            return False
+        event_name = names[0]
+        self.scheduled_events.remove(day_of_week, start_time, end_time, event_name)
+
+        # Drop this event's blocks; slots that other events or blocked times
+        # also cover stay blocked
+        buffer_end = min(end_time + EVENT_BUFFER, END_HOUR)
+        self.blocked_times.unblock_range(
+            day_of_week, start_time, end_time, f"scheduled: {event_name}"
+        )
+        self.blocked_times.unblock_range(
+            day_of_week, end_time, buffer_end, f"event_buffer: {event_name}"
+        )
+
+        print(
+            f"🗑️ Removed scheduled event: {event_name} on {format_day_and_time(day_of_week, start_time)}"
+        )
+        return True
+
+    def find_event_conflicts(self, day_of_week, start_time, end_time):
+        """
+        Find the scheduled events a task in [start_time, end_time) would clash
+        with, including the EVENT_BUFFER after each event.
+
+        Returns:
+            A list of (start_time, end_time, event_name) tuples
+        """
+        return self.scheduled_events.conflicts(
+            day_of_week, start_time, end_time, buffer=EVENT_BUFFER
+        )
+
+    def _block_scheduled_event(self, day_of_week, start_time, end_time, event_name):
+        """Block an event's time and the EVENT_BUFFER after it."""
+        self.blocked_times.block_range(
+            day_of_week, start_time, end_time, f"scheduled: {event_name}"
+        )
+        buffer_end = min(end_time + EVENT_BUFFER, END_HOUR)
+        self.blocked_times.block_range(
+            day_of_week, end_time, buffer_end, f"event_buffer: {event_name}"
+        )
+
+
+# The module-level functions below act on this default session. Its containers
+# are only ever modified in place, so the module globals stay aliases of them.
+_DEFAULT_SESSION = SchedulerSession()
+RECOMMENDED_TIMES = _DEFAULT_SESSION.recommended_times
+BLOCKED_TIMES = _DEFAULT_SESSION.blocked_times
+SCHEDULED_EVENTS = _DEFAULT_SESSION.scheduled_events
+RECOMMENDED_MASK = _DEFAULT_SESSION.recommended_mask
+TASK_BUFFER_MASK = _DEFAULT_SESSION.task_buffer_mask
+
+
+def get_default_session() -> SchedulerSession:
+    """Return the session used by the module-level scheduling functions."""
+    return _DEFAULT_SESSION
 
 # ************************* BACKEND-FACING FUNCTIONS **************************
 
@@ -55,254 +605,133 @@ def generate_recommendations(
     day_of_week: Optional[int] = None,
     prefer_splitting: bool = False,
     long_task_threshold: float = 4.0,
+    user_id: Optional[str] = None,
 ) -> Union[Tuple[float, float, float], List[Tuple[float, float, float]]]:
     """
-    Predict the best time(s) for a task, handling both short and long tasks.
+    Predict the best time(s) for a task on the default session.
+    See SchedulerSession.generate_recommendations.
 
     Args:
-        task_type: Type of task (e.g., 'hw', 'meeting', 'reading')
-        task_duration: Expected duration in hours
-        hours_until_due: Hours until the task is due
-        daily_free_time: Available free time in the day
-        day_of_week: Day of the week (0=Monday, 6=Sunday)
-        prefer_splitting: Whether to prefer splitting long tasks
-        long_task_threshold: Duration threshold for considering a task "long"
-
-    Returns:
-        For short tasks: A tuple of (day_of_week, time_slot, duration)
-        For long tasks with splitting: A list of tuples [(day_of_week, time_slot, duration), ...]
+        user_id: Firestore user id whose model to use (shared model if None)
     """
-    # If day_of_week is not provided, use the current day
-    if day_of_week is None:
-        day_of_week = datetime.now().weekday()
+    return _session_for(user_id).generate_recommendations(
+        task_type,
+        task_duration,
+        hours_until_due,
+        daily_free_time,
+        day_of_week,
+        prefer_splitting,
+        long_task_threshold,
+    )
 
-    # For short tasks, use the standard prediction
-    if task_duration <= long_task_threshold or not prefer_splitting:
-        day, time, duration = predict_best_time(
-            task_type, task_duration, hours_until_due, daily_free_time, day_of_week
-        )
-        return (day, time, duration)
 
-    # For long tasks that should be split
-    num_sessions = int(np.ceil(task_duration / long_task_threshold))
-    session_duration = task_duration / num_sessions
-    recommendations = []
+def predict_best_time(
+    task_type,
+    task_duration,
+    hours_until_due,
+    daily_free_time,
+    day_of_week=None,
+    user_id=None,
+):
+    """
+    Predict the best time to work on a task on the default session.
+    See SchedulerSession.predict_best_time.
 
-    # Calculate hours until due for each session
-    hours_per_session = hours_until_due / num_sessions
+    Args:
+        user_id: Firestore user id whose model to use (shared model if None)
+    """
+    return _session_for(user_id).predict_best_time(
+        task_type, task_duration, hours_until_due, daily_free_time, day_of_week
+    )
 
-    for i in range(num_sessions):
-        # Get recommendation for this session
-        day, time, _ = predict_best_time(
-            task_type,
-            session_duration,
-            hours_per_session * (num_sessions - i),
-            daily_free_time,
-            day_of_week,
-        )
-        recommendations.append((day, time, session_duration))
 
-        # Move to next day for next session
-        day_of_week = (day_of_week + 1) % 7
+def predict_best_times_batch(
+    tasks: List[Dict[str, Union[str, float, int, None]]],
+    user_id: Optional[str] = None,
+) -> List[Tuple[int, float, float]]:
+    """
+    Predict the best times for many tasks on the default session.
+    See SchedulerSession.predict_best_times_batch.
 
-    return recommendations
+    Args:
+        user_id: Firestore user id whose model to use (shared model if None)
+    """
+    return _session_for(user_id).predict_best_times_batch(tasks)
 
 
-def predict_best_time(
-    task_type, task_duration, hours_until_due, daily_free_time, day_of_week=None
-):
+def predict_action_probs(
+    contexts: List[Tuple[str, float, float, float, int]],
+    user_id: Optional[str] = None,
+) -> List[Dict[int, float]]:
     """
-    Predict the best time to work on a task.
+    Score prediction contexts with a user's model, going through PREDICTION_CACHE.
+
+    Contexts already scored by the current model version (after quantization)
+    are served from the cache; the rest are scored with one model call.
 
     Args:
-        task_type: Type of task (e.g., 'hw', 'meeting', 'reading')
-        task_duration: Expected duration in hours
-        hours_until_due: Hours until the task is due
-        daily_free_time: Available free time in the day
-        day_of_week: Day of the week (0=Monday, 6=Sunday)
+        contexts: (task_type, task_duration, hours_until_due, daily_free_time,
+            day_of_week) tuples
+        user_id: Firestore user id whose model to use (shared model if None)
 
     Returns:
-        A tuple of (day_of_week, recommended_time, duration)
-    """
-    # If day_of_week is not provided, use the current day
-    if day_of_week is None:
-        day_of_week = datetime.now().weekday()
-
-    # Calculate the appropriate day range based on hours until due
-    days_until_due = hours_until_due / 24.0
-    max_days_ahead = min(7, max(1, int(days_until_due)))
-
-    # Get category information for the task type
-    category = get_category_for_event_type(task_type)
-    event_info = get_event_type_info(task_type)
-
-    # If we have event info, use it to adjust parameters
-    if event_info:
-        # Use typical duration if not provided
-        if task_duration is None or task_duration <= 0:
-            task_duration = event_info["typical_duration"]
-
-        # Adjust urgency based on category
-        if event_info["typical_urgency"] == "high":
-            # For high urgency tasks, prioritize days closer to due date
-            max_days_ahead = min(max_days_ahead, 3)
-        elif event_info["typical_urgency"] == "low":
-            # For low urgency tasks, we can spread them out more
-            max_days_ahead = min(max_days_ahead, 5)
-
-    # Create a prediction example
-    example = create_prediction_example(
-        task_type, task_duration, hours_until_due, daily_free_time, day_of_week
-    )
+        The {action: probability} dict for each context, in order
+    """
+    with lease_prediction_engine(user_id) as engine:
+        keys = [
+            PREDICTION_CACHE.key(engine, quantize_context(*context))
+            for context in contexts
+        ]
+        results = [PREDICTION_CACHE.get(key) for key in keys]
+        missing = [i for i, probs in enumerate(results) if probs is None]
+        tracing.count("prediction_cache.hits", len(contexts) - len(missing))
+        tracing.count("prediction_cache.misses", len(missing))
+        if not missing:
+            return results
+
+        examples = [create_prediction_example(*contexts[i]) for i in missing]
+        with tracing.span("model.predict", backend=engine.name):
+            if len(examples) == 1:
+                predictions = [engine.predict(examples[0])]
+            else:
+                predictions = engine.predict_batch(examples)
+        for i, action_probs in zip(missing, predictions):
+            PREDICTION_CACHE.put(keys[i], action_probs)
+            results[i] = action_probs
+    return results
+
+
+def _session_for(user_id):
+    """Return the default session, scoring with the given user's model."""
+    if user_id == _DEFAULT_SESSION.user_id:
+        return _DEFAULT_SESSION
+    return _DEFAULT_SESSION.for_user(user_id)
+
+
+def _day_priorities(day_of_week, days_until_due, max_days_ahead) -> List[int]:
+    """
+    Determine the priority of days based on due date and task duration.
 
-    # Write the example to the test file
-    with open(TEST_FILE, "w") as f:
-        f.write(example)
-
-    # Run prediction
-    print("🔎 Predicting best time...")
-    cmd = [
-        "vw",
-        "--cb_explore",
-        str(len(TIME_SLOTS)),  # Number of actions
-        "-t",  # test mode
-        "-i",
-        MODEL_FILE,
-        "-d",
-        TEST_FILE,
-        "-p",
-        PREDICTIONS_FILE,
-        "--quiet",
-    ]
-
-    subprocess.run(cmd, check=True)
-
-    # Read the prediction
-    with open(PREDICTIONS_FILE, "r") as f:
-        prediction_str = f.read().strip()
-
-    # Parse the prediction string (format: "action:probability,action:probability,...")
-    action_probs = {}
-    for pair in prediction_str.split(","):
-        if ":" in pair:
-            action, prob = pair.split(":")
-            action_probs[int(action)] = float(prob)
-
-    # Sort actions by probability (highest first)
-    sorted_actions = sorted(action_probs.items(), key=lambda x: x[1], reverse=True)
-
-    # Determine if this is a relaxation task (which can be scheduled closer to other tasks)
-    is_relaxation = task_type.lower() in [
-        "relaxation",
-        "relax",
-        "break",
-        "rest",
-        "sleep",
-        "nap",
-    ]
-
-    # Find the first action that hasn't been recommended yet and respects the buffer
-    predicted_time = None
-    predicted_day = day_of_week
-
-    # Determine the priority of days based on due date and task duration
-    # For urgent tasks (due soon), prioritize days closer to due date
-    # For less urgent tasks, distribute more evenly
+    For urgent tasks (due soon), prioritize days closer to due date.
+    For less urgent tasks, distribute more evenly.
+    """
     if days_until_due <= 1:
         # Very urgent (due today or tomorrow) - prioritize today and tomorrow
-        day_priorities = [day_of_week, (day_of_week + 1) % 7]
-    elif days_until_due <= 3:
+        return [day_of_week, (day_of_week + 1) % 7]
+    if days_until_due <= 3:
         # Urgent (due in 2-3 days) - prioritize next 3 days
-        day_priorities = [(day_of_week + i) % 7 for i in range(3)]
-    else:
-        # Less urgent - distribute across available days
-        # Calculate how many days we can spread across
-        available_days = min(
-            max_days_ahead, 5
-        )  # Cap at 5 days to leave some flexibility
-        day_priorities = [(day_of_week + i) % 7 for i in range(available_days)]
-
-        # For tasks with plenty of time, try to distribute evenly
-        if days_until_due > 7:
-            # Shuffle the days to avoid always starting with the same day
-            import random
-
-            random.shuffle(day_priorities)
-
-    # Try each day in order of priority
-    for candidate_day in day_priorities:
-        for action_index, _ in sorted_actions:
-            time_slot = TIME_SLOTS[action_index]
-
-            # Check if this time slot is already recommended for this day
-            if (candidate_day, time_slot) in RECOMMENDED_TIMES:
-                continue
+        return [(day_of_week + i) % 7 for i in range(3)]
 
-            # Check if this time slot is blocked
-            if is_time_blocked(candidate_day, time_slot, BLOCKED_TIMES):
-                blocked_reason = get_blocked_reason(
-                    candidate_day, time_slot, BLOCKED_TIMES
-                )
-                print(
-                    f"⚠️ Time slot {format_day_and_time(candidate_day, time_slot)} is blocked: {blocked_reason}"
-                )
-                continue
-
-            # For non-relaxation tasks, check if this time slot is too close to other tasks
-            if not is_relaxation:
-                # Check if this time slot is too close to any other recommended time on the same day
-                too_close = False
-                for (rec_day, rec_time), _ in RECOMMENDED_TIMES.items():
-                    if rec_day == candidate_day:
-                        # Calculate the time difference in hours
-                        time_diff = abs(time_slot - rec_time)
-                        if time_diff < TASK_BUFFER:
-                            too_close = True
-                            break
-
-                if too_close:
-                    continue
-
-            # This time slot is valid
-            predicted_time = time_slot
-            predicted_day = candidate_day
-            break
-
-        if predicted_time is not None:
-            break
-
-    # If no suitable time slot found, find the one with the lowest probability
-    if predicted_time is None:
-        # Get the action with the lowest probability
-        action_index = min(action_probs.items(), key=lambda x: x[1])[0]
-        predicted_time = TIME_SLOTS[action_index]
-        print("⚠️ No suitable time slot found. Choosing the least likely time.")
+    # Less urgent - distribute across available days
+    # Calculate how many days we can spread across
+    available_days = min(max_days_ahead, 5)  # Cap at 5 days to leave some flexibility
+    day_priorities = [(day_of_week + i) % 7 for i in range(available_days)]
 
-    # Add the recommended time to the set of recommended times
-    RECOMMENDED_TIMES[(predicted_day, predicted_time)] = task_type
-
-    # Format the time for display
-    hours = int(predicted_time)
-    minutes = int((predicted_time - hours) * 60)
-    time_str = f"{hours:02d}:{minutes:02d}"
-
-    # Format the day for display
-    day_names = [
-        "Monday",
-        "Tuesday",
-        "Wednesday",
-        "Thursday",
-        "Friday",
-        "Saturday",
-        "Sunday",
-    ]
-    day_str = day_names[predicted_day]
-
-    # Format duration for display
-    duration_str = format_duration(task_duration)
-
-    print(f"📅 Recommended time: {day_str} at {time_str} for {duration_str}")
-    return (predicted_day, predicted_time, task_duration)
+    # For tasks with plenty of time, try to distribute evenly
+    if days_until_due > 7:
+        # Shuffle the days to avoid always starting with the same day
+        random.shuffle(day_priorities)
+    return day_priorities
 
 
 def record_binary_feedback(
@@ -314,6 +743,7 @@ def record_binary_feedback(
     day_of_week: int,
     was_accepted: bool,
     probability: Optional[float] = None,
+    user_id: Optional[str] = None,
 ) -> None:
     """
     Record binary feedback for a time recommendation.
@@ -327,6 +757,7 @@ def record_binary_feedback(
         day_of_week: Day of the week (0=Monday, 6=Sunday)
         was_accepted: Whether the recommendation was accepted
         probability: The probability of the action (optional)
+        user_id: Firestore user id whose model to update (shared model if None)
     """
     # Create training example with binary feedback
     example = create_training_example(
@@ -340,147 +771,315 @@ def record_binary_feedback(
         probability,
     )
 
-    # Cost is 0 if accepted, 1 if rejected
-    cost = 0 if was_accepted else 1
-
-    # Update the model with the feedback
-    update_model(example, cost)
+    # Log the feedback durably and return; the model update worker applies it
+    # to the model in mini-batches
+    get_feedback_buffer().append(example, user_id)
 
 
-def update_model(example: str, cost: float):
+def update_model(example: str = "", cost: float = 0.0, user_id: Optional[str] = None):
     """
     Update the model with new feedback data.
 
+    Feedback recorded with record_binary_feedback that the model update
+    worker has not applied yet is applied now, and this call waits for it,
+    so predictions made afterwards see all feedback recorded so far.
+
     Args:
-        example: The training example to add to the feedback file
+        example: A training example to learn from as well (optional). It is
+            logged to the feedback log first, like recorded feedback, so it
+            survives a crash before the next checkpoint.
         cost: The cost/reward for the action
+        user_id: Firestore user id whose model to update (shared model if None)
     """
-    # Append the example to the feedback file
-    with open(FEEDBACK_FILE, "a") as f:
-        f.write(f"{example}\n")
-
-    # Check if we have enough feedback to update the model
-    if not os.path.exists(FEEDBACK_FILE) or os.path.getsize(FEEDBACK_FILE) == 0:
+    print("🔄 Updating model with new feedback...")
+    buffer = get_feedback_buffer()
+    if example:
+        buffer.append(example, user_id)
+    if not buffer.flush():
         print("⚠️ No feedback data to update the model")
         return
-
-    print("🔄 Updating model with new feedback...")
-
-    cmd = [
-        "vw",
-        "--cb_explore",
-        str(len(TIME_SLOTS)),  # Number of actions
-        "-d",
-        FEEDBACK_FILE,
-        "-i",
-        MODEL_FILE,
-        "-f",
-        MODEL_FILE,
-        "--quiet",
-    ]
-
-    subprocess.run(cmd, check=True)
     print("✅ Model updated with new feedback")
 
-    # Clear the feedback file after updating
-    with open(FEEDBACK_FILE, "w") as f:
-        f.write("")
 
+def train_model(incremental: bool = False, data_file: Optional[str] = None):
+    """
+    Train the contextual bandits model.
 
-def train_model():
-    """Train the contextual bandits model."""
+    Args:
+        incremental: Continue from the current model over only the examples
+            appended to the training data since the last training run, instead
+            of retraining on the whole file
+        data_file: Training data (TRAIN_FILE if None)
+    """
     print("🚂 Training time recommendation model...")
+    engine = get_prediction_engine()
 
     # Create a temporary file with the action space
     with open(ACTIONS_FILE, "w") as f:
         for i, time in enumerate(TIME_SLOTS):
             f.write(f"{i}:{time}\n")
 
-    cmd = [
-        "vw",
-        "--cb_explore",
-        str(len(TIME_SLOTS)),  # Number of actions
-        "-d",
-        TRAIN_FILE,
-        "-f",
-        MODEL_FILE,
-        "--quiet",
-    ]
+    engine.train(data_file or TRAIN_FILE, incremental=incremental)
+    print("✅ Model trained and saved to:", engine.model_file)
 
-    subprocess.run(cmd, check=True)
-    print("✅ Model trained and saved to:", MODEL_FILE)
 
+def get_prediction_engine(user_id: Optional[str] = None):
+    """
+    Return the prediction engine for a user, creating it on first use.
 
-def reset_recommended_times():
-    """Reset the list of recommended times."""
-    global RECOMMENDED_TIMES
-    RECOMMENDED_TIMES = {}
-    print("🔄 Reset recommended times")
+    Safe to call from several threads; each engine serializes its own calls.
 
+    Args:
+        user_id: Firestore user id, or None for the shared model in MODEL_FILE
+    """
+    global _PREDICTION_ENGINE
+    if user_id is not None:
+        return _model_registry().get(user_id)
+    with _ENGINE_LOCK:
+        _prepare_storage()
+        if _PREDICTION_ENGINE is None:
+            _PREDICTION_ENGINE = create_engine(
+                PREDICTION_BACKEND,
+                model_file_for_backend(PREDICTION_BACKEND, MODEL_FILE),
+                len(TIME_SLOTS),
+                FEEDBACK_FILE,
+            )
+        return _PREDICTION_ENGINE
 
-def add_blocked_time(day_of_week, start_time, end_time, reason="blocked"):
+
+@contextmanager
+def lease_prediction_engine(user_id: Optional[str] = None):
     """
-    Add a blocked time period to the calendar.
+    Return a user's prediction engine for the duration of a with block.
+
+    Unlike get_prediction_engine, a per-user engine stays open until the block
+    exits even if the model registry evicts it meanwhile (see
+    ModelRegistry.lease).
 
     Args:
-        day_of_week: Day of the week (0=Monday, 6=Sunday)
-        start_time: Start time in 24-hour format (e.g., 14.0 for 2:00 PM)
-        end_time: End time in 24-hour format (e.g., 15.0 for 3:00 PM)
-        reason: Reason for blocking the time (e.g., "meeting", "appointment", "scheduled event")
+        user_id: Firestore user id, or None for the shared model in MODEL_FILE
     """
-    global BLOCKED_TIMES
+    if user_id is None:
+        yield get_prediction_engine()
+        return
+    with _model_registry().lease(user_id) as engine:
+        yield engine
+
+
+def _model_registry() -> ModelRegistry:
+    """Return the per-user model registry, creating it on first use."""
+    global _MODEL_REGISTRY
+    with _ENGINE_LOCK:
+        _prepare_storage()
+        if _MODEL_REGISTRY is None:
+            seed_model_file = model_file_for_backend(PREDICTION_BACKEND, MODEL_FILE)
+            _MODEL_REGISTRY = ModelRegistry(
+                _create_user_engine,
+                USER_MODEL_DIR,
+                seed_model_file=seed_model_file,
+                suffix=os.path.splitext(seed_model_file)[1],
+            )
+        return _MODEL_REGISTRY
 
-    # Find all time slots that overlap with the blocked period
-    for time_slot in TIME_SLOTS:
-        if start_time <= time_slot < end_time:
-            BLOCKED_TIMES[(day_of_week, time_slot)] = reason
 
-    print(
-        f"🕒 Blocked time: {format_day_and_time(day_of_week, start_time)} to {format_day_and_time(day_of_week, end_time)} ({reason})"
-    )
+def get_feedback_buffer() -> FeedbackBuffer:
+    """
+    Return the feedback buffer.
+
+    On first use this replays feedback left by a previous run and starts the
+    background worker that applies logged feedback to the models.
+    """
+    global _FEEDBACK_BUFFER, _MODEL_UPDATE_WORKER
+    with _ENGINE_LOCK:
+        _prepare_storage()
+        if _FEEDBACK_BUFFER is None:
+            buffer = FeedbackBuffer(_apply_feedback, FEEDBACK_WAL_FILE)
+            buffer.replay()
+            _MODEL_UPDATE_WORKER = ModelUpdateWorker(
+                buffer, periodic=_checkpoint_idle_engines
+            )
+            _MODEL_UPDATE_WORKER.start()
+            _FEEDBACK_BUFFER = buffer
+        return _FEEDBACK_BUFFER
 
 
-def clear_blocked_times():
-    """Clear all blocked times."""
-    global BLOCKED_TIMES
-    BLOCKED_TIMES = {}
-    print("🔄 Cleared all blocked times")
+def get_model_update_metrics() -> dict:
+    """Return the model update worker's queue depth and update lag metrics."""
+    get_feedback_buffer()
+    return _MODEL_UPDATE_WORKER.metrics()
 
 
-def clear_scheduled_events():
-    """Clear all scheduled events."""
-    global SCHEDULED_EVENTS
-    SCHEDULED_EVENTS = {}
-    print("🔄 Cleared all scheduled events")
+def _checkpoint_idle_engines():
+    """
+    Checkpoint the engines whose checkpoint interval passed with updates still
+    pending, which learn() only notices when more examples arrive (runs on the
+    update worker).
+    """
+    engine, registry = _PREDICTION_ENGINE, _MODEL_REGISTRY
+    checkpoints = getattr(engine, "checkpoints", None)
+    if checkpoints is not None and checkpoints.due():
+        engine.checkpoint()
+    if registry is not None:
+        registry.checkpoint_due()
 
 
-def add_scheduled_event(day_of_week, start_time, end_time, event_name):
+def _apply_feedback(user_id, examples):
+    """Learn a batch of feedback into a user's model and persist it (runs on the update worker)."""
+    print(f"🔄 Updating model with {len(examples)} feedback examples...")
+    with lease_prediction_engine(user_id) as engine:
+        with tracing.span("model.learn", backend=engine.name):
+            engine.learn(examples)
+            engine.checkpoint()
+        if user_id is not None:
+            _append_user_training_data(user_id, examples, engine.model_file)
+
+
+def user_training_file(user_id) -> str:
+    """Return the file a user's feedback is logged to for retraining."""
+    return os.path.join(USER_DATA_DIR, f"{safe_user_id(user_id)}.vw")
+
+
+def _append_user_training_data(user_id, examples, model_file):
     """
-    Add a scheduled event to the calendar.
+    Log feedback a user's model has learned to the user's training file, which
+    train_all_users.py retrains the per-user models from.
+    """
+    data_file = user_training_file(user_id)
+    with open(data_file, "a") as f:
+        for example in examples:
+            f.write(f"{example}\n")
+    # The model has already learned every line of the file, so an incremental
+    # retrain only picks up examples appended by other means
+    TrainingState(model_file).record(data_file)
+
+
+def _prepare_storage():
+    """
+    Create the data and model directories and seed the shared model, once.
+    Called with _ENGINE_LOCK held.
+    """
+    global _STORAGE_READY
+    if _STORAGE_READY:
+        return
+    for directory in (DATA_DIR, USER_DATA_DIR, LIVE_MODEL_DIR):
+        os.makedirs(directory, exist_ok=True)
+    if not os.path.lexists(MODEL_FILE) and os.path.exists(SEED_MODEL_FILE):
+        shutil.copyfile(SEED_MODEL_FILE, MODEL_FILE)
+    _STORAGE_READY = True
+
+
+def configure(
+    data_dir: Optional[str] = None,
+    user_dir: Optional[str] = None,
+    backend: Optional[str] = None,
+):
+    """
+    Point the module at other data and model directories, or another backend.
+
+    The file layout inside the directories stays the same, e.g. the shared
+    model is seeded from `user_dir`/time_recommendation.model. Nothing is
+    created until the models are first used. Call before anything is loaded,
+    or after shutdown().
 
     Args:
-        day_of_week: Day of the week (0=Monday, 6=Sunday)
-        start_time: Start time in 24-hour format (e.g., 14.0 for 2:00 PM)
-        end_time: End time in 24-hour format (e.g., 15.0 for 3:00 PM)
-        event_name: Name of the scheduled event
+        data_dir: Directory for training data, feedback and the feedback log
+        user_dir: Directory for the models
+        backend: Prediction backend, see PREDICTION_BACKEND
+    """
+    global DATA_DIR, USER_DIR, USER_DATA_DIR, USER_MODEL_DIR, LIVE_MODEL_DIR
+    global TRAIN_FILE, SEED_MODEL_FILE, MODEL_FILE, FEEDBACK_FILE, ACTIONS_FILE
+    global FEEDBACK_WAL_FILE, PREDICTION_BACKEND, _STORAGE_READY
+    with _ENGINE_LOCK:
+        if data_dir is not None:
+            DATA_DIR = data_dir
+            USER_DATA_DIR = os.path.join(DATA_DIR, "users")
+            TRAIN_FILE = os.path.join(DATA_DIR, "train.vw")
+            FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.vw")
+            ACTIONS_FILE = os.path.join(DATA_DIR, "actions.txt")
+            FEEDBACK_WAL_FILE = os.path.join(DATA_DIR, "feedback_wal.jsonl")
+        if user_dir is not None:
+            USER_DIR = user_dir
+            USER_MODEL_DIR = os.path.join(USER_DIR, "users")
+            LIVE_MODEL_DIR = os.path.join(USER_DIR, "live")
+            SEED_MODEL_FILE = os.path.join(USER_DIR, "time_recommendation.model")
+            MODEL_FILE = os.path.join(LIVE_MODEL_DIR, "time_recommendation.model")
+        if backend is not None:
+            PREDICTION_BACKEND = backend
+        _STORAGE_READY = False
+    PREDICTION_CACHE.clear()
+
+
+@atexit.register
+def shutdown():
     """
-    global SCHEDULED_EVENTS, BLOCKED_TIMES
+    Apply buffered feedback, then write back and release every engine.
+
+    The models are loaded again on next use, so this can also be called to
+    switch configuration (see configure) in a running process.
+    """
+    global _PREDICTION_ENGINE, _MODEL_REGISTRY, _FEEDBACK_BUFFER, _MODEL_UPDATE_WORKER
+    # The buffered feedback is applied through the engines, so close them last
+    if _MODEL_UPDATE_WORKER is not None:
+        _MODEL_UPDATE_WORKER.stop()
+    if _FEEDBACK_BUFFER is not None:
+        _FEEDBACK_BUFFER.close()
+    with _ENGINE_LOCK:
+        registry, engine = _MODEL_REGISTRY, _PREDICTION_ENGINE
+        _PREDICTION_ENGINE = _MODEL_REGISTRY = None
+        _FEEDBACK_BUFFER = _MODEL_UPDATE_WORKER = None
+    if registry is not None:
+        registry.close()
+    if engine is not None:
+        engine.close()
+
+
+def _create_user_engine(user_id, model_file):
+    """Create the engine for one user's model (used by the model registry)."""
+    return create_engine(
+        PREDICTION_BACKEND,
+        model_file,
+        len(TIME_SLOTS),
+        os.path.join(USER_DATA_DIR, f"{safe_user_id(user_id)}.feedback.vw"),
+    )
 
-    # Add to scheduled events
-    SCHEDULED_EVENTS[(day_of_week, start_time, end_time)] = event_name
 
-    # Also block the time
-    add_blocked_time(day_of_week, start_time, end_time, f"scheduled: {event_name}")
+def reset_recommended_times():
+    """Reset the list of recommended times on the default session."""
+    _DEFAULT_SESSION.reset_recommended_times()
+
 
-    # Add buffer after scheduled event
-    buffer_end = min(end_time + EVENT_BUFFER, END_HOUR)
-    add_blocked_time(day_of_week, end_time, buffer_end, f"event_buffer: {event_name}")
+def add_blocked_time(day_of_week, start_time, end_time, reason="blocked"):
+    """Add a blocked time period to the default session, see SchedulerSession.add_blocked_time."""
+    _DEFAULT_SESSION.add_blocked_time(day_of_week, start_time, end_time, reason)
 
-    print(
-        f"📅 Added scheduled event: {event_name} on {format_day_and_time(day_of_week, start_time)} to {format_day_and_time(day_of_week, end_time)}"
+
+def clear_blocked_times():
+    """Clear all blocked times on the default session."""
+    _DEFAULT_SESSION.clear_blocked_times()
+
+
+def clear_scheduled_events():
+    """Clear all scheduled events on the default session."""
+    _DEFAULT_SESSION.clear_scheduled_events()
+
+
+def add_scheduled_event(day_of_week, start_time, end_time, event_name):
+    """Add a scheduled event to the default session, see SchedulerSession.add_scheduled_event."""
+    _DEFAULT_SESSION.add_scheduled_event(day_of_week, start_time, end_time, event_name)
+
+
+def remove_scheduled_event(day_of_week, start_time, end_time, event_name=None):
+    """Remove a scheduled event from the default session, see SchedulerSession.remove_scheduled_event."""
+    return _DEFAULT_SESSION.remove_scheduled_event(
+        day_of_week, start_time, end_time, event_name
     )
 
 
+def find_event_conflicts(day_of_week, start_time, end_time):
+    """Find scheduled events on the default session that clash with a time range."""
+    return _DEFAULT_SESSION.find_event_conflicts(day_of_week, start_time, end_time)
+
+
 # ***************************** FOR DEMO + TESTING *****************************
 
 if __name__ == "__main__":
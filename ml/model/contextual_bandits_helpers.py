@@ -1,12 +1,16 @@
 import numpy as np
 from datetime import datetime
-from typing import Dict, List, Tuple, Union, Optional
-from event_categories import get_category_for_event_type
+from typing import TYPE_CHECKING, Dict, List, Union, Optional
+from event_categories import get_category_for_event_type, get_event_type_info
+
+if TYPE_CHECKING:
+    from week_occupancy import WeekOccupancy
 
 # Constants for time recommendations
 START_HOUR = 6  # 6 AM
 END_HOUR = 22  # 10 PM
 TIME_STEP = 0.5  # 30-minute intervals
+TASK_BUFFER = 1.0  # hours kept free around each recommended task
 
 
 def generate_time_slots() -> List[float]:
@@ -78,18 +82,71 @@ def format_duration(hours: float) -> str:
             return f"{whole_hours} hour{'s' if whole_hours != 1 else ''} and {minutes} minutes"
 
 
-def is_time_blocked(
-    day: int, time: float, blocked_times: Dict[Tuple[int, float], str]
-) -> bool:
+def is_time_blocked(day: int, time: float, blocked_times: "WeekOccupancy") -> bool:
     """Check if a time slot is blocked."""
-    return (day, time) in blocked_times
+    return blocked_times.is_blocked(day, time)
 
 
 def get_blocked_reason(
-    day: int, time: float, blocked_times: Dict[Tuple[int, float], str]
+    day: int, time: float, blocked_times: "WeekOccupancy"
 ) -> Optional[str]:
     """Get the reason for blocking a time slot."""
-    return blocked_times.get((day, time))
+    return blocked_times.reason(day, time)
+
+
+def resolve_task_window(task_type, task_duration, hours_until_due):
+    """
+    Work out the task duration and how far ahead the task may be scheduled.
+
+    Returns:
+        A tuple of (task_duration, days_until_due, max_days_ahead)
+    """
+    # Calculate the appropriate day range based on hours until due
+    days_until_due = hours_until_due / 24.0
+    max_days_ahead = min(7, max(1, int(days_until_due)))
+
+    # Get category information for the task type
+    event_info = get_event_type_info(task_type)
+
+    # If we have event info, use it to adjust parameters
+    if event_info:
+        # Use typical duration if not provided
+        if task_duration is None or task_duration <= 0:
+            task_duration = event_info["typical_duration"]
+
+        # Adjust urgency based on category
+        if event_info["typical_urgency"] == "high":
+            # For high urgency tasks, prioritize days closer to due date
+            max_days_ahead = min(max_days_ahead, 3)
+        elif event_info["typical_urgency"] == "low":
+            # For low urgency tasks, we can spread them out more
+            max_days_ahead = min(max_days_ahead, 5)
+
+    return task_duration, days_until_due, max_days_ahead
+
+
+def action_prob_vector(action_probs: Dict[int, float]) -> np.ndarray:
+    """Turn an {action: probability} dict into a vector indexed by action."""
+    probs = np.zeros(len(TIME_SLOTS))
+    probs[list(action_probs.keys())] = list(action_probs.values())
+    return probs
+
+
+def is_relaxation(task_type: str) -> bool:
+    """Relaxation tasks can be scheduled closer to other tasks."""
+    return task_type.lower() in [
+        "relaxation",
+        "relax",
+        "break",
+        "rest",
+        "sleep",
+        "nap",
+    ]
+
+
+def task_buffer_radius() -> int:
+    """Number of neighbouring slots on each side that fall within TASK_BUFFER."""
+    return max(0, int(np.ceil(TASK_BUFFER / TIME_STEP)) - 1)
 
 
 def create_training_example(
@@ -0,0 +1,245 @@
+"""
+Group-commit feedback buffer for the time recommendation model.
+
+Applying every accept/reject to the model as it arrives rewrites the model
+once per click. Instead, feedback is appended to a write-ahead log (WAL) on
+disk, which is fsynced before the call returns, and applied to the models in
+mini-batches by the background model update worker (see
+model_update_worker.py). Concurrent writers share fsyncs (group commit), so a
+burst of feedback costs a handful of disk syncs.
+
+Entries stay in the log until the batch they belong to has been learned and
+checkpointed, so feedback survives a crash: the log is replayed on startup.
+A crash between applying a batch and trimming the log replays that batch
+again, so delivery is at least once.
+
+The buffer also counts every batch it applies, whoever flushes it (the update
+worker, update_model() or close()), and the update lag: how long feedback
+waited between being logged and being learned into the model.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Entry = Tuple[Optional[str], str, float]  # (user_id, example, logged_at)
+
+
+def _encode(entry: Entry) -> str:
+    """Return the log line for an entry."""
+    user_id, example, logged_at = entry
+    record = {"user_id": user_id, "example": example, "logged_at": logged_at}
+    return json.dumps(record) + "\n"
+
+
+class FeedbackBuffer:
+    """A durable queue of feedback examples, applied to the models in batches."""
+
+    def __init__(
+        self,
+        apply_batch: Callable[[Optional[str], List[str]], None],
+        wal_file: str,
+    ):
+        """
+        Args:
+            apply_batch: Callable (user_id, examples) that learns the examples
+                into that user's model and persists the result
+            wal_file: Path of the write-ahead log
+        """
+        self.apply_batch = apply_batch
+        self.wal_file = wal_file
+
+        self._pending: List[Entry] = []
+        # Guards _pending, the log handle and counters. Reentrant so pending()
+        # and oldest_pending_time() can be called while holding `changed`.
+        self._lock = threading.RLock()
+        # Notified whenever an example is logged, for the update worker to wait on
+        self.changed = threading.Condition(self._lock)
+        self._sync_lock = threading.Lock()  # one fsync at a time
+        self._apply_lock = threading.Lock()  # one batch applied at a time
+        self._written = 0  # entries written to the log
+        self._synced = 0  # entries known to be on disk
+
+        # Apply metrics, see stats()
+        self.batches_applied = 0
+        self.examples_applied = 0
+        self.failures = 0
+        self.last_update_lag: Optional[float] = None  # seconds
+        self.max_update_lag = 0.0  # seconds
+        self.last_update_at: Optional[float] = None  # epoch seconds
+        self._wal = open(wal_file, "a", encoding="utf-8")
+
+    # ------------------------------------------------------------------ writes
+
+    def append(self, example: str, user_id: Optional[str] = None):
+        """
+        Durably record a feedback example.
+
+        Returns once the example is in the fsynced log; the model is updated
+        later, when the batch it belongs to is applied.
+        """
+        logged_at = time.time()
+        line = _encode((user_id, example, logged_at))
+        with self._lock:
+            self._wal.write(line)
+            self._written += 1
+            sequence = self._written
+            self._pending.append((user_id, example, logged_at))
+        self._sync(sequence)
+        with self.changed:
+            self.changed.notify_all()
+
+    def _sync(self, sequence):
+        """Make sure the log is on disk up to entry `sequence`."""
+        with self._sync_lock:
+            if self._synced >= sequence:
+                return  # another writer's fsync already covered this entry
+            with self._lock:
+                target = self._written
+                self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._synced = target
+
+    # ------------------------------------------------------------------ apply
+
+    def flush(self) -> List[Entry]:
+        """
+        Apply every pending example to the models now.
+
+        Each user's examples are applied separately. If some users fail, their
+        entries stay pending (and in the log) for the next flush, the others
+        are dropped, and the first error is raised.
+
+        Returns:
+            The entries that were applied
+        """
+        with self._apply_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return batch
+
+            # Group by user, keeping the arrival order within each user
+            by_user = OrderedDict()
+            for entry in batch:
+                by_user.setdefault(entry[0], []).append(entry)
+            failed_users, error = set(), None
+            for user_id, entries in by_user.items():
+                try:
+                    self.apply_batch(user_id, [example for _, example, _ in entries])
+                except Exception as e:
+                    failed_users.add(user_id)
+                    error = error or e
+            # Keep the entries of users that failed so nothing is lost; users
+            # that were applied are dropped from the log and not learned again
+            applied = [entry for entry in batch if entry[0] not in failed_users]
+            with self._lock:
+                if failed_users:
+                    self._pending = [
+                        entry for entry in batch if entry[0] in failed_users
+                    ] + self._pending
+                    self.failures += 1
+                self._record_applied(applied)
+            self._compact()
+            if error is not None:
+                raise error
+            return applied
+
+    def _record_applied(self, applied: List[Entry]):
+        """Update the apply metrics for a flushed batch. Called with the lock held."""
+        if not applied:
+            return
+        now = time.time()
+        lag = now - min(logged_at for _, _, logged_at in applied)
+        self.batches_applied += 1
+        self.examples_applied += len(applied)
+        self.last_update_lag = lag
+        self.max_update_lag = max(self.max_update_lag, lag)
+        self.last_update_at = now
+
+    def _compact(self):
+        """Rewrite the log so it only holds examples that are still pending."""
+        with self._sync_lock, self._lock:
+            tmp_file = f"{self.wal_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                for entry in self._pending:
+                    f.write(_encode(entry))
+                f.flush()
+                os.fsync(f.fileno())
+            self._wal.close()
+            os.replace(tmp_file, self.wal_file)
+            self._wal = open(self.wal_file, "a", encoding="utf-8")
+            self._written = self._synced = len(self._pending)
+
+    # --------------------------------------------------------------- recovery
+
+    def replay(self) -> int:
+        """
+        Queue the examples left in the log by a previous process.
+
+        Call once on startup, before new feedback is appended. The examples are
+        applied with the next batch.
+
+        Returns:
+            The number of examples recovered
+        """
+        entries = []
+        with open(self.wal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash mid-append
+                entries.append(
+                    (entry.get("user_id"), entry["example"], entry.get("logged_at", 0.0))
+                )
+        if not entries:
+            return 0
+
+        print(f"🔄 Replaying {len(entries)} feedback examples from {self.wal_file}")
+        with self._lock:
+            self._pending = entries + self._pending
+            self._written = self._synced = len(self._pending)
+            self.changed.notify_all()
+        return len(entries)
+
+    def pending(self) -> int:
+        """Number of examples logged but not yet applied."""
+        with self._lock:
+            return len(self._pending)
+
+    def oldest_pending_time(self) -> Optional[float]:
+        """When the oldest unapplied example was logged (epoch seconds), or None."""
+        with self._lock:
+            return self._pending[0][2] if self._pending else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the queue and apply metrics.
+
+        Returns:
+            A dict with queue_depth (examples logged but not yet learned),
+            oldest_pending_seconds, last_update_lag_seconds,
+            max_update_lag_seconds, batches_applied, examples_applied and
+            failures (flushes where some users' feedback could not be applied)
+        """
+        with self._lock:
+            oldest = self._pending[0][2] if self._pending else None
+            return {
+                "queue_depth": len(self._pending),
+                "oldest_pending_seconds": time.time() - oldest if oldest else 0.0,
+                "last_update_lag_seconds": self.last_update_lag,
+                "max_update_lag_seconds": self.max_update_lag,
+                "batches_applied": self.batches_applied,
+                "examples_applied": self.examples_applied,
+                "failures": self.failures,
+            }
+
+    def close(self):
+        """Apply pending feedback and close the log."""
+        self.flush()
+        with self._lock:
+            self._wal.close()
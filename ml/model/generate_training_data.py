@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Generate large synthetic train.vw files for load and scale testing.
+
+Writes logged bandit feedback in the ``action:cost:probability | features``
+format of ``create_training_example``, with contexts drawn for every event
+type in ``event_categories`` (duration around the category's typical one,
+deadline, free time, day and time of day). The logging policy picks a slot
+uniformly at random, so every line carries the same probability and the
+files can be fed to ``offpolicy_eval.py`` as well as to training.
+
+Costs come from latent preferences: a population of ``SyntheticUser``
+profiles (see ``simulate_users.py``), each accepting a slot with a high
+probability inside the window its task's category prefers. An accepted slot
+costs 0 and a rejected one 1, as in the simulator.
+
+Examples are drawn with NumPy a chunk at a time and assembled from tables of
+preformatted feature strings, so memory stays constant and a million lines
+take a few seconds.
+
+Usage:
+    python generate_training_data.py [--examples 1000000] [--output path] [--seed 0]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from contextual_bandits import DATA_DIR
+from contextual_bandits_helpers import create_prediction_example
+from event_categories import (
+    CATEGORIES,
+    get_all_event_types,
+    get_category_for_event_type,
+)
+from simulate_users import CATEGORY_NAMES, SLOT_TIMES, SyntheticUser
+
+OUTPUT_FILE = os.path.join(DATA_DIR, "synthetic_train.vw")
+NUM_EXAMPLES = 1_000_000
+CHUNK_SIZE = 100_000  # examples drawn and written at a time
+NUM_PROFILES = 100  # latent user profiles the costs are drawn from
+
+DURATIONS = np.arange(0.5, 4.5, 0.5)  # hours
+MAX_HOURS_UNTIL_DUE = 7 * 24
+FREE_TIMES = np.arange(1.0, 10.5, 0.5)  # hours
+
+
+def _table(name, values) -> np.ndarray:
+    """Preformatted "name:value " strings, indexed like `values`."""
+    return np.array([f"{name}:{value} " for value in values], dtype=object)
+
+
+class TrainingDataGenerator:
+    """Draws chunks of synthetic logged examples."""
+
+    def __init__(self, seed: int = 0, num_profiles: int = NUM_PROFILES):
+        """
+        Args:
+            seed: Seed for the latent preferences and the examples
+            num_profiles: Number of latent user profiles
+        """
+        self.rng = np.random.default_rng(seed)
+        # (profile, category, slot) acceptance probabilities
+        self.accept_probs = np.stack(
+            [SyntheticUser(seed + i).accept_probs for i in range(num_profiles)]
+        )
+
+        event_types = get_all_event_types()
+        self.type_categories = np.array(
+            [CATEGORY_NAMES.index(get_category_for_event_type(t)) for t in event_types]
+        )
+        self.typical_durations = np.array(
+            [
+                CATEGORIES[get_category_for_event_type(t)]["typical_duration"]
+                for t in event_types
+            ]
+        )
+
+        # Take the event type and category features from the production
+        # formatter, so the generated lines always match what it writes
+        type_features = []
+        for event_type in event_types:
+            features = create_prediction_example(event_type, 1.0, 1, 1, 0)
+            event_feature, category_feature = features.partition("|")[2].split()[:2]
+            type_features.append(f"{event_feature} {category_feature} ")
+        self.type_features = np.array(type_features, dtype=object)
+
+        num_actions = len(SLOT_TIMES)
+        self.probability = 1.0 / num_actions
+        self.labels = np.array(
+            [
+                f"{action}:{cost}:{self.probability} | "
+                for action in range(num_actions)
+                for cost in (0, 1)
+            ],
+            dtype=object,
+        )
+        self.durations = _table("task_duration", DURATIONS.tolist())
+        self.hours_until_due = _table(
+            "hours_until_due", [float(h) for h in range(MAX_HOURS_UNTIL_DUE + 1)]
+        )
+        self.free_times = _table("daily_free_time", FREE_TIMES.tolist())
+        self.days = np.array(
+            [f"day_of_week:{day} is_weekend:{int(day >= 5)} " for day in range(7)],
+            dtype=object,
+        )
+        self.times_of_day = np.array(
+            [f"time_of_day:{float(slot)}\n" for slot in SLOT_TIMES], dtype=object
+        )
+
+    def draw(self, num_examples: int) -> str:
+        """
+        Draw `num_examples` logged examples.
+
+        Returns:
+            The examples as VW lines, newline terminated
+        """
+        rng = self.rng
+        types = rng.integers(len(self.type_features), size=num_examples)
+        categories = self.type_categories[types]
+        profiles = rng.integers(len(self.accept_probs), size=num_examples)
+        actions = rng.integers(len(SLOT_TIMES), size=num_examples)
+
+        accept_probs = self.accept_probs[profiles, categories, actions]
+        costs = (rng.random(num_examples) >= accept_probs).astype(np.int64)
+
+        durations = self.typical_durations[types] + rng.normal(0.0, 0.5, num_examples)
+        duration_index = np.clip(np.rint(durations * 2) - 1, 0, len(DURATIONS) - 1)
+        due = rng.integers(1, MAX_HOURS_UNTIL_DUE + 1, size=num_examples)
+        free = rng.integers(len(FREE_TIMES), size=num_examples)
+        days = rng.integers(7, size=num_examples)
+        times_of_day = rng.integers(len(SLOT_TIMES), size=num_examples)
+
+        columns = (
+            self.labels[actions * 2 + costs],
+            self.type_features[types],
+            self.durations[duration_index.astype(np.int64)],
+            self.hours_until_due[due],
+            self.free_times[free],
+            self.days[days],
+            self.times_of_day[times_of_day],
+        )
+        return "".join(map("".join, zip(*columns)))
+
+
+def generate_training_data(
+    output_file=OUTPUT_FILE,
+    num_examples=NUM_EXAMPLES,
+    chunk_size=CHUNK_SIZE,
+    seed=0,
+    num_profiles=NUM_PROFILES,
+) -> str:
+    """
+    Write a synthetic train.vw file.
+
+    Args:
+        output_file: Where to write the examples (overwritten)
+        num_examples: Number of examples to write
+        chunk_size: Examples drawn and written at a time
+        seed: Seed for the latent preferences and the examples
+        num_profiles: Number of latent user profiles the costs come from
+
+    Returns:
+        The path of the written file
+    """
+    generator = TrainingDataGenerator(seed, num_profiles)
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        for start in range(0, num_examples, chunk_size):
+            f.write(generator.draw(min(chunk_size, num_examples - start)))
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic train.vw file for load and scale testing"
+    )
+    parser.add_argument("--examples", type=int, default=NUM_EXAMPLES)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--profiles",
+        type=int,
+        default=NUM_PROFILES,
+        help="latent user profiles the costs are drawn from",
+    )
+    args = parser.parse_args()
+
+    print(f"🧪 Generating {args.examples} examples into {args.output}...")
+    started = time.perf_counter()
+    generate_training_data(
+        args.output, args.examples, args.chunk_size, args.seed, args.profiles
+    )
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(
+        f"✅ Wrote {args.examples} examples ({size_mb:.1f} MB) in {elapsed:.1f}s "
+        f"({args.examples / max(elapsed, 1e-9):,.0f} examples/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
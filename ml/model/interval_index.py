@@ -0,0 +1,277 @@
+"""
+Interval index for scheduled events.
+
+``IntervalTree`` is a treap (randomized balanced BST) ordered by interval start
+and augmented with the maximum end time in every subtree, which gives
+O(log n) expected insert and delete, overlap queries in O(log n + k), and the
+free gap around a time in O(log n). ``EventIndex`` keeps one tree per day of
+the week so calendars imported from Google with hundreds of events stay fast to
+check for conflicts and buffers.
+"""
+
+import random
+from typing import Any, Iterator, List, Optional, Tuple
+
+Interval = Tuple[float, float, Any]  # (start, end, value)
+
+
+class _Node:
+    __slots__ = ("start", "end", "value", "priority", "max_end", "left", "right")
+
+    def __init__(self, start, end, value):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_end = self.end
+        if self.left is not None and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+
+def _rotate_right(node):
+    child = node.left
+    node.left = child.right
+    child.right = node
+    node.update()
+    child.update()
+    return child
+
+
+def _rotate_left(node):
+    child = node.right
+    node.right = child.left
+    child.left = node
+    node.update()
+    child.update()
+    return child
+
+
+class IntervalTree:
+    """Half-open [start, end) intervals with attached values."""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, start: float, end: float, value: Any = None):
+        """Add an interval."""
+        self._root = self._insert(self._root, _Node(start, end, value))
+        self._size += 1
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if (new.start, new.end) < (node.start, node.end):
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = _rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = _rotate_left(node)
+        node.update()
+        return node
+
+    def remove(self, start: float, end: float, value: Any = None) -> bool:
+        """
+        Remove an interval.
+
+        Args:
+            start: Start of the interval
+            end: End of the interval
+            value: If given, only an interval carrying this value is removed
+
+        Returns:
+            True if an interval was removed
+        """
+        self._root, removed = self._remove(self._root, start, end, value)
+        if removed:
+            self._size -= 1
+        return removed
+
+    def _remove(self, node, start, end, value):
+        if node is None:
+            return None, False
+        key = (start, end)
+        node_key = (node.start, node.end)
+        if key == node_key and (value is None or node.value == value):
+            return self._delete_node(node), True
+        removed = False
+        if key <= node_key:
+            node.left, removed = self._remove(node.left, start, end, value)
+        if not removed and key >= node_key:
+            node.right, removed = self._remove(node.right, start, end, value)
+        node.update()
+        return node, removed
+
+    def _delete_node(self, node):
+        # Rotate the node down until it has at most one child, then splice it out
+        if node.left is None:
+            return node.right
+        if node.right is None:
+            return node.left
+        if node.left.priority > node.right.priority:
+            node = _rotate_right(node)
+            node.right = self._delete_node(node.right)
+        else:
+            node = _rotate_left(node)
+            node.left = self._delete_node(node.left)
+        node.update()
+        return node
+
+    def overlapping(self, start: float, end: float) -> List[Interval]:
+        """Return every interval overlapping [start, end), ordered by start."""
+        found = []
+        self._collect_overlaps(self._root, start, end, found)
+        return found
+
+    def _collect_overlaps(self, node, start, end, found):
+        if node is None or node.max_end <= start:
+            return  # nothing in this subtree ends after `start`
+        self._collect_overlaps(node.left, start, end, found)
+        if node.start < end and node.end > start:
+            found.append((node.start, node.end, node.value))
+        if node.start < end:
+            self._collect_overlaps(node.right, start, end, found)
+
+    def find(self, start: float, end: float) -> List[Any]:
+        """Return the values of the intervals exactly [start, end), even zero-length."""
+        found = []
+        self._collect_exact(self._root, (start, end), found)
+        return found
+
+    def _collect_exact(self, node, key, found):
+        if node is None:
+            return
+        node_key = (node.start, node.end)
+        # Equal keys can sit on either side after rotations
+        if key <= node_key:
+            self._collect_exact(node.left, key, found)
+        if key == node_key:
+            found.append(node.value)
+        if key >= node_key:
+            self._collect_exact(node.right, key, found)
+
+    def next_start(self, time: float) -> Optional[float]:
+        """Return the earliest interval start at or after `time`."""
+        node, best = self._root, None
+        while node is not None:
+            if node.start >= time:
+                best = node.start
+                node = node.left
+            else:
+                node = node.right
+        return best
+
+    def latest_end_before(
+        self, time: float, inclusive: bool = False
+    ) -> Optional[float]:
+        """
+        Return the latest end among intervals starting before `time` (or at
+        `time` too, if inclusive).
+        """
+        node, best = self._root, None
+        while node is not None:
+            if node.start < time or (inclusive and node.start == time):
+                candidates = [node.end]
+                if node.left is not None:
+                    candidates.append(node.left.max_end)
+                latest = max(candidates)
+                best = latest if best is None else max(best, latest)
+                node = node.right
+            else:
+                node = node.left
+        return best
+
+    def free_gap(self, time: float) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """
+        Return the free gap containing `time`.
+
+        Returns:
+            (previous interval end, next interval start), where either side is
+            None if there is no interval on that side, or None if `time` is
+            inside an interval (an interval's start is inside it)
+        """
+        previous_end = self.latest_end_before(time, inclusive=True)
+        if previous_end is not None and previous_end > time:
+            return None
+        return previous_end, self.next_start(time)
+
+    def __iter__(self) -> Iterator[Interval]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield (node.start, node.end, node.value)
+            node = node.right
+
+    def clear(self):
+        """Remove every interval."""
+        self._root = None
+        self._size = 0
+
+
+class EventIndex:
+    """Scheduled events for a week, with one interval tree per day."""
+
+    def __init__(self):
+        self._days = [IntervalTree() for _ in range(7)]
+
+    def add(self, day: int, start: float, end: float, name: str):
+        """Add an event."""
+        self._days[day].insert(start, end, name)
+
+    def remove(self, day: int, start: float, end: float, name: Optional[str] = None) -> bool:
+        """Remove an event, returning True if it existed."""
+        return self._days[day].remove(start, end, name)
+
+    def find(self, day: int, start: float, end: float) -> List[str]:
+        """Return the names of the events on a day at exactly [start, end)."""
+        return self._days[day].find(start, end)
+
+    def overlapping(self, day: int, start: float, end: float) -> List[Interval]:
+        """Return the events on a day that overlap [start, end)."""
+        return self._days[day].overlapping(start, end)
+
+    def conflicts(
+        self, day: int, start: float, end: float, buffer: float = 0.0
+    ) -> List[Interval]:
+        """
+        Return the events that [start, end) would clash with, counting `buffer`
+        hours after each event as part of the event.
+        """
+        return self._days[day].overlapping(start - buffer, end)
+
+    def free_gap(self, day: int, time: float):
+        """Return (previous event end, next event start) around a free time, see IntervalTree.free_gap."""
+        return self._days[day].free_gap(time)
+
+    def events(self, day: int) -> List[Interval]:
+        """Return the events on a day ordered by start time."""
+        return list(self._days[day])
+
+    def items(self):
+        """Yield ((day, start, end), name) for every event, like the old dict."""
+        for day, tree in enumerate(self._days):
+            for start, end, name in tree:
+                yield (day, start, end), name
+
+    def clear(self):
+        """Remove every event."""
+        for tree in self._days:
+            tree.clear()
+
+    def __len__(self):
+        return sum(len(tree) for tree in self._days)
@@ -0,0 +1,201 @@
+"""
+Per-user model registry for the time recommendation system.
+
+Each user (keyed by the Firestore user id used in ``backend/app.py``) gets their
+own model file. Models are loaded lazily the first time a user needs one, the
+most recently used ones are kept in memory within a count and byte budget, and
+the least recently used engine is closed (which writes its pending updates back
+to disk) when the budget is exceeded.
+
+Callers pin an engine for the duration of their work with ``lease()``. An
+engine evicted while leased is only closed once the last lease is released,
+and a user whose engine is still leased gets that same engine back rather than
+a second one writing to the same model file.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_CACHED_MODELS = int(os.environ.get("TIMELYAI_MAX_CACHED_MODELS", "32"))
+MAX_CACHED_BYTES = int(
+    os.environ.get("TIMELYAI_MAX_CACHED_MODEL_BYTES", str(256 * 1024 * 1024))
+)
+
+
+def safe_user_id(user_id: str) -> str:
+    """
+    Turn a user id into a string that is safe to use as a file name.
+
+    Ids that need escaping (e.g. ones containing slashes) get a short hash
+    suffix so two different ids never map to the same file.
+    """
+    safe = re.sub(r"[^A-Za-z0-9_.@-]", "_", user_id)
+    if safe != user_id or safe.startswith("."):
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+        safe = f"{safe.lstrip('.')}_{digest}"
+    return safe
+
+
+class ModelRegistry:
+    """Lazily load per-user engines and keep the hottest ones in an LRU cache."""
+
+    def __init__(
+        self,
+        engine_factory,
+        model_dir,
+        seed_model_file=None,
+        max_models=MAX_CACHED_MODELS,
+        max_bytes=MAX_CACHED_BYTES,
+        suffix=".model",
+    ):
+        """
+        Args:
+            engine_factory: Callable (user_id, model_file) -> engine
+            model_dir: Directory holding one model file per user
+            seed_model_file: Model copied for users who do not have one yet
+            max_models: Maximum number of engines kept in memory
+            max_bytes: Maximum total size of the cached models
+            suffix: File extension of the model files
+        """
+        self.engine_factory = engine_factory
+        self.model_dir = model_dir
+        self.seed_model_file = seed_model_file
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._engines = OrderedDict()  # user_id -> [engine, size in bytes]
+        self._total_bytes = 0
+        self._leases = {}  # user_id -> number of callers using the engine
+        self._retiring = {}  # user_id -> evicted engine still leased
+        self._lock = threading.RLock()
+        os.makedirs(model_dir, exist_ok=True)
+
+    def model_file_for(self, user_id: str) -> str:
+        """Return the path of the model file for a user."""
+        return os.path.join(self.model_dir, f"{safe_user_id(user_id)}{self.suffix}")
+
+    def get(self, user_id: str):
+        """
+        Return the engine for a user, loading it if it is not cached.
+
+        The engine may be evicted and closed as soon as other users' models are
+        loaded; use lease() to keep it open while using it.
+        """
+        with self._lock:
+            if user_id in self._engines:
+                self._engines.move_to_end(user_id)
+                return self._engines[user_id][0]
+
+            engine = self._retiring.pop(user_id, None)
+            if engine is None:
+                engine = self._load(user_id)
+            self._engines[user_id] = [engine, 0]
+            self._measure(user_id)
+            self._evict_over_budget()
+            return engine
+
+    @contextmanager
+    def lease(self, user_id: str):
+        """
+        Pin a user's engine (see get) until the with block exits.
+
+        The engine is not closed while leased, and its size is measured again
+        afterwards, since learning and training change the model file.
+        """
+        with self._lock:
+            engine = self.get(user_id)
+            self._leases[user_id] = self._leases.get(user_id, 0) + 1
+        try:
+            yield engine
+        finally:
+            self._release(user_id)
+
+    def _release(self, user_id):
+        with self._lock:
+            self._leases[user_id] -= 1
+            if not self._leases[user_id]:
+                del self._leases[user_id]
+            if user_id in self._engines:
+                self._measure(user_id)
+                self._evict_over_budget()
+            elif user_id not in self._leases and user_id in self._retiring:
+                self._retiring.pop(user_id).close()
+
+    def checkpoint_due(self):
+        """
+        Checkpoint the cached engines whose checkpoint interval has passed
+        with updates pending (see CheckpointPolicy.due).
+        """
+        with self._lock:
+            due = [
+                (user_id, engine)
+                for user_id, (engine, _) in self._engines.items()
+                # Engines that write through on every learn() have no policy
+                if getattr(engine, "checkpoints", None) and engine.checkpoints.due()
+            ]
+            # Pinned without touching the LRU order
+            for user_id, _ in due:
+                self._leases[user_id] = self._leases.get(user_id, 0) + 1
+        for user_id, engine in due:
+            try:
+                engine.checkpoint()
+            finally:
+                self._release(user_id)
+
+    def _load(self, user_id):
+        model_file = self.model_file_for(user_id)
+        if not os.path.exists(model_file) and self.seed_model_file:
+            if os.path.exists(self.seed_model_file):
+                # New users start from the shared model
+                shutil.copyfile(self.seed_model_file, model_file)
+        return self.engine_factory(user_id, model_file)
+
+    def _measure(self, user_id):
+        """Update the cached size of a user's model from its file."""
+        model_file = self.model_file_for(user_id)
+        size = os.path.getsize(model_file) if os.path.exists(model_file) else 0
+        entry = self._engines[user_id]
+        self._total_bytes += size - entry[1]
+        entry[1] = size
+
+    def _evict_over_budget(self):
+        # Evict the least recently used engines nobody is using first. Always
+        # keep the most recently used engine, even if it alone is over budget.
+        while len(self._engines) > 1 and (
+            len(self._engines) > self.max_models or self._total_bytes > self.max_bytes
+        ):
+            candidates = list(self._engines)[:-1]
+            idle = [user_id for user_id in candidates if user_id not in self._leases]
+            self.evict((idle or candidates)[0])
+
+    def evict(self, user_id: str):
+        """
+        Drop a user's model from memory, writing it back to disk. If the engine
+        is leased, it is closed when the last lease is released.
+        """
+        with self._lock:
+            entry = self._engines.pop(user_id, None)
+            if entry is None:
+                return
+            engine, size = entry
+            self._total_bytes -= size
+            if user_id in self._leases:
+                self._retiring[user_id] = engine
+            else:
+                engine.close()
+
+    def cached_users(self):
+        """Return the ids of the cached users, least recently used first."""
+        with self._lock:
+            return list(self._engines)
+
+    def close(self):
+        """Write back and release every cached model."""
+        with self._lock:
+            for user_id in list(self._engines):
+                self.evict(user_id)
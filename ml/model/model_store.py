@@ -0,0 +1,139 @@
+"""
+Versioned model artifacts for the time recommendation model.
+
+Every model an engine writes (after training, or when checkpointing learned
+feedback) is published as a new, immutable version next to the model file::
+
+    time_recommendation.model -> time_recommendation.model.versions/v000007.model
+    time_recommendation.model.versions/
+        v000005.model
+        v000006.model
+        v000007.model
+
+The model file itself is a symlink to the current version, and publishing
+swaps it atomically (``os.replace`` of a fresh symlink). Whoever opens the
+model file gets either the old or the new version in full, never a partly
+written one, and a reader that is still scoring with an old version keeps
+its open file even after that version is garbage collected. Only the newest
+``retention`` versions, and always the current one, are kept on disk.
+
+Where symlinks are not available the current version is copied over the
+model file instead, which is still atomic but costs a copy per publish.
+"""
+
+import os
+import re
+import shutil
+import threading
+from typing import List, Optional
+
+MODEL_RETENTION = int(os.environ.get("TIMELYAI_MODEL_RETENTION", "3"))
+
+_VERSION_PATTERN = re.compile(r"^v(\d+)")
+
+# Publishing to the same model from two threads must not pick the same
+# version number
+_PUBLISH_LOCKS = {}
+_PUBLISH_LOCKS_GUARD = threading.Lock()
+
+
+def _publish_lock(model_file) -> threading.Lock:
+    with _PUBLISH_LOCKS_GUARD:
+        return _PUBLISH_LOCKS.setdefault(os.path.abspath(model_file), threading.Lock())
+
+
+class ModelStore:
+    """The published versions of one model file."""
+
+    def __init__(self, model_file, retention=MODEL_RETENTION):
+        """
+        Args:
+            model_file: Path readers load the model from
+            retention: Number of versions to keep on disk (at least 1)
+        """
+        self.model_file = model_file
+        self.retention = max(1, retention)
+        self.versions_dir = f"{model_file}.versions"
+        self._suffix = os.path.splitext(model_file)[1]
+
+    def version_path(self, version: int) -> str:
+        """Return the path of a published version."""
+        return os.path.join(self.versions_dir, f"v{version:06d}{self._suffix}")
+
+    def versions(self) -> List[int]:
+        """Return the published version numbers, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        found = []
+        for name in os.listdir(self.versions_dir):
+            match = _VERSION_PATTERN.match(name)
+            if match and name == os.path.basename(self.version_path(int(match[1]))):
+                found.append(int(match[1]))
+        return sorted(found)
+
+    def current_version(self) -> Optional[int]:
+        """Return the version the model file points to, or None if it is not versioned."""
+        if not os.path.islink(self.model_file):
+            return None
+        match = _VERSION_PATTERN.match(os.path.basename(os.readlink(self.model_file)))
+        return int(match[1]) if match else None
+
+    def publish(self, new_model_file) -> int:
+        """
+        Publish a freshly written model as the next version and switch to it.
+
+        Args:
+            new_model_file: The new model, written somewhere next to the model
+                file; it is moved into the store
+
+        Returns:
+            The new version number
+        """
+        with _publish_lock(self.model_file):
+            os.makedirs(self.versions_dir, exist_ok=True)
+            versions = self.versions()
+            if not versions and os.path.isfile(self.model_file):
+                # Keep the model we started from as the first version
+                shutil.copyfile(self.model_file, self.version_path(1))
+                versions = [1]
+
+            version = max(versions, default=0) + 1
+            path = self.version_path(version)
+            os.replace(new_model_file, path)
+            self._point_to(path)
+            self.collect_garbage()
+        return version
+
+    def _point_to(self, path):
+        """Atomically make the model file refer to `path`."""
+        swap_file = f"{self.model_file}.swap"
+        if os.path.lexists(swap_file):
+            os.remove(swap_file)
+        try:
+            target = os.path.relpath(path, os.path.dirname(self.model_file) or ".")
+            os.symlink(target, swap_file)
+        except (OSError, NotImplementedError):
+            # No symlinks (e.g. Windows without developer mode): copy instead
+            shutil.copyfile(path, swap_file)
+        os.replace(swap_file, self.model_file)
+
+    def collect_garbage(self) -> List[int]:
+        """
+        Delete all but the newest `retention` versions, never the current one.
+
+        Returns:
+            The deleted version numbers
+        """
+        current = self.current_version()
+        versions = self.versions()
+        keep = set(versions[-self.retention :])
+        removed = []
+        for version in versions:
+            if version in keep or version == current:
+                continue
+            try:
+                os.remove(self.version_path(version))
+            except FileNotFoundError:
+                continue
+            removed.append(version)
+        return removed
@@ -0,0 +1,140 @@
+"""
+Background worker that owns model updates.
+
+Recording feedback only appends to the feedback log (see feedback_buffer.py)
+and wakes this worker; learning the examples and rewriting the model happens
+on the worker's thread, so a request that records feedback never waits on VW.
+The worker applies pending feedback once ``batch_size`` examples have piled up
+or the oldest of them has waited ``interval`` seconds, whichever comes first.
+Every ``interval`` seconds it also runs an optional ``periodic`` callback, which
+contextual_bandits uses to checkpoint engines that went idle with unsaved
+updates.
+
+metrics() reports the queue depth and the update lag (how long feedback waited
+between being logged and being learned into the model), counted by the buffer
+for every batch applied, including those flushed outside the worker.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from feedback_buffer import FeedbackBuffer
+
+FEEDBACK_BATCH_SIZE = int(os.environ.get("TIMELYAI_FEEDBACK_BATCH_SIZE", "32"))
+FEEDBACK_FLUSH_INTERVAL = float(
+    os.environ.get("TIMELYAI_FEEDBACK_FLUSH_INTERVAL", "5")
+)  # seconds
+
+
+class ModelUpdateWorker:
+    """A daemon thread that applies logged feedback to the models in batches."""
+
+    def __init__(
+        self,
+        buffer: FeedbackBuffer,
+        batch_size: int = FEEDBACK_BATCH_SIZE,
+        interval: float = FEEDBACK_FLUSH_INTERVAL,
+        periodic: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            buffer: The feedback log to drain
+            batch_size: Apply once this many examples are pending
+            interval: Apply pending examples at most this many seconds after
+                the oldest of them was logged
+            periodic: Called on the worker thread every `interval` seconds
+        """
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.interval = interval
+        self.periodic = periodic
+        self._next_periodic = time.monotonic() + interval
+
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="model-update-worker", daemon=True
+        )
+
+    def start(self):
+        """Start the worker thread."""
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Apply whatever feedback is still pending and stop the worker."""
+        with self.buffer.changed:
+            self._stopping = True
+            self.buffer.changed.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------------ loop
+
+    def _seconds_until_due(self) -> Optional[float]:
+        """
+        Seconds until the pending feedback should be applied, 0 if it is due
+        now, or None if nothing is pending. Called with the buffer lock held.
+        """
+        oldest = self.buffer.oldest_pending_time()
+        if oldest is None:
+            return None
+        if self._stopping or self.buffer.pending() >= self.batch_size:
+            return 0.0
+        return max(0.0, oldest + self.interval - time.time())
+
+    def _seconds_until_periodic(self) -> Optional[float]:
+        """Seconds until the periodic callback is due, or None without one."""
+        if self.periodic is None:
+            return None
+        return max(0.0, self._next_periodic - time.monotonic())
+
+    def _run_periodic(self):
+        self._next_periodic = time.monotonic() + self.interval
+        try:
+            self.periodic()
+        except Exception as e:
+            print(f"❌ Periodic model maintenance failed: {e}")
+
+    def _run(self):
+        while True:
+            with self.buffer.changed:
+                wait = self._seconds_until_due()
+                while wait != 0.0 and not self._stopping:
+                    periodic = self._seconds_until_periodic()
+                    if periodic == 0.0:
+                        break
+                    timeouts = [t for t in (wait, periodic) if t is not None]
+                    self.buffer.changed.wait(min(timeouts) if timeouts else None)
+                    wait = self._seconds_until_due()
+                stopping = self._stopping
+
+            if self._seconds_until_periodic() == 0.0:
+                self._run_periodic()
+            if wait != 0.0 and not stopping:
+                continue  # woken for the periodic callback only
+
+            try:
+                self.buffer.flush()
+            except Exception as e:
+                print(f"❌ Model update failed, will retry: {e}")
+                if stopping:
+                    return
+                # Back off; the batch stays pending and is retried
+                with self.buffer.changed:
+                    self.buffer.changed.wait_for(lambda: self._stopping, self.interval)
+                continue
+
+            if stopping:
+                return
+
+    # --------------------------------------------------------------- metrics
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return the queue and lag metrics.
+
+        Returns:
+            The buffer's stats() (see FeedbackBuffer.stats), plus running
+        """
+        return {**self.buffer.stats(), "running": self._thread.is_alive()}
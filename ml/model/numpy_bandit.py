@@ -0,0 +1,304 @@
+"""
+Pure NumPy contextual bandit backend for the time recommendation model.
+
+This backend implements the same engine contract as the VW backends in
+``prediction_engine.py`` (predict / predict_batch / learn / train) without any
+external binary. Each of the len(TIME_SLOTS) actions has a linear model of the
+expected cost over hashed features, trained online with AdaGrad. Exploration is
+either epsilon-greedy or LinUCB-style, where a per-feature confidence bonus
+(a diagonal approximation of LinUCB's covariance) favours slots the model has
+seen little data for.
+
+Examples are read from the existing VW text format produced by
+``format_vw_example``, so current train.vw and feedback data work unchanged.
+"""
+
+import copy
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model_store import ModelStore
+from prediction_engine import CheckpointPolicy, TrainingState, next_model_version
+
+HASH_BITS = 10  # 1024 hashed feature weights per action
+EPSILON = 0.05  # same default exploration as VW's --cb_explore
+UCB_ALPHA = 0.2  # width of the LinUCB confidence bonus
+LEARNING_RATE = 0.5
+EXPLORATION = os.environ.get("TIMELYAI_NUMPY_EXPLORATION", "linucb")
+
+Label = Tuple[int, float, Optional[float]]  # (action, cost, probability)
+
+
+def _parse_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_vw_example(line: str) -> Tuple[Optional[Label], List[Tuple[str, float]]]:
+    """
+    Parse a VW contextual bandit example.
+
+    Handles both the "action:cost:probability | name:value ..." lines written
+    by format_vw_example and VW namespaces ("|event_type hw task_duration:1.0").
+    Non-numeric values ("event_type:hw") become indicator features
+    ("event_type=hw").
+
+    Args:
+        line: A single example in VW text format
+
+    Returns:
+        A tuple of (label, features) where label is (action, cost, probability)
+        or None for unlabeled examples, and features is a list of (name, value)
+    """
+    head, _, body = line.partition("|")
+
+    label = None
+    for token in head.split():
+        if token.startswith("'"):
+            continue  # example tag
+        parts = token.split(":")
+        if len(parts) >= 2:
+            action = int(parts[0])
+            cost = float(parts[1])
+            probability = float(parts[2]) if len(parts) > 2 else None
+            label = (action, cost, probability)
+        break
+
+    features = []
+    for namespace_block in body.split("|"):
+        if not namespace_block.strip():
+            continue
+        prefix = ""
+        tokens = namespace_block.split()
+        if not namespace_block[0].isspace():
+            # "|ns feature ..." - the first token names the namespace
+            prefix = f"{tokens[0].split(':')[0]}^"
+            tokens = tokens[1:]
+        for token in tokens:
+            name, sep, value = token.rpartition(":")
+            if not sep:
+                features.append((prefix + token, 1.0))
+                continue
+            number = _parse_float(value)
+            if number is None:
+                features.append((f"{prefix}{name}={value}", 1.0))
+            else:
+                features.append((prefix + name, number))
+    return label, features
+
+
+def _hash_feature(name: str, num_bits: int) -> int:
+    return zlib.crc32(name.encode("utf-8")) & ((1 << num_bits) - 1)
+
+
+class LinearBanditBackend:
+    """Linear contextual bandit over hashed features, kept as NumPy arrays."""
+
+    name = "numpy"
+
+    def __init__(
+        self,
+        model_file,
+        num_actions,
+        num_bits=HASH_BITS,
+        exploration=EXPLORATION,
+        epsilon=EPSILON,
+        alpha=UCB_ALPHA,
+        learning_rate=LEARNING_RATE,
+    ):
+        """
+        Args:
+            model_file: Path of the .npz file the parameters are stored in
+            num_actions: Number of actions (time slots)
+            num_bits: Number of hash bits for the feature space
+            exploration: "linucb" or "epsilon_greedy"
+            epsilon: Probability mass spread uniformly over all actions
+            alpha: Scale of the LinUCB confidence bonus
+            learning_rate: AdaGrad learning rate
+        """
+        if exploration not in ("linucb", "epsilon_greedy"):
+            raise ValueError(f"Unknown exploration strategy: {exploration}")
+        self.model_file = model_file
+        self.num_actions = num_actions
+        self.num_bits = num_bits
+        self.exploration = exploration
+        self.epsilon = epsilon
+        self.alpha = alpha
+        self.learning_rate = learning_rate
+        self.checkpoints = CheckpointPolicy()
+        self.version = next_model_version()
+        self._feature_cache = {}
+        # Learning updates the arrays in place, so it must not interleave with
+        # scoring or checkpointing from other threads
+        self._lock = threading.RLock()
+        self._load()
+
+    def _reset_parameters(self):
+        shape = (self.num_actions, 1 << self.num_bits)
+        self.weights = np.zeros(shape, dtype=np.float32)
+        # Sum of squared gradients (AdaGrad) and of squared feature values
+        # (the diagonal of LinUCB's design matrix) per action and feature
+        self.grad_sq = np.zeros(shape, dtype=np.float32)
+        self.feature_sq = np.zeros(shape, dtype=np.float32)
+
+    def _load(self):
+        self._reset_parameters()
+        if os.path.exists(self.model_file):
+            with np.load(self.model_file) as params:
+                if params["weights"].shape == self.weights.shape:
+                    self.weights = params["weights"]
+                    self.grad_sq = params["grad_sq"]
+                    self.feature_sq = params["feature_sq"]
+                else:
+                    print(
+                        f"⚠️ Ignoring {self.model_file}: it was saved with a different shape"
+                    )
+
+    def _vectorize(self, features: List[Tuple[str, float]]):
+        """Return (indices, values) of the hashed features plus a constant."""
+        indices = [0]  # slot 0 doubles as the bias term
+        values = [1.0]
+        for name, value in features:
+            index = self._feature_cache.get(name)
+            if index is None:
+                index = _hash_feature(name, self.num_bits)
+                self._feature_cache[name] = index
+            indices.append(index)
+            values.append(value)
+        return np.asarray(indices), np.asarray(values, dtype=np.float32)
+
+    def _design_matrix(self, examples: List[str]) -> np.ndarray:
+        rows = np.zeros((len(examples), 1 << self.num_bits), dtype=np.float32)
+        for row, example in zip(rows, examples):
+            indices, values = self._vectorize(parse_vw_example(example)[1])
+            np.add.at(row, indices, values)
+        return rows
+
+    def _action_pmfs(self, rows: np.ndarray) -> np.ndarray:
+        """Turn a (n, num_features) design matrix into (n, num_actions) PMFs."""
+        expected_cost = rows @ self.weights.T
+        if self.exploration == "linucb":
+            # Optimism under uncertainty: lower the cost of rarely seen slots
+            uncertainty = (rows * rows) @ (1.0 / (1.0 + self.feature_sq)).T
+            expected_cost = expected_cost - self.alpha * np.sqrt(uncertainty)
+
+        pmfs = np.full(
+            expected_cost.shape, self.epsilon / self.num_actions, dtype=np.float64
+        )
+        best = np.argmin(expected_cost, axis=1)
+        pmfs[np.arange(len(best)), best] += 1.0 - self.epsilon
+        return pmfs
+
+    def predict(self, example: str) -> Dict[int, float]:
+        """Return the action probabilities for a single prediction example."""
+        return self.predict_batch([example])[0]
+
+    def predict_batch(self, examples: List[str]) -> List[Dict[int, float]]:
+        """Score several prediction examples with one matrix product."""
+        if not examples:
+            return []
+        rows = self._design_matrix(examples)
+        with self._lock:
+            pmfs = self._action_pmfs(rows)
+        return [dict(enumerate(pmf.tolist())) for pmf in pmfs]
+
+    def _learn_one(self, example: str) -> bool:
+        label, features = parse_vw_example(example)
+        if label is None:
+            return False
+        action, cost, _ = label
+        if not 0 <= action < self.num_actions:
+            return False
+
+        indices, values = self._vectorize(features)
+        weights = self.weights[action]
+        error = float(weights[indices] @ values) - cost
+        gradient = error * values
+        np.add.at(self.grad_sq[action], indices, gradient * gradient)
+        np.add.at(self.feature_sq[action], indices, values * values)
+        np.add.at(
+            weights,
+            indices,
+            -self.learning_rate * gradient / np.sqrt(self.grad_sq[action][indices] + 1e-8),
+        )
+        return True
+
+    def learn(self, examples: List[str]):
+        """Apply labeled examples to the in-memory parameters, checkpointing when due."""
+        with self._lock:
+            learned = sum(self._learn_one(example) for example in examples)
+            if learned:
+                self.version = next_model_version()
+            if self.checkpoints.record(learned):
+                self.checkpoint()
+
+    def train(self, data_file, incremental=False):
+        """
+        Train the parameters from a VW data file and save them.
+
+        With ``incremental`` the current parameters continue learning from only
+        the examples appended since the last run; otherwise they are trained
+        from scratch over the whole file, on a copy, so predictions keep being
+        served from the current parameters until the new ones are complete.
+        """
+        state = TrainingState(self.model_file)
+        appended = None
+        if incremental and os.path.exists(self.model_file):
+            appended = state.appended_examples(data_file)
+
+        if appended is None:
+            end = None
+            trained = copy.copy(self)
+            trained._reset_parameters()
+            with open(data_file, "r") as f:
+                for line in f:
+                    if line.strip():
+                        trained._learn_one(line.strip())
+
+        with self._lock:
+            if appended is not None:
+                examples, end = appended
+                print(f"🔁 Continuing training on {len(examples)} new examples")
+                for example in examples:
+                    self._learn_one(example)
+            else:
+                self.weights = trained.weights
+                self.grad_sq = trained.grad_sq
+                self.feature_sq = trained.feature_sq
+            self.version = next_model_version()
+            self.checkpoints.pending = max(self.checkpoints.pending, 1)
+            self.checkpoint()
+            state.record(data_file, end)
+
+    def checkpoint(self):
+        """Publish the parameters as a new version of the model file."""
+        with self._lock:
+            if self.checkpoints.pending == 0:
+                return
+            # np.savez appends ".npz" unless the name already ends with it
+            tmp_file = f"{os.path.splitext(self.model_file)[0]}.tmp.npz"
+            np.savez(
+                tmp_file,
+                weights=self.weights,
+                grad_sq=self.grad_sq,
+                feature_sq=self.feature_sq,
+            )
+            ModelStore(self.model_file).publish(tmp_file)
+            self.checkpoints.reset()
+
+    def reload(self):
+        """Reload the parameters from the model file, dropping unsaved updates."""
+        with self._lock:
+            self._load()
+            self.version = next_model_version()
+            self.checkpoints.reset()
+
+    def close(self):
+        """Checkpoint pending updates."""
+        self.checkpoint()
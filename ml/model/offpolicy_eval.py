@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Off-policy evaluation of a candidate model on logged bandit feedback.
+
+Estimates the average cost a candidate model would have had on logged
+examples in the ``action:cost:probability | features`` format written by
+``create_training_example``, without showing it to any user:
+
+- IPS (inverse propensity scoring) reweights each logged cost by how much more
+  or less likely the candidate was to pick the logged action.
+- SNIPS (self-normalized IPS) divides by the sum of the weights instead of the
+  number of examples, trading a little bias for much less variance.
+- DR (doubly robust) starts from a direct estimate of the cost of every action
+  and corrects it with IPS on the logged action. The direct estimate is the
+  mean logged cost per action, computed in a first pass over the data.
+
+The data is streamed in chunks, scored with one ``predict_batch`` call per
+chunk, and the estimators are accumulated as running sums, so memory stays
+bounded however many lines the log holds.
+
+Logged probabilities outside (0, 1] cannot be propensities (older logs hold
+values such as 9 or 14); they are clipped into [min_propensity, 1] and counted.
+
+Usage:
+    python offpolicy_eval.py [--data ../data/train.vw] [--backend numpy] [--model path]
+"""
+
+import argparse
+import json
+import math
+import os
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from contextual_bandits import MODEL_FILE, PREDICTION_BACKEND, TIME_SLOTS, TRAIN_FILE
+from prediction_engine import create_engine, model_file_for_backend
+
+CHUNK_SIZE = 10000  # logged examples scored per predict_batch call
+MIN_PROPENSITY = 0.01  # floor for logged probabilities, bounds the IPS weights
+
+LoggedLabel = Tuple[int, float, float]  # (action, cost, probability)
+
+
+def parse_logged_example(line: str) -> Optional[Tuple[LoggedLabel, str]]:
+    """
+    Split a logged example into its label and the matching prediction example.
+
+    Args:
+        line: A line such as "3:0.2:0.5 | task_duration:1.0 ..."
+
+    Returns:
+        A tuple of ((action, cost, probability), "| task_duration:1.0 ..."), or
+        None if the line has no complete action:cost:probability label
+    """
+    head, bar, features = line.partition("|")
+    if not bar:
+        return None
+    for token in head.split():
+        if token.startswith("'"):
+            continue  # example tag
+        parts = token.split(":")
+        if len(parts) < 3:
+            return None
+        try:
+            label = (int(parts[0]), float(parts[1]), float(parts[2]))
+        except ValueError:
+            return None
+        return label, f"|{features.rstrip()}"
+    return None
+
+
+def iter_logged_chunks(
+    data_file, chunk_size=CHUNK_SIZE
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, List[str], int]]:
+    """
+    Stream a log of bandit feedback in chunks.
+
+    Yields:
+        (actions, costs, probabilities, prediction examples, skipped lines)
+        for each chunk of up to `chunk_size` lines
+    """
+    with open(data_file, "r", encoding="utf-8") as f:
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            labels, examples, skipped = [], [], 0
+            for line in lines:
+                if not line.strip():
+                    continue
+                parsed = parse_logged_example(line)
+                if parsed is None:
+                    skipped += 1
+                    continue
+                labels.append(parsed[0])
+                examples.append(parsed[1])
+            labels = np.asarray(labels, dtype=np.float64).reshape(-1, 3)
+            yield (
+                labels[:, 0].astype(np.int64),
+                labels[:, 1],
+                labels[:, 2],
+                examples,
+                skipped,
+            )
+
+
+def _action_cost_means(data_file, num_actions, chunk_size) -> np.ndarray:
+    """Mean logged cost per action (the overall mean for unseen actions)."""
+    sums = np.zeros(num_actions)
+    counts = np.zeros(num_actions)
+    for actions, costs, _, _, _ in iter_logged_chunks(data_file, chunk_size):
+        valid = (actions >= 0) & (actions < num_actions)
+        np.add.at(sums, actions[valid], costs[valid])
+        np.add.at(counts, actions[valid], 1)
+    overall = sums.sum() / counts.sum() if counts.sum() else 0.0
+    return np.where(counts > 0, sums / np.maximum(counts, 1), overall)
+
+
+def _pmf_matrix(action_probs: List[Dict[int, float]], num_actions) -> np.ndarray:
+    pmfs = np.zeros((len(action_probs), num_actions))
+    for row, probs in zip(pmfs, action_probs):
+        for action, prob in probs.items():
+            if 0 <= action < num_actions:
+                row[action] = prob
+    return pmfs
+
+
+def evaluate_policy(
+    engine,
+    data_file,
+    chunk_size=CHUNK_SIZE,
+    min_propensity=MIN_PROPENSITY,
+) -> Dict[str, Any]:
+    """
+    Estimate a candidate model's average cost on logged feedback.
+
+    Args:
+        engine: Prediction engine of the candidate model (see prediction_engine)
+        data_file: Logged examples in action:cost:probability format
+        chunk_size: Examples scored per predict_batch call
+        min_propensity: Logged probabilities are clipped into [min_propensity, 1]
+
+    Returns:
+        A dict with the IPS, SNIPS and DR estimates (lower is better), their
+        standard errors, the logging policy's own average cost, the effective
+        sample size of the importance weights and line counts
+    """
+    num_actions = engine.num_actions
+    cost_means = _action_cost_means(data_file, num_actions, chunk_size)
+
+    n = skipped = clipped = 0
+    logged_cost = sum_w = sum_w_sq = 0.0
+    sum_ips = sum_ips_sq = sum_dr = sum_dr_sq = 0.0
+    for actions, costs, probabilities, examples, chunk_skipped in iter_logged_chunks(
+        data_file, chunk_size
+    ):
+        skipped += chunk_skipped
+        in_range = (actions >= 0) & (actions < num_actions)
+        skipped += int((~in_range).sum())
+        if not in_range.all():
+            actions, costs, probabilities = (
+                actions[in_range],
+                costs[in_range],
+                probabilities[in_range],
+            )
+            examples = [e for e, keep in zip(examples, in_range) if keep]
+        if not examples:
+            continue
+
+        invalid = ~((probabilities > 0) & (probabilities <= 1))
+        invalid |= probabilities < min_propensity
+        clipped += int(invalid.sum())
+        propensities = np.clip(probabilities, min_propensity, 1.0)
+
+        pmfs = _pmf_matrix(engine.predict_batch(examples), num_actions)
+        rows = np.arange(len(actions))
+        weights = pmfs[rows, actions] / propensities
+
+        ips_terms = weights * costs
+        direct = pmfs @ cost_means
+        dr_terms = direct + weights * (costs - cost_means[actions])
+
+        n += len(actions)
+        logged_cost += costs.sum()
+        sum_w += weights.sum()
+        sum_w_sq += (weights * weights).sum()
+        sum_ips += ips_terms.sum()
+        sum_ips_sq += (ips_terms * ips_terms).sum()
+        sum_dr += dr_terms.sum()
+        sum_dr_sq += (dr_terms * dr_terms).sum()
+
+    def standard_error(total, total_sq):
+        if n < 2:
+            return None
+        mean = total / n
+        return math.sqrt(max(total_sq / n - mean * mean, 0.0) / n)
+
+    return {
+        "examples": n,
+        "skipped_lines": skipped,
+        "clipped_propensities": clipped,
+        "logged_policy_cost": logged_cost / n if n else None,
+        "ips": sum_ips / n if n else None,
+        "ips_stderr": standard_error(sum_ips, sum_ips_sq),
+        "snips": sum_ips / sum_w if sum_w else None,
+        "dr": sum_dr / n if n else None,
+        "dr_stderr": standard_error(sum_dr, sum_dr_sq),
+        "effective_sample_size": sum_w * sum_w / sum_w_sq if sum_w_sq else 0.0,
+    }
+
+
+def evaluate_model(
+    backend=PREDICTION_BACKEND,
+    model_file=MODEL_FILE,
+    data_file=TRAIN_FILE,
+    chunk_size=CHUNK_SIZE,
+    min_propensity=MIN_PROPENSITY,
+) -> Dict[str, Any]:
+    """
+    Load a model with the given backend and evaluate it (see evaluate_policy).
+
+    Args:
+        backend: Prediction backend (see prediction_engine.create_engine)
+        model_file: VW model path; the backend's own model path is derived from it
+        data_file: Logged examples in action:cost:probability format
+        chunk_size: Examples scored per predict_batch call
+        min_propensity: Floor for logged probabilities
+    """
+    engine = create_engine(
+        backend,
+        model_file_for_backend(backend, model_file),
+        len(TIME_SLOTS),
+        os.devnull,  # evaluation never learns
+    )
+    try:
+        results = evaluate_policy(engine, data_file, chunk_size, min_propensity)
+    finally:
+        engine.close()
+    results.update(backend=backend, model_file=engine.model_file, data_file=data_file)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate a model's average cost on logged bandit feedback"
+    )
+    parser.add_argument("--data", default=TRAIN_FILE, help="logged examples")
+    parser.add_argument("--backend", default=PREDICTION_BACKEND)
+    parser.add_argument("--model", default=MODEL_FILE, help="candidate model")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--min-propensity", type=float, default=MIN_PROPENSITY)
+    parser.add_argument("--output", default=None, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"📊 Evaluating {args.model} ({args.backend}) on {args.data}")
+    results = evaluate_model(
+        args.backend, args.model, args.data, args.chunk_size, args.min_propensity
+    )
+    if not results["examples"]:
+        print("⚠️ No logged examples with action:cost:probability labels found")
+    else:
+        print(f"   Examples:           {results['examples']}")
+        print(f"   Logging policy:     {results['logged_policy_cost']:.4f}")
+        print(f"   IPS:                {results['ips']:.4f}")
+        print(f"   SNIPS:              {results['snips']:.4f}")
+        print(f"   DR:                 {results['dr']:.4f}")
+        print(f"   Effective samples:  {results['effective_sample_size']:.1f}")
+        if results["clipped_propensities"]:
+            print(
+                f"⚠️ Clipped {results['clipped_propensities']} logged probabilities "
+                f"outside [{args.min_propensity}, 1]"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
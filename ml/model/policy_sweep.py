@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Sweep exploration policies and hyperparameters on logged feedback.
+
+Trains one model per candidate configuration on the logged data, evaluates it
+off-policy on held-out examples (see ``offpolicy_eval.py``) and ranks the
+candidates in a leaderboard of estimated cost against model size and
+prediction latency. Candidates run in parallel on a process pool, each in its
+own temporary directory, so the production model is never touched.
+
+For the VW backends a candidate is a set of extra VW options (see
+``prediction_engine.VW_ARGS``). The default grid crosses:
+
+- exploration: epsilon-greedy with several epsilons, ``--bag``, ``--cover``
+  and ``--first``
+- learning rates (``-l``)
+- hash sizes (``-b``)
+
+``--softmax`` is left out of the default grid: VW only supports it for
+``--cb_explore_adf``, and silently switches to that multi-line format, which
+the single-line examples used here do not match. For the numpy backend the
+grid crosses its own settings instead (LinUCB and epsilon-greedy exploration,
+learning rates and hash bits).
+
+The current configuration is always evaluated too, as the baseline. A
+candidate is marked as Pareto optimal if no other candidate is at least as
+good on estimated cost, model size and p50 latency, and better on one.
+
+Usage:
+    python policy_sweep.py [--data ../data/train.vw] [--backend workspace] [--workers 8]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from itertools import islice, product
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from benchmark_hot_path import measure
+from contextual_bandits import DATA_DIR, PREDICTION_BACKEND, TIME_SLOTS, TRAIN_FILE
+from offpolicy_eval import CHUNK_SIZE, evaluate_policy, parse_logged_example
+from prediction_engine import VW_ARGS, create_engine, model_file_for_backend
+
+LEADERBOARD_FILE = os.path.join(DATA_DIR, "policy_sweep.json")
+
+EXPLORATION_ARGS = [
+    "--epsilon 0.05",
+    "--epsilon 0.1",
+    "--epsilon 0.2",
+    "--bag 5",
+    "--cover 3",
+    "--first 2",
+]
+LEARNING_RATES = [0.1, 0.5, 1.0]
+VW_BITS = [18, 22]
+
+NUMPY_EXPLORATION = [
+    {"exploration": "linucb", "alpha": 0.1},
+    {"exploration": "linucb", "alpha": 0.2},
+    {"exploration": "linucb", "alpha": 0.5},
+    {"exploration": "epsilon_greedy", "epsilon": 0.05},
+    {"exploration": "epsilon_greedy", "epsilon": 0.1},
+    {"exploration": "epsilon_greedy", "epsilon": 0.2},
+]
+NUMPY_BITS = [10, 14]
+
+HOLDOUT_EVERY = 5  # every 5th logged example is held out for evaluation
+LATENCY_ITERATIONS = 100
+METRICS = ("dr", "snips", "ips")
+
+Settings = Union[str, Dict[str, Any]]  # VW options, or numpy backend arguments
+
+
+def vw_grid(
+    exploration_args=EXPLORATION_ARGS, learning_rates=LEARNING_RATES, bits=VW_BITS
+) -> List[Tuple[str, str]]:
+    """Return (name, VW options) for every combination of the given settings."""
+    grid = []
+    for explore, learning_rate, num_bits in product(
+        exploration_args, learning_rates, bits
+    ):
+        vw_args = f"{explore} -l {learning_rate} -b {num_bits}"
+        grid.append((vw_args, vw_args))
+    return grid
+
+
+def numpy_grid(
+    exploration=NUMPY_EXPLORATION, learning_rates=LEARNING_RATES, bits=NUMPY_BITS
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Return (name, LinearBanditBackend arguments) for every combination."""
+    grid = []
+    for explore, learning_rate, num_bits in product(exploration, learning_rates, bits):
+        settings = dict(explore, learning_rate=learning_rate, num_bits=num_bits)
+        name = " ".join(f"{key}={value}" for key, value in settings.items())
+        grid.append((name, settings))
+    return grid
+
+
+def _create_engine(backend, model_file, settings: Settings, work_dir):
+    if backend == "numpy":
+        from numpy_bandit import LinearBanditBackend
+
+        return LinearBanditBackend(model_file, len(TIME_SLOTS), **settings)
+    return create_engine(
+        backend,
+        model_file,
+        len(TIME_SLOTS),
+        os.path.join(work_dir, "feedback.vw"),
+        vw_args=settings,
+    )
+
+
+def evaluate_candidate(
+    name: str,
+    backend: str,
+    settings: Settings,
+    train_file: str,
+    eval_file: str,
+    latency_example: str,
+    latency_iterations: int = LATENCY_ITERATIONS,
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Train one candidate and evaluate it off-policy (runs in a worker process).
+
+    Returns:
+        A dict with the candidate's off-policy estimates (see
+        offpolicy_eval.evaluate_policy), model size, training time and
+        prediction latency
+    """
+    result = {"name": name, "settings": settings}
+    work_dir = tempfile.mkdtemp(prefix="timelyai-sweep-")
+    try:
+        model_file = model_file_for_backend(
+            backend, os.path.join(work_dir, "candidate.model")
+        )
+        # Keep the engines' progress output out of the leaderboard
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = _create_engine(backend, model_file, settings, work_dir)
+            try:
+                started = time.perf_counter()
+                engine.train(train_file)
+                result["train_seconds"] = time.perf_counter() - started
+
+                started = time.perf_counter()
+                result.update(evaluate_policy(engine, eval_file, chunk_size))
+                eval_seconds = time.perf_counter() - started
+                result["eval_examples_per_second"] = (
+                    result["examples"] / eval_seconds if eval_seconds else 0.0
+                )
+
+                latency = measure(
+                    lambda: engine.predict(latency_example), latency_iterations
+                )
+                result["predict_p50_ms"] = latency["p50_ms"]
+                result["predict_p95_ms"] = latency["p95_ms"]
+                result["model_bytes"] = os.path.getsize(engine.model_file)
+            finally:
+                engine.close()
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def split_logged_data(
+    data_file, work_dir, holdout_every=HOLDOUT_EVERY
+) -> Tuple[str, str]:
+    """
+    Split logged examples into training and held-out files, streaming.
+
+    Returns:
+        The paths of the training and evaluation files in `work_dir`
+    """
+    train_file = os.path.join(work_dir, "train.vw")
+    eval_file = os.path.join(work_dir, "eval.vw")
+    with open(data_file, "r", encoding="utf-8") as source, open(
+        train_file, "w", encoding="utf-8"
+    ) as train, open(eval_file, "w", encoding="utf-8") as held_out:
+        lines = (line for line in source if line.strip())
+        for i, line in enumerate(lines):
+            (held_out if i % holdout_every == 0 else train).write(line)
+    return train_file, eval_file
+
+
+def _first_prediction_example(data_file) -> str:
+    with open(data_file, "r", encoding="utf-8") as f:
+        for line in islice(f, CHUNK_SIZE):
+            parsed = parse_logged_example(line)
+            if parsed is not None:
+                return parsed[1]
+    raise ValueError(f"No logged action:cost:probability examples in {data_file}")
+
+
+def mark_pareto_optimal(results: List[Dict[str, Any]], metric: str):
+    """Flag the results no other result beats on cost, model size and latency."""
+    keys = (metric, "model_bytes", "predict_p50_ms")
+    for result in results:
+        result["pareto_optimal"] = not any(
+            all(other[key] <= result[key] for key in keys)
+            and any(other[key] < result[key] for key in keys)
+            for other in results
+            if other is not result
+        )
+
+
+def run_sweep(
+    candidates: List[Tuple[str, Settings]],
+    data_file=TRAIN_FILE,
+    eval_file: Optional[str] = None,
+    backend=PREDICTION_BACKEND,
+    metric="dr",
+    workers=None,
+    latency_iterations=LATENCY_ITERATIONS,
+    leaderboard_file=LEADERBOARD_FILE,
+) -> Dict[str, Any]:
+    """
+    Evaluate `candidates` on a process pool and write the leaderboard.
+
+    Args:
+        candidates: (name, settings) pairs, see vw_grid and numpy_grid
+        data_file: Logged examples in action:cost:probability format
+        eval_file: Held-out logged examples; if None, every HOLDOUT_EVERY-th
+            example of data_file is held out instead of trained on
+        backend: Prediction backend (see prediction_engine.create_engine)
+        metric: Off-policy estimate to rank by, "dr", "snips" or "ips"
+        workers: Number of worker processes (defaults to the number of cores)
+        latency_iterations: Single predictions timed per candidate
+        leaderboard_file: Where to write the JSON leaderboard (None to skip)
+
+    Returns:
+        The leaderboard dict, with results sorted best first
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    workers = workers or os.cpu_count() or 1
+    split_dir = tempfile.mkdtemp(prefix="timelyai-sweep-data-")
+    try:
+        if eval_file is None:
+            train_file, eval_file = split_logged_data(data_file, split_dir)
+        else:
+            train_file = data_file
+        latency_example = _first_prediction_example(eval_file)
+
+        print(
+            f"🔬 Sweeping {len(candidates)} configurations with {workers} workers "
+            f"({backend})"
+        )
+        started_at = datetime.now().isoformat(timespec="seconds")
+        started = time.perf_counter()
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    evaluate_candidate,
+                    name,
+                    backend,
+                    settings,
+                    train_file,
+                    eval_file,
+                    latency_example,
+                    latency_iterations,
+                )
+                for name, settings in candidates
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result["status"] != "ok":
+                    print(f"❌ {result['name']}: {result['error']}")
+        wall_seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(split_dir, ignore_errors=True)
+
+    succeeded = [r for r in results if r["status"] == "ok" and r["examples"]]
+    succeeded.sort(key=lambda r: r[metric])
+    mark_pareto_optimal(succeeded, metric)
+    leaderboard = {
+        "started_at": started_at,
+        "backend": backend,
+        "data_file": data_file,
+        "eval_file": eval_file if train_file == data_file else None,
+        "metric": metric,
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "results": succeeded,
+        "failed": [
+            {"name": r["name"], "error": r.get("error", "no examples evaluated")}
+            for r in results
+            if r not in succeeded
+        ],
+    }
+    if leaderboard_file:
+        with open(leaderboard_file, "w") as f:
+            json.dump(leaderboard, f, indent=2)
+    return leaderboard
+
+
+def print_leaderboard(leaderboard: Dict[str, Any], top: Optional[int] = None):
+    """Print the leaderboard as a table, best estimated cost first."""
+    metric = leaderboard["metric"]
+    results = leaderboard["results"][:top]
+    width = max([len("configuration")] + [len(r["name"]) for r in results])
+    print(
+        f"{'configuration':<{width}} {metric:>8} {'± se':>7} {'ESS':>8} "
+        f"{'size KB':>9} {'p50 ms':>8} {'p95 ms':>8} {'train s':>8}"
+    )
+    for r in results:
+        stderr = r.get(f"{metric}_stderr")
+        print(
+            f"{r['name']:<{width}} {r[metric]:>8.4f} "
+            f"{stderr if stderr is not None else float('nan'):>7.4f} "
+            f"{r['effective_sample_size']:>8.1f} {r['model_bytes'] / 1024:>9.1f} "
+            f"{r['predict_p50_ms']:>8.3f} {r['predict_p95_ms']:>8.3f} "
+            f"{r['train_seconds']:>8.2f}{' *' if r['pareto_optimal'] else ''}"
+        )
+    print("* Pareto optimal on estimated cost, model size and p50 latency")
+
+
+def _float_list(value):
+    return [float(item) for item in value.split(",")]
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank exploration policies and hyperparameters by off-policy cost"
+    )
+    parser.add_argument("--data", default=TRAIN_FILE, help="logged examples")
+    parser.add_argument(
+        "--eval-data",
+        default=None,
+        help="held-out logged examples (default: hold out part of --data)",
+    )
+    parser.add_argument("--backend", default=PREDICTION_BACKEND)
+    parser.add_argument("--metric", choices=METRICS, default="dr")
+    parser.add_argument(
+        "--explore",
+        action="append",
+        default=None,
+        help="VW exploration options to try, repeatable (e.g. --explore='--bag 5')",
+    )
+    parser.add_argument(
+        "--learning-rates",
+        type=_float_list,
+        default=LEARNING_RATES,
+        help="comma-separated learning rates",
+    )
+    parser.add_argument(
+        "--bits", type=_int_list, default=None, help="comma-separated hash sizes"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: all cores)",
+    )
+    parser.add_argument("--latency-iterations", type=int, default=LATENCY_ITERATIONS)
+    parser.add_argument("--top", type=int, default=None, help="rows to print")
+    parser.add_argument("--output", default=LEADERBOARD_FILE)
+    args = parser.parse_args()
+
+    if args.backend == "numpy":
+        baseline = ("(current)", {})
+        candidates = numpy_grid(
+            learning_rates=args.learning_rates, bits=args.bits or NUMPY_BITS
+        )
+    else:
+        baseline = (f"(current) {VW_ARGS}".strip(), VW_ARGS)
+        candidates = vw_grid(
+            args.explore or EXPLORATION_ARGS, args.learning_rates, args.bits or VW_BITS
+        )
+
+    leaderboard = run_sweep(
+        [baseline] + candidates,
+        data_file=args.data,
+        eval_file=args.eval_data,
+        backend=args.backend,
+        metric=args.metric,
+        workers=args.workers,
+        latency_iterations=args.latency_iterations,
+        leaderboard_file=args.output,
+    )
+    if not leaderboard["results"]:
+        print("⚠️ No configuration could be evaluated")
+    else:
+        print_leaderboard(leaderboard, args.top)
+        best = leaderboard["results"][0]
+        print(f"🏆 Lowest estimated cost: {best['name']}")
+        if args.backend != "numpy" and isinstance(best["settings"], str):
+            print(f"   To use it: TIMELYAI_VW_ARGS='{best['settings']}'")
+    if leaderboard["failed"]:
+        failed = len(leaderboard["failed"])
+        print(f"⚠️ {failed} configurations failed, see {args.output}")
+    print(f"✅ Leaderboard written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cache of model predictions for the time recommendation system.
+
+Prediction contexts repeat a lot: the same task type, durations on the
+half-hour grid and the same day of the week, with only the time of day moving
+from minute to minute. The cache maps a quantized context, plus the identity
+and version of the model that scored it, to the action probabilities, so a
+repeated request never reaches VW. Engines bump their version whenever their
+weights change (learn, train, reload), which makes stale entries unreachable;
+they then age out of the LRU.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Hashable, Optional, Tuple
+
+PREDICTION_CACHE_SIZE = int(os.environ.get("TIMELYAI_PREDICTION_CACHE_SIZE", "4096"))
+
+# Quantization steps, in hours
+DURATION_STEP = 0.5
+HOURS_UNTIL_DUE_STEP = 1.0
+FREE_TIME_STEP = 0.5
+TIME_OF_DAY_STEP = 0.5
+
+
+def _quantize(value, step):
+    return round(float(value) / step) * step
+
+
+def quantize_context(
+    task_type: str,
+    task_duration: float,
+    hours_until_due: float,
+    daily_free_time: float,
+    day_of_week: int,
+    time_of_day: Optional[float] = None,
+) -> Tuple[Hashable, ...]:
+    """
+    Return the cache key part for a prediction context.
+
+    Args:
+        task_type: Type of task (e.g., 'hw', 'meeting', 'reading')
+        task_duration: Expected duration in hours
+        hours_until_due: Hours until the task is due
+        daily_free_time: Available free time in the day
+        day_of_week: Day of the week (0=Monday, 6=Sunday)
+        time_of_day: Current time in hours (defaults to now)
+
+    Returns:
+        A hashable tuple with every numeric feature snapped to its grid
+    """
+    if time_of_day is None:
+        now = datetime.now()
+        time_of_day = now.hour + now.minute / 60.0
+    return (
+        task_type,
+        _quantize(task_duration, DURATION_STEP),
+        _quantize(hours_until_due, HOURS_UNTIL_DUE_STEP),
+        _quantize(daily_free_time, FREE_TIME_STEP),
+        int(day_of_week),
+        _quantize(time_of_day, TIME_OF_DAY_STEP),
+    )
+
+
+class PredictionCache:
+    """A thread-safe, bounded LRU cache of action probabilities."""
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE):
+        """
+        Args:
+            max_entries: Maximum number of cached predictions (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(engine, context_key) -> Tuple[Hashable, ...]:
+        """
+        Return the cache key for a context under the engine's current model.
+
+        Take the key before predicting, so a prediction that races with a model
+        update is stored under the old version rather than the new one.
+        """
+        return (engine.model_file, engine.version, context_key)
+
+    def get(self, key) -> Optional[Dict[int, float]]:
+        """Return the cached probabilities for a key, or None."""
+        with self._lock:
+            action_probs = self._entries.get(key)
+            if action_probs is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return action_probs
+
+    def put(self, key, action_probs: Dict[int, float]):
+        """Cache the probabilities predicted for a key."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = action_probs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached prediction."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,580 @@
+"""
+Prediction engines for the time recommendation model.
+
+An engine owns a trained VW model and turns prediction examples into action
+probabilities. The following backends are available:
+
+- ``WorkspaceBackend`` keeps a VW workspace loaded in-process through the
+  ``vowpalwabbit`` Python bindings, so scoring an example never spawns a
+  process or reloads the model from disk. Feedback is learned in memory and
+  checkpointed to the model file periodically.
+- ``SubprocessBackend`` runs the ``vw`` binary for every call, streaming
+  examples over its stdin and reading predictions from its stdout. It is
+  slower, but works anywhere ``vw`` is installed and is used as the fallback
+  when the Python bindings are not available.
+- ``DaemonBackend`` (see ``vw_daemon.py``) runs ``vw --daemon`` next to the
+  process and talks to it over a pooled local socket.
+
+- ``LinearBanditBackend`` (see ``numpy_bandit.py``) is a pure NumPy linear
+  contextual bandit that needs neither the ``vw`` binary nor the bindings.
+
+Every engine exposes ``predict(example)``, ``predict_batch(examples)``,
+``learn(examples)``, ``train(data_file, incremental)``, ``reload()`` and
+``close()``, and is safe to share between threads: calls that touch the model
+are serialized by a lock held by the engine. Engines also carry a ``version``
+that changes whenever their weights do, which prediction caches use to
+invalidate old entries.
+
+Engines never write the model file in place: new models are written to a
+temporary file and published as a new version (see ``model_store.py``), so
+predictions keep being served from the current model while a new one is
+trained and switch over once it is complete.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import vowpalwabbit
+except ImportError:
+    vowpalwabbit = None
+
+import tracing
+from model_store import ModelStore
+
+# Engines that learn in memory write the model back to disk after this many
+# updates or this many seconds, whichever comes first
+CHECKPOINT_EVERY = int(os.environ.get("TIMELYAI_CHECKPOINT_EVERY", "50"))
+CHECKPOINT_INTERVAL = float(os.environ.get("TIMELYAI_CHECKPOINT_INTERVAL", "60"))
+
+# Extra options passed to VW after --cb_explore, to pick the exploration
+# algorithm and hyperparameters (e.g. "--bag 5 -l 0.5 -b 20"). VW's own
+# default is epsilon-greedy with --epsilon 0.05. See policy_sweep.py.
+VW_ARGS = os.environ.get("TIMELYAI_VW_ARGS", "")
+
+# Model versions come from one process-wide counter, so a version number never
+# repeats, even between two engines created for the same model file
+_MODEL_VERSIONS = itertools.count(1)
+
+
+def next_model_version() -> int:
+    """Return a new, process-wide unique model version."""
+    return next(_MODEL_VERSIONS)
+
+
+def parse_action_probs(prediction_str: str) -> Dict[int, float]:
+    """
+    Parse a VW cb_explore prediction line.
+
+    Args:
+        prediction_str: Prediction in the format "action:probability,action:probability,..."
+            optionally followed by the example tag
+
+    Returns:
+        Dictionary mapping action index to probability
+    """
+    action_probs = {}
+    fields = prediction_str.split()
+    if not fields:
+        return action_probs
+    for pair in fields[0].split(","):
+        if ":" in pair:
+            action, prob = pair.split(":")
+            action_probs[int(action)] = float(prob)
+    return action_probs
+
+
+def vw_options(num_actions, vw_args="") -> List[str]:
+    """Return the VW command line options shared by every run of a model."""
+    return ["--cb_explore", str(num_actions), *shlex.split(vw_args)]
+
+
+def model_file_for_backend(backend, model_file):
+    """Return the model path a backend uses for the given VW model path."""
+    if backend == "numpy":
+        return os.path.splitext(model_file)[0] + ".npz"
+    return model_file
+
+
+class TrainingState:
+    """
+    What a model was last trained on, kept in a JSON file next to the model.
+
+    It records how far into the training data the model has seen, so training
+    can continue over only the examples appended since, and which data the VW
+    cache file next to the model was built from, so a stale cache is thrown
+    away instead of silently reused.
+    """
+
+    HEAD_BYTES = 64 * 1024  # bytes hashed at the start of the data
+    TAIL_BYTES = 4 * 1024  # bytes hashed just before the recorded offset
+
+    def __init__(self, model_file):
+        """
+        Args:
+            model_file: Path of the model the state belongs to
+        """
+        self.path = f"{model_file}.train_state.json"
+        self.cache_file = f"{model_file}.cache"
+        try:
+            with open(self.path, "r") as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    @classmethod
+    def _fingerprint(cls, data_file, size) -> str:
+        """Hash the start of a data file and the bytes just before `size`."""
+        digest = hashlib.sha1()
+        with open(data_file, "rb") as f:
+            digest.update(f.read(min(cls.HEAD_BYTES, size)))
+            tail_start = max(0, size - cls.TAIL_BYTES)
+            f.seek(tail_start)
+            digest.update(f.read(size - tail_start))
+        return f"{size}:{digest.hexdigest()}"
+
+    def appended_examples(self, data_file) -> Optional[Tuple[List[str], int]]:
+        """
+        Return the examples appended to a data file since it was last trained on.
+
+        Returns:
+            A tuple of (examples, end offset), or None if the model was trained
+            on something else or the file was rewritten rather than appended to
+        """
+        offset = self._state.get("offset")
+        if self._state.get("data_file") != os.path.abspath(data_file) or offset is None:
+            return None
+        if not os.path.exists(data_file) or os.path.getsize(data_file) < offset:
+            return None
+        if self._fingerprint(data_file, offset) != self._state.get("fingerprint"):
+            return None
+
+        with open(data_file, "rb") as f:
+            f.seek(offset)
+            new_data = f.read()
+        # Leave a partially written last line for the next run
+        complete = new_data.rfind(b"\n") + 1
+        lines = new_data[:complete].decode("utf-8").splitlines()
+        return [line.strip() for line in lines if line.strip()], offset + complete
+
+    def prepare_cache(self, data_file, vw_args="") -> str:
+        """
+        Return the VW cache file path, deleting the cache if its data (or the
+        VW options it was parsed with) changed.
+        """
+        stat = os.stat(data_file)
+        self._cache_source = f"{stat.st_size}:{stat.st_mtime_ns}:{vw_args}"
+        if self._state.get("cache_source") != self._cache_source and os.path.exists(
+            self.cache_file
+        ):
+            os.remove(self.cache_file)
+        return self.cache_file
+
+    def record(self, data_file, offset=None):
+        """
+        Record that the model has now seen a data file up to `offset` bytes
+        (the whole file if None).
+        """
+        if offset is None:
+            offset = os.path.getsize(data_file)
+        self._state.update(
+            data_file=os.path.abspath(data_file),
+            offset=offset,
+            fingerprint=self._fingerprint(data_file, offset),
+        )
+        if getattr(self, "_cache_source", None) is not None:
+            self._state["cache_source"] = self._cache_source
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_file, self.path)
+
+
+def train_with_vw(
+    model_file, num_actions, data_file, incremental=False, vw_args=VW_ARGS
+):
+    """
+    Train a model from a VW data file with the ``vw`` binary.
+
+    A full training run keeps VW's binary cache of the parsed data next to the
+    model, so retraining on unchanged data skips parsing the text. With
+    ``incremental`` the existing model instead continues learning from only
+    the examples appended to the data file since the last run (falling back to
+    a full run if the file was rewritten). ``vw_args`` are extra VW options
+    (see VW_ARGS).
+    """
+    state = TrainingState(model_file)
+    # Written next to the model and published as a new version, so readers
+    # never see a half-written model file
+    tmp_file = f"{model_file}.tmp"
+
+    appended = None
+    if incremental and os.path.exists(model_file):
+        appended = state.appended_examples(data_file)
+    if appended is not None:
+        examples, end = appended
+        print(f"🔁 Continuing training on {len(examples)} new examples")
+        if examples:
+            cmd = [
+                "vw",
+                *vw_options(num_actions, vw_args),
+                "-i",
+                model_file,
+                "-f",
+                tmp_file,
+                "--quiet",
+            ]
+            with tracing.span("vw.subprocess", op="train_incremental"):
+                subprocess.run(
+                    cmd,
+                    input="".join(f"{example}\n" for example in examples),
+                    text=True,
+                    check=True,
+                )
+            tracing.count("vw.examples", len(examples), op="train_incremental")
+            ModelStore(model_file).publish(tmp_file)
+        state.record(data_file, end)
+        return
+
+    cmd = [
+        "vw",
+        *vw_options(num_actions, vw_args),
+        "-d",
+        data_file,
+        "--cache_file",
+        state.prepare_cache(data_file, vw_args),
+        "-f",
+        tmp_file,
+        "--quiet",
+    ]
+    with tracing.span("vw.subprocess", op="train"):
+        subprocess.run(cmd, check=True)
+    ModelStore(model_file).publish(tmp_file)
+    state.record(data_file)
+
+
+class SubprocessBackend:
+    """Score examples by running the ``vw`` binary once per call."""
+
+    name = "subprocess"
+
+    def __init__(self, model_file, num_actions, feedback_file, vw_args=VW_ARGS):
+        """
+        Args:
+            model_file: Path to the trained VW model
+            num_actions: Number of actions (time slots) in the model
+            feedback_file: Scratch file feedback is staged in before learning
+            vw_args: Extra VW options, see VW_ARGS
+        """
+        self.model_file = model_file
+        self.num_actions = num_actions
+        self.feedback_file = feedback_file
+        self.vw_args = vw_args
+        self.version = next_model_version()
+        # Guards the feedback file and model updates. Predictions don't need
+        # it: they never touch the disk besides reading the model, which is
+        # only ever replaced atomically.
+        self._lock = threading.Lock()
+
+    def predict(self, example: str) -> Dict[int, float]:
+        """Return the action probabilities for a single prediction example."""
+        return self.predict_batch([example])[0]
+
+    def predict_batch(self, examples: List[str]) -> List[Dict[int, float]]:
+        """Score several prediction examples with a single vw run over pipes."""
+        if not examples:
+            return []
+        cmd = [
+            "vw",
+            *vw_options(self.num_actions, self.vw_args),
+            "-t",  # test mode
+            "-i",
+            self.model_file,
+            "-p",
+            "/dev/stdout",
+            "--quiet",
+        ]
+        # With no -d, vw reads the examples from stdin
+        with tracing.span("vw.subprocess", op="predict"):
+            result = subprocess.run(
+                cmd,
+                input="".join(f"{example}\n" for example in examples),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        tracing.count("vw.examples", len(examples), op="predict")
+        lines = result.stdout.splitlines()
+        return [parse_action_probs(line) for line in lines if line.strip()]
+
+    def learn(self, examples: List[str]):
+        """Update the model on disk by running vw over the labeled examples."""
+        with self._lock:
+            with open(self.feedback_file, "a") as f:
+                for example in examples:
+                    f.write(f"{example}\n")
+
+            if (
+                not os.path.exists(self.feedback_file)
+                or os.path.getsize(self.feedback_file) == 0
+            ):
+                return
+
+            cmd = [
+                "vw",
+                *vw_options(self.num_actions, self.vw_args),
+                "-d",
+                self.feedback_file,
+                "-i",
+                self.model_file,
+                "-f",
+                f"{self.model_file}.tmp",
+                "--quiet",
+            ]
+            with tracing.span("vw.subprocess", op="learn"):
+                subprocess.run(cmd, check=True)
+            tracing.count("vw.examples", len(examples), op="learn")
+            ModelStore(self.model_file).publish(f"{self.model_file}.tmp")
+            self.version = next_model_version()
+
+            # Clear the feedback file after updating
+            with open(self.feedback_file, "w") as f:
+                f.write("")
+
+    def train(self, data_file, incremental=False):
+        """Train the model from a VW data file, see train_with_vw."""
+        with self._lock:
+            train_with_vw(
+                self.model_file, self.num_actions, data_file, incremental, self.vw_args
+            )
+            self.version = next_model_version()
+
+    def checkpoint(self):
+        """Nothing to do, every learn() call writes the model file."""
+
+    def reload(self):
+        """The model is read on every run; only the version changes."""
+        self.version = next_model_version()
+
+    def close(self):
+        """Nothing to release."""
+
+
+class CheckpointPolicy:
+    """Decide when in-memory model updates should be written back to disk."""
+
+    def __init__(self, every=CHECKPOINT_EVERY, interval=CHECKPOINT_INTERVAL):
+        """
+        Args:
+            every: Checkpoint after this many learned examples
+            interval: Checkpoint when this many seconds passed since the last one
+        """
+        self.every = every
+        self.interval = interval
+        self.pending = 0
+        self._last_checkpoint = time.monotonic()
+
+    def record(self, num_examples) -> bool:
+        """Count newly learned examples and return True if a checkpoint is due."""
+        self.pending += num_examples
+        return self.pending >= self.every or self.due()
+
+    def due(self) -> bool:
+        """
+        Return True if there are pending updates and the interval has passed.
+
+        learn() only checks this when new examples arrive, so the model update
+        worker also checks it periodically to save engines that went idle.
+        """
+        return (
+            self.pending > 0
+            and time.monotonic() - self._last_checkpoint >= self.interval
+        )
+
+    def reset(self):
+        """Mark all pending updates as saved."""
+        self.pending = 0
+        self._last_checkpoint = time.monotonic()
+
+
+class WorkspaceBackend:
+    """Score and learn against a VW workspace that stays loaded in memory."""
+
+    name = "workspace"
+
+    def __init__(self, model_file, num_actions, vw_args=VW_ARGS):
+        """
+        Args:
+            model_file: Path to the trained VW model
+            num_actions: Number of actions (time slots) in the model
+            vw_args: Extra VW options, see VW_ARGS
+        """
+        if vowpalwabbit is None:
+            raise ImportError("The vowpalwabbit package is required for this backend")
+        self.model_file = model_file
+        self.num_actions = num_actions
+        self.vw_args = vw_args
+        self.checkpoints = CheckpointPolicy()
+        self.version = next_model_version()
+        self._workspace = None
+        # A VW workspace is not thread-safe, so every call into it is serialized
+        self._lock = threading.RLock()
+
+    def _get_workspace(self):
+        # The model is loaded lazily on first use and then kept for the life
+        # of the process (or until reload() is called after a retrain).
+        # It is opened in learning mode; predict() never updates the weights.
+        if self._workspace is None:
+            options = vw_options(self.num_actions, self.vw_args)
+            self._workspace = vowpalwabbit.Workspace(
+                f"{' '.join(options)} -i {self.model_file} --quiet"
+            )
+        return self._workspace
+
+    def predict(self, example: str) -> Dict[int, float]:
+        """Return the action probabilities for a single prediction example."""
+        with self._lock:
+            pmf = self._get_workspace().predict(example)
+        return {action: float(prob) for action, prob in enumerate(pmf)}
+
+    def predict_batch(self, examples: List[str]) -> List[Dict[int, float]]:
+        """Score several prediction examples against the loaded workspace."""
+        with self._lock:
+            workspace = self._get_workspace()
+            pmfs = [workspace.predict(example) for example in examples]
+        return [
+            {action: float(prob) for action, prob in enumerate(pmf)} for pmf in pmfs
+        ]
+
+    def learn(self, examples: List[str]):
+        """Apply labeled examples to the in-memory model, checkpointing when due."""
+        with self._lock:
+            workspace = self._get_workspace()
+            for example in examples:
+                workspace.learn(example)
+            self.version = next_model_version()
+            if self.checkpoints.record(len(examples)):
+                self.checkpoint()
+
+    def train(self, data_file, incremental=False):
+        """
+        Train the model in-process from a VW data file and switch to it.
+
+        A full run uses a VW cache file of the parsed data; with
+        ``incremental`` the loaded model continues learning from only the
+        examples appended since the last run (see train_with_vw).
+        """
+        state = TrainingState(self.model_file)
+        appended = None
+        if incremental and os.path.exists(self.model_file):
+            appended = state.appended_examples(data_file)
+        if appended is not None:
+            examples, end = appended
+            print(f"🔁 Continuing training on {len(examples)} new examples")
+            with self._lock:
+                workspace = self._get_workspace()
+                for example in examples:
+                    workspace.learn(example)
+                self.version = next_model_version()
+                self.checkpoints.record(len(examples))
+                self.checkpoint()
+                state.record(data_file, end)
+            return
+
+        # Training happens outside the lock so predictions keep being served
+        # from the old model until the new one is swapped in
+        tmp_file = f"{self.model_file}.tmp"
+        with tracing.span("vw.workspace", op="train"):
+            options = vw_options(self.num_actions, self.vw_args)
+            workspace = vowpalwabbit.Workspace(
+                f"{' '.join(options)} -d {data_file} "
+                f"--cache_file {state.prepare_cache(data_file, self.vw_args)} --quiet"
+            )
+            workspace.run_parser()
+            workspace.save(tmp_file)
+            workspace.finish()
+
+        with self._lock:
+            ModelStore(self.model_file).publish(tmp_file)
+            # The new model is loaded on the next call
+            if self._workspace is not None:
+                self._workspace.finish()
+                self._workspace = None
+            self.version = next_model_version()
+            self.checkpoints.reset()
+            state.record(data_file)
+
+    def checkpoint(self):
+        """Publish the in-memory model as a new version of the model file."""
+        with self._lock:
+            if self._workspace is None or self.checkpoints.pending == 0:
+                return
+            tmp_file = f"{self.model_file}.tmp"
+            self._workspace.save(tmp_file)
+            ModelStore(self.model_file).publish(tmp_file)
+            self.checkpoints.reset()
+
+    def reload(self):
+        """
+        Drop the loaded workspace so the next prediction reads the model again.
+
+        Called after the model file was rewritten (e.g. by train_model), so any
+        updates not yet checkpointed are discarded in favour of the new model.
+        """
+        with self._lock:
+            if self._workspace is not None:
+                self._workspace.finish()
+                self._workspace = None
+            self.version = next_model_version()
+            self.checkpoints.reset()
+
+    def close(self):
+        """Checkpoint pending updates and release the loaded workspace."""
+        with self._lock:
+            self.checkpoint()
+            self.reload()
+
+
+def create_engine(backend, model_file, num_actions, feedback_file, vw_args=VW_ARGS):
+    """
+    Create a prediction engine for the given backend name.
+
+    Args:
+        backend: One of "workspace", "subprocess", "daemon" or "numpy"
+        model_file: Path to the trained VW model
+        num_actions: Number of actions (time slots) in the model
+        feedback_file: Scratch file feedback is staged in before learning
+        vw_args: Extra VW options for the VW backends, see VW_ARGS (the numpy
+            backend has its own settings, see numpy_bandit.py)
+
+    Returns:
+        A prediction engine exposing predict(), predict_batch(), learn(),
+        train(), reload() and close()
+    """
+    if backend == "workspace":
+        if vowpalwabbit is not None:
+            return WorkspaceBackend(model_file, num_actions, vw_args)
+        print("⚠️ vowpalwabbit is not installed, falling back to the vw subprocess")
+        backend = "subprocess"
+
+    if backend == "daemon":
+        from vw_daemon import DaemonBackend
+
+        return DaemonBackend(model_file, num_actions, vw_args=vw_args)
+
+    if backend == "numpy":
+        from numpy_bandit import LinearBanditBackend
+
+        return LinearBanditBackend(model_file, num_actions)
+
+    if backend == "subprocess":
+        return SubprocessBackend(model_file, num_actions, feedback_file, vw_args)
+
+    raise ValueError(f"Unknown prediction backend: {backend}")
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Headless benchmark: simulate many users giving accept/reject feedback.
+
+``binary_feedback_demo.py`` and ``feedback_demo.py`` walk through a few
+hand-picked tasks. This harness instead builds thousands of synthetic users in
+the spirit of their ``simulate_user_preference``: every user accepts a time
+slot with a high probability inside the window their category prefers
+(``preferred_times`` in ``event_categories.CATEGORIES``) and a low one
+outside it, with the window shifted and stretched per user so no two users
+agree exactly.
+
+Each user gets their own model, seeded from the shared one, and runs the
+production loop over simulated weeks: score a day's tasks with
+``predict_batch``, draw a slot from the model's probabilities, sample the
+user's answer, and learn the day's feedback in one ``learn`` call (as the
+feedback worker does). The summary reports cumulative regret against the
+best slot for each task, the acceptance rate per week and overall, and
+recommendations per second, which makes it the standard benchmark for
+comparing backends and exploration settings.
+
+Usage:
+    python simulate_users.py [--users 1000] [--weeks 4] [--backend numpy] [--workers 8]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+from contextual_bandits import (
+    DATA_DIR,
+    MODEL_FILE,
+    PREDICTION_BACKEND,
+    TIME_SLOTS,
+    TRAIN_FILE,
+)
+from contextual_bandits_helpers import create_prediction_example
+from event_categories import CATEGORIES
+from prediction_engine import create_engine, model_file_for_backend
+
+SUMMARY_FILE = os.path.join(DATA_DIR, "simulation_summary.json")
+
+TASKS_PER_DAY = 4
+ACCEPT_INSIDE = 0.9  # chance of accepting a slot in the preferred window
+ACCEPT_OUTSIDE = 0.1  # ... and outside it
+WINDOW_SHIFT = 2.0  # hours a user's window may be shifted either way
+PREFERRED_WINDOWS = {
+    "morning": (6.0, 12.0),
+    "afternoon": (12.0, 18.0),
+    "evening": (18.0, 22.0),
+    "night": (20.0, 22.0),
+    "flexible": (6.0, 22.0),
+}
+
+CATEGORY_NAMES = sorted(CATEGORIES)
+SLOT_TIMES = np.asarray(TIME_SLOTS, dtype=float)
+
+
+class SyntheticUser:
+    """A user whose chance of accepting a slot depends on the task's category."""
+
+    def __init__(self, seed: int):
+        """
+        Args:
+            seed: Seed for the user's preferences and answers
+        """
+        self.rng = np.random.default_rng(seed)
+        # (category, slot) acceptance probabilities
+        self.accept_probs = np.empty((len(CATEGORY_NAMES), len(SLOT_TIMES)))
+        for row, category in zip(self.accept_probs, CATEGORY_NAMES):
+            start, end = PREFERRED_WINDOWS.get(
+                CATEGORIES[category]["preferred_times"], PREFERRED_WINDOWS["flexible"]
+            )
+            shift = self.rng.uniform(-WINDOW_SHIFT, WINDOW_SHIFT)
+            stretch = self.rng.uniform(-0.5, 1.0)
+            inside = (SLOT_TIMES >= start + shift - stretch) & (
+                SLOT_TIMES <= end + shift + stretch
+            )
+            row[:] = np.where(inside, ACCEPT_INSIDE, ACCEPT_OUTSIDE)
+        self.accept_probs += self.rng.normal(0.0, 0.03, self.accept_probs.shape)
+        np.clip(self.accept_probs, 0.0, 1.0, out=self.accept_probs)
+
+    def draw_tasks(self, num_tasks: int) -> List[Dict[str, Any]]:
+        """Draw a day's tasks: category, event type, duration and deadline."""
+        tasks = []
+        for category_index in self.rng.integers(len(CATEGORY_NAMES), size=num_tasks):
+            info = CATEGORIES[CATEGORY_NAMES[category_index]]
+            tasks.append(
+                {
+                    "category_index": int(category_index),
+                    "task_type": str(self.rng.choice(info["event_types"])),
+                    "task_duration": info["typical_duration"],
+                    "hours_until_due": float(self.rng.integers(2, 7 * 24)),
+                    "daily_free_time": float(self.rng.choice([2.0, 4.0, 6.0, 8.0])),
+                }
+            )
+        return tasks
+
+
+def _labeled_example(prediction_example: str, action, cost, probability) -> str:
+    features = prediction_example.partition("|")[2]
+    return f"{action}:{cost}:{probability} |{features}"
+
+
+def simulate_user(
+    user_index: int,
+    seed_model_file: str,
+    backend: str,
+    weeks: int,
+    tasks_per_day: int,
+    seed: int,
+) -> Dict[str, Any]:
+    """
+    Run one synthetic user through `weeks` weeks of recommendations (runs in a
+    worker process).
+
+    Returns:
+        A dict with per-week recommendation, acceptance and regret totals and
+        the time spent scoring and learning
+    """
+    rng = np.random.default_rng(seed + user_index)
+    user = SyntheticUser(seed + user_index)
+    result = {
+        "user": user_index,
+        "recommendations": [0] * weeks,
+        "accepted": [0] * weeks,
+        "regret": [0.0] * weeks,
+        "predict_seconds": 0.0,
+        "learn_seconds": 0.0,
+    }
+    work_dir = tempfile.mkdtemp(prefix="timelyai-sim-")
+    try:
+        model_file = os.path.join(work_dir, os.path.basename(seed_model_file))
+        if os.path.exists(seed_model_file):
+            shutil.copyfile(seed_model_file, model_file)
+        # Keep the engines' progress output out of the benchmark report
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = create_engine(
+                backend,
+                model_file,
+                len(TIME_SLOTS),
+                os.path.join(work_dir, "feedback.vw"),
+            )
+            try:
+                for week in range(weeks):
+                    for day_of_week in range(7):
+                        tasks = user.draw_tasks(tasks_per_day)
+                        examples = [
+                            create_prediction_example(
+                                task["task_type"],
+                                task["task_duration"],
+                                task["hours_until_due"],
+                                task["daily_free_time"],
+                                day_of_week,
+                            )
+                            for task in tasks
+                        ]
+
+                        started = time.perf_counter()
+                        all_action_probs = engine.predict_batch(examples)
+                        result["predict_seconds"] += time.perf_counter() - started
+
+                        feedback = []
+                        for task, example, action_probs in zip(
+                            tasks, examples, all_action_probs
+                        ):
+                            pmf = np.zeros(len(SLOT_TIMES))
+                            for action, prob in action_probs.items():
+                                if 0 <= action < len(pmf):
+                                    pmf[action] = prob
+                            if pmf.sum() <= 0:
+                                pmf[:] = 1.0
+                            pmf /= pmf.sum()
+                            action = int(rng.choice(len(pmf), p=pmf))
+
+                            accept_probs = user.accept_probs[task["category_index"]]
+                            accepted = rng.random() < accept_probs[action]
+                            result["recommendations"][week] += 1
+                            result["accepted"][week] += int(accepted)
+                            result["regret"][week] += float(
+                                accept_probs.max() - accept_probs[action]
+                            )
+                            feedback.append(
+                                _labeled_example(
+                                    example, action, 0 if accepted else 1, pmf[action]
+                                )
+                            )
+
+                        started = time.perf_counter()
+                        engine.learn(feedback)
+                        result["learn_seconds"] += time.perf_counter() - started
+            finally:
+                engine.close()
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def _seed_model(backend, model_file) -> str:
+    """Return the model every user starts from, training it if it is missing."""
+    seed_model_file = model_file_for_backend(backend, model_file)
+    if backend != "numpy" and not os.path.exists(seed_model_file):
+        print(f"🚂 Training the seed model {seed_model_file}...")
+        engine = create_engine(backend, seed_model_file, len(TIME_SLOTS), os.devnull)
+        try:
+            engine.train(TRAIN_FILE)
+        finally:
+            engine.close()
+    return seed_model_file
+
+
+def simulate_users(
+    num_users=1000,
+    weeks=4,
+    backend=PREDICTION_BACKEND,
+    tasks_per_day=TASKS_PER_DAY,
+    workers=None,
+    seed=0,
+    model_file=MODEL_FILE,
+    summary_file=SUMMARY_FILE,
+) -> Dict[str, Any]:
+    """
+    Simulate `num_users` users on a process pool and write a summary.
+
+    Args:
+        num_users: Number of synthetic users
+        weeks: Simulated weeks per user
+        backend: Prediction backend (see prediction_engine.create_engine)
+        tasks_per_day: Recommendations per user per day
+        workers: Number of worker processes (defaults to the number of cores)
+        seed: Base random seed; runs with the same seed see the same users
+        model_file: Model every user starts from
+        summary_file: Where to write the JSON summary (None to skip)
+
+    Returns:
+        The summary dict
+    """
+    workers = workers or os.cpu_count() or 1
+    seed_model_file = _seed_model(backend, model_file)
+    print(
+        f"🔁 Simulating {num_users} users for {weeks} weeks with {workers} workers ({backend})"
+    )
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                simulate_user,
+                user_index,
+                seed_model_file,
+                backend,
+                weeks,
+                tasks_per_day,
+                seed,
+            )
+            for user_index in range(num_users)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["status"] != "ok":
+                print(f"❌ User {result['user']}: {result['error']}")
+    wall_seconds = time.perf_counter() - started
+
+    succeeded = [r for r in results if r["status"] == "ok"]
+    recommendations = np.sum([r["recommendations"] for r in succeeded], axis=0)
+    accepted = np.sum([r["accepted"] for r in succeeded], axis=0)
+    regret = np.sum([r["regret"] for r in succeeded], axis=0)
+    total_recommendations = int(np.sum(recommendations))
+    model_seconds = sum(r["predict_seconds"] + r["learn_seconds"] for r in succeeded)
+
+    summary = {
+        "started_at": started_at,
+        "backend": backend,
+        "users": num_users,
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "weeks": weeks,
+        "tasks_per_day": tasks_per_day,
+        "seed": seed,
+        "workers": workers,
+        "recommendations": total_recommendations,
+        "acceptance_rate": float(np.sum(accepted)) / total_recommendations
+        if total_recommendations
+        else 0.0,
+        "cumulative_regret": float(np.sum(regret)),
+        "regret_per_recommendation": float(np.sum(regret)) / total_recommendations
+        if total_recommendations
+        else 0.0,
+        "weekly": [
+            {
+                "week": week + 1,
+                "acceptance_rate": float(accepted[week] / recommendations[week]),
+                "regret_per_recommendation": float(
+                    regret[week] / recommendations[week]
+                ),
+            }
+            for week in range(weeks)
+            if succeeded and recommendations[week]
+        ],
+        "wall_seconds": wall_seconds,
+        "recommendations_per_second": total_recommendations / wall_seconds
+        if wall_seconds
+        else 0.0,
+        # Scoring and learning only, summed over workers: the per-core rate
+        "model_recommendations_per_second": total_recommendations / model_seconds
+        if model_seconds
+        else 0.0,
+        "errors": sorted(
+            (
+                {"user": r["user"], "error": r["error"]}
+                for r in results
+                if r["status"] != "ok"
+            ),
+            key=lambda r: r["user"],
+        ),
+    }
+
+    if summary_file:
+        with open(summary_file, "w") as f:
+            json.dump(summary, f, indent=2)
+    for week in summary["weekly"]:
+        print(
+            f"📅 Week {week['week']}: {week['acceptance_rate']:.1%} accepted, "
+            f"regret {week['regret_per_recommendation']:.3f} per recommendation"
+        )
+    print(
+        f"📊 {total_recommendations} recommendations in {wall_seconds:.1f}s "
+        f"({summary['recommendations_per_second']:.0f} recs/s), "
+        f"{summary['acceptance_rate']:.1%} accepted, "
+        f"cumulative regret {summary['cumulative_regret']:.1f}"
+    )
+    if summary["failed"]:
+        print(f"⚠️ {summary['failed']} users failed, see {summary_file}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark a backend on simulated users' accept/reject feedback"
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--backend", default=PREDICTION_BACKEND)
+    parser.add_argument("--tasks-per-day", type=int, default=TASKS_PER_DAY)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: all cores)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=MODEL_FILE, help="model every user starts from")
+    parser.add_argument("--summary", default=SUMMARY_FILE)
+    args = parser.parse_args()
+
+    summary = simulate_users(
+        num_users=args.users,
+        weeks=args.weeks,
+        backend=args.backend,
+        tasks_per_day=args.tasks_per_day,
+        workers=args.workers,
+        seed=args.seed,
+        model_file=args.model,
+        summary_file=args.summary,
+    )
+    raise SystemExit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import unittest
+
+from contextual_bandits import SchedulerSession
+from interval_index import EventIndex, IntervalTree
+
+
+class TestIntervalTree(unittest.TestCase):
+
+    def test_free_gap_at_an_interval_start_is_occupied(self):
+        tree = IntervalTree()
+        tree.insert(9.0, 10.0, "a")
+        tree.insert(12.0, 13.0, "b")
+
+        self.assertIsNone(tree.free_gap(9.0))
+        self.assertIsNone(tree.free_gap(12.0))
+        self.assertEqual(tree.free_gap(10.0), (10.0, 12.0))
+        self.assertEqual(tree.free_gap(11.0), (10.0, 12.0))
+        self.assertEqual(tree.free_gap(8.0), (None, 9.0))
+
+    def test_find_matches_exact_intervals_only(self):
+        tree = IntervalTree()
+        for i in range(50):
+            tree.insert(float(i % 5), float(i % 5) + 1.0, f"e{i}")
+        tree.insert(3.0, 3.0, "zero")
+
+        self.assertEqual(sorted(tree.find(3.0, 3.0)), ["zero"])
+        self.assertEqual(len(tree.find(2.0, 3.0)), 10)
+        self.assertEqual(tree.find(2.0, 4.0), [])
+
+
+class TestEventRemoval(unittest.TestCase):
+
+    def test_zero_length_event_can_be_removed(self):
+        events = EventIndex()
+        events.add(2, 14.0, 14.0, "reminder")
+
+        self.assertEqual(events.find(2, 14.0, 14.0), ["reminder"])
+        self.assertTrue(events.remove(2, 14.0, 14.0))
+        self.assertEqual(len(events), 0)
+
+    def test_remove_scheduled_zero_length_event(self):
+        session = SchedulerSession()
+        session.add_scheduled_event(2, 14.0, 14.0, "reminder")
+
+        self.assertTrue(session.remove_scheduled_event(2, 14.0, 14.0))
+        self.assertEqual(len(session.scheduled_events), 0)
+        self.assertFalse(session.remove_scheduled_event(2, 14.0, 14.0))
+
+    def test_remove_scheduled_event_by_name(self):
+        session = SchedulerSession()
+        session.add_scheduled_event(2, 14.0, 15.0, "a")
+        session.add_scheduled_event(2, 14.0, 15.0, "b")
+
+        self.assertTrue(session.remove_scheduled_event(2, 14.0, 15.0, "b"))
+        self.assertEqual(session.scheduled_events.events(2), [(14.0, 15.0, "a")])
+
+
+if __name__ == "__main__":
+    unittest.main()
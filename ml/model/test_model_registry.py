@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from model_registry import ModelRegistry
+from prediction_engine import CheckpointPolicy
+
+
+class FakeEngine:
+    def __init__(self, user_id, model_file):
+        self.user_id = user_id
+        self.model_file = model_file
+        self.closed = False
+        with open(model_file, "ab"):
+            pass
+
+    def learn(self, size):
+        assert not self.closed, "learn() on a closed engine"
+        with open(self.model_file, "wb") as f:
+            f.write(b"x" * size)
+
+    def close(self):
+        self.closed = True
+
+
+class CheckpointingEngine(FakeEngine):
+    def __init__(self, user_id, model_file):
+        super().__init__(user_id, model_file)
+        self.checkpoints = CheckpointPolicy(every=100, interval=0.0)
+
+    def learn(self, size):
+        super().learn(size)
+        self.checkpoints.record(1)
+
+    def checkpoint(self):
+        self.checkpoints.reset()
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(FakeEngine, self.tmp_dir.name, max_models=1)
+
+    def tearDown(self):
+        self.registry.close()
+        self.tmp_dir.cleanup()
+
+    def test_leased_engine_is_closed_only_when_released(self):
+        with self.registry.lease("a") as engine:
+            self.registry.get("b")  # over budget: evicts "a"
+            self.assertNotIn("a", self.registry.cached_users())
+            self.assertFalse(engine.closed)
+            engine.learn(10)
+        self.assertTrue(engine.closed)
+
+    def test_evicted_leased_engine_is_reused(self):
+        with self.registry.lease("a") as engine:
+            self.registry.get("b")
+            # A second engine would write to the same model file
+            self.assertIs(self.registry.get("a"), engine)
+        self.assertFalse(engine.closed)
+
+    def test_idle_engines_are_evicted_before_leased_ones(self):
+        registry = ModelRegistry(FakeEngine, self.tmp_dir.name, max_models=2)
+        with registry.lease("a"):
+            registry.get("b")
+            registry.get("c")
+            self.assertEqual(registry.cached_users(), ["a", "c"])
+        registry.close()
+
+    def test_size_is_measured_again_after_a_lease(self):
+        registry = ModelRegistry(FakeEngine, self.tmp_dir.name, max_bytes=100)
+        with registry.lease("a") as a:
+            a.learn(80)
+        with registry.lease("b") as b:
+            b.learn(80)
+        # Together over the byte budget: the least recently used is evicted
+        self.assertEqual(registry.cached_users(), ["b"])
+        self.assertTrue(a.closed)
+        registry.close()
+
+    def test_checkpoint_due_saves_idle_engines(self):
+        registry = ModelRegistry(CheckpointingEngine, self.tmp_dir.name, max_models=2)
+        a = registry.get("a")
+        a.learn(10)
+        registry.get("b")
+        self.assertTrue(a.checkpoints.due())
+
+        registry.checkpoint_due()
+
+        self.assertFalse(a.checkpoints.due())
+        self.assertFalse(a.closed)
+        # Checkpointing does not count as a use
+        self.assertEqual(registry.cached_users(), ["a", "b"])
+        registry.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
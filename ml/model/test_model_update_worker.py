@@ -0,0 +1,109 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import contextual_bandits
+from feedback_buffer import FeedbackBuffer
+from model_update_worker import ModelUpdateWorker
+
+
+class TestModelUpdateMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.applied = []
+        self.buffer = FeedbackBuffer(
+            lambda user_id, examples: self.applied.extend(examples),
+            os.path.join(self.tmp_dir.name, "feedback_wal.jsonl"),
+        )
+        # Not started: every batch is applied outside the worker thread
+        self.worker = ModelUpdateWorker(self.buffer)
+
+    def tearDown(self):
+        self.buffer.close()
+        self.tmp_dir.cleanup()
+
+    def test_synchronous_update_model_is_counted(self):
+        self.buffer.append("0:0:0.5 | a", "user")
+
+        with patch.object(
+            contextual_bandits, "get_feedback_buffer", return_value=self.buffer
+        ):
+            contextual_bandits.update_model(user_id="user")
+
+        metrics = self.worker.metrics()
+        self.assertEqual(self.applied, ["0:0:0.5 | a"])
+        self.assertEqual(metrics["batches_applied"], 1)
+        self.assertEqual(metrics["examples_applied"], 1)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertIsNotNone(metrics["last_update_lag_seconds"])
+
+    def test_update_model_example_is_logged_before_learning(self):
+        logged = []
+
+        def apply_batch(user_id, examples):
+            with open(self.buffer.wal_file) as f:
+                logged.append(f.read())
+            self.applied.extend(examples)
+
+        self.buffer.apply_batch = apply_batch
+        with patch.object(
+            contextual_bandits, "get_feedback_buffer", return_value=self.buffer
+        ):
+            contextual_bandits.update_model("0:0:0.5 | a", user_id="user")
+
+        self.assertEqual(self.applied, ["0:0:0.5 | a"])
+        self.assertIn("0:0:0.5 | a", logged[0])
+
+    def test_close_is_counted(self):
+        self.buffer.append("0:0:0.5 | a")
+        self.buffer.append("0:1:0.5 | b")
+
+        self.buffer.close()
+
+        metrics = self.worker.metrics()
+        self.assertEqual(metrics["batches_applied"], 1)
+        self.assertEqual(metrics["examples_applied"], 2)
+
+    def test_failed_users_stay_pending(self):
+        def apply_batch(user_id, examples):
+            if user_id == "bad":
+                raise RuntimeError("boom")
+            self.applied.extend(examples)
+
+        self.buffer.apply_batch = apply_batch
+        self.buffer.append("0:0:0.5 | a", "good")
+        self.buffer.append("0:0:0.5 | b", "bad")
+
+        with self.assertRaises(RuntimeError):
+            self.buffer.flush()
+
+        metrics = self.worker.metrics()
+        self.assertEqual(metrics["examples_applied"], 1)
+        self.assertEqual(metrics["failures"], 1)
+        self.assertEqual(metrics["queue_depth"], 1)
+        self.buffer.apply_batch = lambda user_id, examples: None
+
+
+class TestPeriodicMaintenance(unittest.TestCase):
+
+    def test_periodic_runs_while_idle(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            buffer = FeedbackBuffer(
+                lambda user_id, examples: None,
+                os.path.join(tmp_dir, "feedback_wal.jsonl"),
+            )
+            ran = threading.Event()
+            worker = ModelUpdateWorker(buffer, interval=0.05, periodic=ran.set)
+            worker.start()
+            try:
+                self.assertTrue(ran.wait(2.0))
+            finally:
+                worker.stop()
+                buffer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
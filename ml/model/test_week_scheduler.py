@@ -0,0 +1,74 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from contextual_bandits import SchedulerSession
+from contextual_bandits_helpers import TIME_SLOTS
+from week_scheduler import schedule_week
+
+
+def uniform_probs(contexts, user_id=None):
+    return [{a: 1.0 / len(TIME_SLOTS) for a in range(len(TIME_SLOTS))} for _ in contexts]
+
+
+class TestScheduleWeek(unittest.TestCase):
+
+    @patch("week_scheduler.predict_action_probs", side_effect=uniform_probs)
+    def test_task_due_tomorrow_scheduled_late_today(self, _):
+        # Sunday 21:00: too late for a 2 hour task today, Monday is free
+        now = datetime(2026, 10, 18, 21, 0)
+        tasks = {
+            "a": {
+                "taskName": "a",
+                "taskDuration": 2,
+                "taskCategory": "School",
+                "taskDeadline": "10/19/26",
+            }
+        }
+
+        placements = schedule_week(tasks, SchedulerSession(), now=now)
+
+        self.assertIsNotNone(placements["a"])
+        day, start, duration = placements["a"]
+        self.assertEqual(day, 0)
+        self.assertEqual(duration, 2)
+
+    @patch("week_scheduler.predict_action_probs", side_effect=uniform_probs)
+    def test_task_does_not_run_past_its_deadline(self, _):
+        now = datetime(2026, 10, 18, 21, 0)
+        tasks = {
+            "a": {
+                "taskName": "a",
+                "taskDuration": 2,
+                "taskCategory": "School",
+                "taskDeadline": "2026-10-19T09:00",
+            }
+        }
+
+        placements = schedule_week(tasks, SchedulerSession(), now=now)
+
+        day, start, duration = placements["a"]
+        self.assertEqual(day, 0)
+        self.assertLessEqual(start + duration, 9.0)
+
+    @patch("week_scheduler.predict_action_probs", side_effect=uniform_probs)
+    def test_past_slots_of_today_are_skipped(self, _):
+        now = datetime(2026, 10, 18, 12, 10)
+        tasks = {
+            "a": {
+                "taskName": "a",
+                "taskDuration": 1,
+                "taskCategory": "School",
+                "taskDeadline": "10/18/26",
+            }
+        }
+
+        placements = schedule_week(tasks, SchedulerSession(), now=now)
+
+        day, start, _ = placements["a"]
+        self.assertEqual(day, 6)
+        self.assertGreaterEqual(start, 12.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""
+Lightweight tracing for the recommendation hot path.
+
+Spans time a block of code (a VW run, a Firestore round trip, a Google API
+call) and counters count things (examples scored, cache misses). Both are
+aggregated in memory per name and label set:
+
+    with tracing.span("vw.subprocess", op="predict"):
+        subprocess.run(...)
+
+    tracing.count("vw.examples", len(examples), op="predict")
+
+Aggregates are exported in the Prometheus text format (served on ``/metrics``
+by ``backend/app.py``). If ``TIMELYAI_TRACE_FILE`` is set, every finished
+span is also appended to that file as a JSON line, for a local collector to
+pick up.
+
+Tracing is off unless ``TIMELYAI_TRACING`` is set (or enable() is called).
+When off, ``span()`` returns a shared no-op context manager and ``count()``
+returns immediately, so instrumented code pays one global lookup per call.
+
+This module is shared by the ML code and the backend, so it only uses the
+standard library.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+_ENABLED = os.environ.get("TIMELYAI_TRACING", "").lower() in ("1", "true", "yes", "on")
+TRACE_FILE = os.environ.get("TIMELYAI_TRACE_FILE")
+
+METRIC_PREFIX = "timelyai"
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "parent", "started_at", "started")
+
+    def __init__(self, name: str, labels: Labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.started
+        _local.stack.pop()
+        failed = exc_type is not None
+        _record_span(self.name, self.labels, duration, failed)
+        if TRACE_FILE:
+            _write_trace(
+                self.name, self.labels, self.parent, self.started_at, duration, failed
+            )
+        return False
+
+
+class _SpanStats:
+    __slots__ = ("count", "errors", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+
+_lock = threading.Lock()
+_spans: Dict[Tuple[str, Labels], _SpanStats] = {}
+_counters: Dict[Tuple[str, Labels], float] = {}
+_local = threading.local()  # per-thread stack of open span names
+
+
+def enable():
+    """Turn tracing on for this process."""
+    global _ENABLED
+    _ENABLED = True
+
+
+def disable():
+    """Turn tracing off; aggregates collected so far are kept."""
+    global _ENABLED
+    _ENABLED = False
+
+
+def is_enabled() -> bool:
+    """Return True if spans and counters are being recorded."""
+    return _ENABLED
+
+
+def _labels(labels) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def span(name: str, **labels):
+    """
+    Time a block of code.
+
+    Args:
+        name: Span name, dotted by subsystem (e.g. "firestore.get")
+        **labels: Extra dimensions to aggregate by; keep their values few
+            (an operation or collection name, never a user id)
+
+    Returns:
+        A context manager
+    """
+    if not _ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, _labels(labels))
+
+
+def _record_span(name, labels, duration, failed):
+    with _lock:
+        stats = _spans.get((name, labels))
+        if stats is None:
+            stats = _spans[(name, labels)] = _SpanStats()
+        stats.count += 1
+        stats.errors += failed
+        stats.total += duration
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                stats.buckets[i] += 1
+                break
+
+
+def _write_trace(name, labels, parent, started_at, duration, failed):
+    record = {
+        "name": name,
+        "labels": dict(labels),
+        "parent": parent,
+        "start": started_at,
+        "duration": duration,
+        "error": failed,
+        "thread": threading.current_thread().name,
+    }
+    line = json.dumps(record) + "\n"
+    with _lock:
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def count(name: str, value: float = 1, **labels):
+    """Add `value` to a counter."""
+    if not _ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def snapshot() -> Dict[str, list]:
+    """
+    Return the aggregates collected so far.
+
+    Returns:
+        A dict with "spans" (name, labels, count, errors, total seconds) and
+        "counters" (name, labels, value)
+    """
+    with _lock:
+        return {
+            "spans": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "total_seconds": stats.total,
+                }
+                for (name, labels), stats in sorted(_spans.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_counters.items())
+            ],
+        }
+
+
+def reset():
+    """Drop every aggregate."""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _metric_name(name: str) -> str:
+    safe = "".join(c if c.isalnum() else "_" for c in name)
+    return f"{METRIC_PREFIX}_{safe}"
+
+
+def _format_labels(labels: Labels, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def export_prometheus() -> str:
+    """Render the aggregates in the Prometheus text exposition format."""
+    with _lock:
+        spans = sorted((key, _copy(stats)) for key, stats in _spans.items())
+        counters = sorted(_counters.items())
+
+    lines = []
+    duration_metric = f"{METRIC_PREFIX}_span_duration_seconds"
+    errors_metric = f"{METRIC_PREFIX}_span_errors_total"
+    if spans:
+        lines.append(f"# HELP {duration_metric} Time spent in traced spans.")
+        lines.append(f"# TYPE {duration_metric} histogram")
+        for (name, labels), stats in spans:
+            span_labels = (("span", name),) + labels
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, stats.buckets):
+                cumulative += bucket
+                lines.append(
+                    f"{duration_metric}_bucket"
+                    f"{_format_labels(span_labels, le=repr(bound))} {cumulative}"
+                )
+            lines.append(
+                f"{duration_metric}_bucket"
+                f"{_format_labels(span_labels, le='+Inf')} {stats.count}"
+            )
+            label_str = _format_labels(span_labels)
+            lines.append(f"{duration_metric}_sum{label_str} {stats.total}")
+            lines.append(f"{duration_metric}_count{label_str} {stats.count}")
+        lines.append(f"# HELP {errors_metric} Traced spans that raised.")
+        lines.append(f"# TYPE {errors_metric} counter")
+        for (name, labels), stats in spans:
+            span_labels = (("span", name),) + labels
+            lines.append(f"{errors_metric}{_format_labels(span_labels)} {stats.errors}")
+
+    seen = set()
+    for (name, labels), value in counters:
+        metric = f"{_metric_name(name)}_total"
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _copy(stats: _SpanStats) -> _SpanStats:
+    copied = _SpanStats()
+    copied.count, copied.errors, copied.total = stats.count, stats.errors, stats.total
+    copied.buckets = list(stats.buckets)
+    return copied
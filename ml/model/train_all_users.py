@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Retrain every user's model in parallel.
+
+Finds the per-user training files (``<user>.vw`` in USER_DATA_DIR), trains each
+user's model in USER_MODEL_DIR on a process pool sized to the machine, and
+writes a JSON summary with per-user wall time, failures and overall throughput.
+
+A user's training file is the log of every feedback example their model has
+learned: the model update worker appends each applied batch to it (see
+contextual_bandits._append_user_training_data) and marks the model as having
+seen the whole file. So:
+
+- a full retrain rebuilds the model from the shared training data (TRAIN_FILE,
+  which the shared model every user starts from is trained on) followed by
+  the user's log, and keeps all their feedback;
+- ``--incremental`` continues each model over only lines appended to the log
+  since, e.g. feedback imported from elsewhere, without learning online
+  feedback twice.
+
+Usage:
+    python train_all_users.py [--backend numpy] [--incremental] [--workers 8]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from contextual_bandits import (
+    DATA_DIR,
+    MODEL_FILE,
+    PREDICTION_BACKEND,
+    TIME_SLOTS,
+    TRAIN_FILE,
+    USER_DATA_DIR,
+    USER_MODEL_DIR,
+)
+from prediction_engine import TrainingState, create_engine, model_file_for_backend
+
+TRAINING_FILE_SUFFIX = ".vw"
+# Feedback staging files live in the same directory and are not training data
+FEEDBACK_FILE_SUFFIX = ".feedback.vw"
+SUMMARY_FILE = os.path.join(DATA_DIR, "train_all_users_summary.json")
+
+
+def find_user_training_files(data_dir=USER_DATA_DIR) -> List[Tuple[str, str]]:
+    """
+    Return (user, training file) pairs for every per-user training file.
+
+    The user part is the file-safe user id (see model_registry.safe_user_id),
+    which is also the name of the user's model file. The files are written
+    by contextual_bandits as feedback is applied to the users' models.
+    """
+    if not os.path.isdir(data_dir):
+        return []
+    found = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith(TRAINING_FILE_SUFFIX) and not name.endswith(
+            FEEDBACK_FILE_SUFFIX
+        ):
+            found.append(
+                (name[: -len(TRAINING_FILE_SUFFIX)], os.path.join(data_dir, name))
+            )
+    return found
+
+
+def _count_examples(data_file) -> int:
+    with open(data_file, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def _write_full_training_file(base_data_file, data_file, target_file):
+    """Write the shared training data followed by a user's log to target_file."""
+    with open(target_file, "wb") as target:
+        for source_file in (base_data_file, data_file):
+            if not source_file or not os.path.exists(source_file):
+                continue
+            with open(source_file, "rb") as source:
+                data = source.read()
+            target.write(data)
+            if data and not data.endswith(b"\n"):
+                target.write(b"\n")
+
+
+def train_user(
+    user: str,
+    data_file: str,
+    model_file: str,
+    backend: str,
+    incremental: bool,
+    base_data_file: str = TRAIN_FILE,
+) -> Dict[str, Any]:
+    """
+    Train one user's model (runs in a worker process).
+
+    A full run trains on base_data_file followed by the user's data_file; an
+    incremental run continues the model over lines appended to data_file.
+
+    Returns:
+        A dict with the user, status, wall time, number of examples trained on
+        and the error message if training failed
+    """
+    started = time.perf_counter()
+    result = {"user": user, "model_file": model_file, "examples": 0}
+    try:
+        if incremental and os.path.exists(model_file):
+            appended = TrainingState(model_file).appended_examples(data_file)
+        else:
+            appended = None
+        full_training_file = None
+        if appended is not None:
+            train_file = data_file
+            result["examples"] = len(appended[0])
+        else:
+            full_training_file = train_file = f"{model_file}.full_train.vw"
+            _write_full_training_file(base_data_file, data_file, full_training_file)
+            result["examples"] = _count_examples(full_training_file)
+
+        # Keep the engines' progress output out of the runner's report
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = create_engine(
+                backend,
+                model_file,
+                len(TIME_SLOTS),
+                os.path.join(USER_DATA_DIR, f"{user}{FEEDBACK_FILE_SUFFIX}"),
+            )
+            try:
+                engine.train(train_file, incremental=appended is not None)
+            finally:
+                engine.close()
+        if full_training_file is not None:
+            os.remove(full_training_file)
+            # Later incremental runs continue after the end of the user's log
+            TrainingState(model_file).record(data_file)
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def train_all_users(
+    backend=PREDICTION_BACKEND,
+    incremental=False,
+    workers=None,
+    data_dir=USER_DATA_DIR,
+    model_dir=USER_MODEL_DIR,
+    summary_file=SUMMARY_FILE,
+    base_data_file=TRAIN_FILE,
+) -> Dict[str, Any]:
+    """
+    Train every user's model on a process pool and write a summary.
+
+    Args:
+        backend: Prediction backend to train (see prediction_engine.create_engine)
+        incremental: Only train on examples appended since each user's last run
+        workers: Number of worker processes (defaults to the number of cores)
+        data_dir: Directory with the per-user training files
+        model_dir: Directory with the per-user models
+        summary_file: Where to write the JSON summary (None to skip)
+        base_data_file: Shared training data a full retrain starts from
+
+    Returns:
+        The summary dict
+    """
+    workers = workers or os.cpu_count() or 1
+    suffix = os.path.splitext(model_file_for_backend(backend, MODEL_FILE))[1]
+    os.makedirs(model_dir, exist_ok=True)
+    jobs = find_user_training_files(data_dir)
+    print(f"🚂 Training {len(jobs)} user models with {workers} workers ({backend})")
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                train_user,
+                user,
+                data_file,
+                os.path.join(model_dir, f"{user}{suffix}"),
+                backend,
+                incremental,
+                base_data_file,
+            )
+            for user, data_file in jobs
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["status"] == "ok":
+                print(
+                    f"✅ {result['user']}: {result['examples']} examples in {result['seconds']:.2f}s"
+                )
+            else:
+                print(f"❌ {result['user']}: {result['error']}")
+    wall_seconds = time.perf_counter() - started
+
+    succeeded = [r for r in results if r["status"] == "ok"]
+    examples = sum(r["examples"] for r in succeeded)
+    summary = {
+        "started_at": started_at,
+        "backend": backend,
+        "incremental": incremental,
+        "workers": workers,
+        "users": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "wall_seconds": wall_seconds,
+        "users_per_minute": len(succeeded) / wall_seconds * 60 if wall_seconds else 0.0,
+        "examples_per_second": examples / wall_seconds if wall_seconds else 0.0,
+        "results": sorted(results, key=lambda r: r["user"]),
+    }
+
+    if summary_file:
+        with open(summary_file, "w") as f:
+            json.dump(summary, f, indent=2)
+    print(
+        f"📊 {summary['succeeded']}/{summary['users']} users trained in {wall_seconds:.1f}s "
+        f"({summary['users_per_minute']:.1f} users/min, {summary['examples_per_second']:.0f} examples/s)"
+    )
+    if summary["failed"]:
+        print(f"⚠️ {summary['failed']} users failed, see {summary_file}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain every user's model in parallel")
+    parser.add_argument("--backend", default=PREDICTION_BACKEND)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only train on examples appended since each user's last run",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: all cores)"
+    )
+    parser.add_argument("--data-dir", default=USER_DATA_DIR)
+    parser.add_argument("--model-dir", default=USER_MODEL_DIR)
+    parser.add_argument("--summary", default=SUMMARY_FILE)
+    parser.add_argument(
+        "--base-data",
+        default=TRAIN_FILE,
+        help="shared training data a full retrain starts from",
+    )
+    args = parser.parse_args()
+
+    summary = train_all_users(
+        backend=args.backend,
+        incremental=args.incremental,
+        workers=args.workers,
+        data_dir=args.data_dir,
+        model_dir=args.model_dir,
+        summary_file=args.summary,
+        base_data_file=args.base_data,
+    )
+    raise SystemExit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Persistent VW daemon backend for the time recommendation model.
+
+Instead of launching ``vw`` for every prediction or feedback update, this
+backend starts one long-lived ``vw --daemon`` server per model and exchanges
+examples with it over a pool of local socket connections. Every call becomes a
+request/response round trip. The daemon is restarted automatically if it
+crashes or stops answering.
+
+With more than one VW child (TIMELYAI_VW_DAEMON_CHILDREN) the backend is
+predict-only: each child learns only from its own connection and a saved model
+holds one child's updates, so online learning needs a single child. Multi-child
+daemons still serve models retrained offline with ``train``.
+"""
+
+import os
+import queue
+import socket
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import tracing
+from model_store import ModelStore
+from prediction_engine import (
+    VW_ARGS,
+    CheckpointPolicy,
+    next_model_version,
+    parse_action_probs,
+    train_with_vw,
+    vw_options,
+)
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = int(os.environ.get("TIMELYAI_VW_DAEMON_PORT", "0"))  # 0 = pick a free port
+# More than one child makes the backend predict-only (see above)
+DAEMON_CHILDREN = int(os.environ.get("TIMELYAI_VW_DAEMON_CHILDREN", "1"))
+DAEMON_STARTUP_TIMEOUT = 10.0  # seconds
+DAEMON_SOCKET_TIMEOUT = 5.0  # seconds
+
+# Tag attached to the probe example used to find the end of a response
+SYNC_TAG = "timelyai_sync"
+
+
+def find_free_port(host=DAEMON_HOST):
+    """Ask the OS for a free TCP port on the given host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class VWDaemon:
+    """Start, health-check and restart a ``vw --daemon`` process for one model."""
+
+    def __init__(
+        self,
+        model_file,
+        num_actions,
+        port=DAEMON_PORT,
+        num_children=DAEMON_CHILDREN,
+        vw_args=VW_ARGS,
+    ):
+        """
+        Args:
+            model_file: Path to the trained VW model the daemon serves
+            num_actions: Number of actions (time slots) in the model
+            port: Port to listen on (0 picks a free port on every start)
+            num_children: Number of VW worker processes, each serving one connection
+            vw_args: Extra VW options, see prediction_engine.VW_ARGS
+        """
+        self.model_file = model_file
+        self.num_actions = num_actions
+        self.vw_args = vw_args
+        self.requested_port = port
+        self.num_children = num_children
+        self.port = None
+        self._process = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the daemon and wait until it accepts connections."""
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return
+
+            self.port = self.requested_port or find_free_port()
+            cmd = [
+                "vw",
+                *vw_options(self.num_actions, self.vw_args),
+                "-i",
+                self.model_file,
+                "--daemon",
+                "--foreground",
+                "--port",
+                str(self.port),
+                "--num_children",
+                str(self.num_children),
+                "--quiet",
+            ]
+            print(f"🚀 Starting VW daemon on port {self.port}")
+            self._process = subprocess.Popen(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            self._wait_until_ready()
+
+    def _wait_until_ready(self):
+        deadline = time.monotonic() + DAEMON_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(
+                    f"VW daemon exited during startup with code {self._process.returncode}"
+                )
+            if self._can_connect():
+                return
+            time.sleep(0.05)
+        raise TimeoutError(f"VW daemon did not start listening on port {self.port}")
+
+    def _can_connect(self):
+        try:
+            with socket.create_connection((DAEMON_HOST, self.port), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def is_running(self):
+        """Check that the daemon process has been started and has not exited."""
+        return self._process is not None and self._process.poll() is None
+
+    def is_healthy(self):
+        """Check that the daemon process is alive and listening."""
+        return self.is_running() and self._can_connect()
+
+    def stop(self):
+        """Terminate the daemon process."""
+        with self._lock:
+            if self._process is None:
+                return
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=DAEMON_SOCKET_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+                    self._process.wait()
+            self._process = None
+            self.port = None
+
+    def restart(self):
+        """Stop the daemon (if running) and start a fresh one from the model file."""
+        print("🔄 Restarting VW daemon")
+        self.stop()
+        self.start()
+
+
+class _Connection:
+    """A socket to the daemon with a buffered line reader."""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(
+            (DAEMON_HOST, port), timeout=DAEMON_SOCKET_TIMEOUT
+        )
+        self.reader = self.sock.makefile("r")
+
+    def send_lines(self, lines: List[str]):
+        payload = "".join(f"{line}\n" for line in lines)
+        self.sock.sendall(payload.encode("utf-8"))
+
+    def read_line(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("VW daemon closed the connection")
+        return line.strip()
+
+    def close(self):
+        try:
+            self.reader.close()
+        finally:
+            self.sock.close()
+
+
+class ConnectionPool:
+    """A bounded pool of reusable socket connections to a VW daemon."""
+
+    def __init__(self, daemon: VWDaemon, size):
+        """
+        Args:
+            daemon: The daemon connections are opened to
+            size: Maximum number of open connections
+        """
+        self.daemon = daemon
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded instead of returned if the call fails."""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = _Connection(self.daemon.port)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def reset(self):
+        """Close every idle connection (used after the daemon restarts)."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class DaemonBackend:
+    """Prediction engine backed by a persistent VW daemon."""
+
+    name = "daemon"
+
+    def __init__(
+        self,
+        model_file,
+        num_actions,
+        port=DAEMON_PORT,
+        num_children=DAEMON_CHILDREN,
+        vw_args=VW_ARGS,
+    ):
+        """
+        Args:
+            model_file: Path to the trained VW model
+            num_actions: Number of actions (time slots) in the model
+            port: Port the daemon listens on (0 picks a free port)
+            num_children: Number of VW worker processes behind the daemon; with
+                more than one the backend is predict-only
+            vw_args: Extra VW options, see prediction_engine.VW_ARGS
+        """
+        self.model_file = model_file
+        self.num_actions = num_actions
+        self.vw_args = vw_args
+        self.daemon = VWDaemon(model_file, num_actions, port, num_children, vw_args)
+        # Each VW child serves exactly one connection at a time, so more pooled
+        # connections than children would just block on accept
+        self.pool = ConnectionPool(self.daemon, num_children)
+        self.checkpoints = CheckpointPolicy()
+        self.version = next_model_version()
+        # Round trips are made thread-safe by the pool; this lock guards the
+        # checkpoint counter and restarts
+        self._lock = threading.RLock()
+
+    def _ensure_running(self):
+        if self.daemon.is_running():
+            return
+        if self.daemon.port is None:
+            self.daemon.start()
+            return
+        print("⚠️ VW daemon exited unexpectedly")
+        self._restart()
+
+    def _restart(self):
+        self.pool.reset()
+        self.daemon.restart()
+
+    def _round_trip(self, lines: List[str], sync=False) -> List[str]:
+        """
+        Send lines to the daemon over a pooled connection and read the replies.
+
+        Without ``sync`` one reply is read per line. With ``sync`` a tagged probe
+        example is appended and replies are read until the probe's comes back,
+        which also covers requests (like saving) that may not reply at all.
+
+        If the connection is lost the daemon is restarted from the last
+        checkpoint and predictions are retried once. Sync requests are not
+        retried, since the daemon may have learned part of the batch: the
+        restart drops those updates (and any others since the checkpoint) and
+        the error is raised, so the caller can send the batch again.
+        """
+        with tracing.span("vw.daemon", op="sync" if sync else "predict"):
+            return self._send_and_receive(lines, sync)
+
+    def _send_and_receive(self, lines: List[str], sync) -> List[str]:
+        self._ensure_running()
+        if sync:
+            lines = lines + [f"'{SYNC_TAG} |"]
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as conn:
+                    conn.send_lines(lines)
+                    if not sync:
+                        return [conn.read_line() for _ in lines]
+                    replies = []
+                    while True:
+                        reply = conn.read_line()
+                        if reply.endswith(SYNC_TAG):
+                            return replies
+                        replies.append(reply)
+            except (OSError, ConnectionError):
+                if attempt == 1:
+                    raise
+                print("⚠️ Lost connection to VW daemon, restarting it")
+                self._restart()
+                if sync:
+                    raise
+
+    def predict(self, example: str) -> Dict[int, float]:
+        """Return the action probabilities for a single prediction example."""
+        (reply,) = self._round_trip([example])
+        return parse_action_probs(reply)
+
+    def predict_batch(self, examples: List[str]) -> List[Dict[int, float]]:
+        """Pipeline several prediction examples over one connection."""
+        if not examples:
+            return []
+        return [parse_action_probs(reply) for reply in self._round_trip(examples)]
+
+    def learn(self, examples: List[str]):
+        """
+        Learn from labeled examples in the daemon, checkpointing when due.
+
+        Raises:
+            RuntimeError: If the daemon runs more than one child
+        """
+        if not examples:
+            return
+        if self.daemon.num_children > 1:
+            raise RuntimeError(
+                "The VW daemon backend is predict-only with more than one child; "
+                "set TIMELYAI_VW_DAEMON_CHILDREN=1 to learn online"
+            )
+        self._round_trip(examples, sync=True)
+        self.version = next_model_version()
+        with self._lock:
+            if self.checkpoints.record(len(examples)):
+                self.checkpoint()
+
+    def checkpoint(self):
+        """Have the daemon save its model and publish it as a new model version."""
+        with self._lock:
+            if not self.daemon.is_running() or self.checkpoints.pending == 0:
+                return
+            tmp_file = f"{self.model_file}.tmp"
+            self._round_trip([f"save_{tmp_file}|"], sync=True)
+            ModelStore(self.model_file).publish(tmp_file)
+            self.checkpoints.reset()
+
+    def train(self, data_file, incremental=False):
+        """Train the model with the vw binary (see train_with_vw) and restart the daemon on it."""
+        with self._lock:
+            if incremental:
+                # Continue from the daemon's latest weights, not the last checkpoint
+                self.checkpoint()
+            train_with_vw(
+                self.model_file, self.num_actions, data_file, incremental, self.vw_args
+            )
+            self.reload()
+
+    def reload(self):
+        """Restart the daemon so it serves the model currently on disk."""
+        with self._lock:
+            if self.daemon.is_running():
+                self._restart()
+            self.version = next_model_version()
+            self.checkpoints.reset()
+
+    def close(self):
+        """Checkpoint pending updates, close pooled connections and stop the daemon."""
+        with self._lock:
+            self.checkpoint()
+            self.pool.reset()
+            self.daemon.stop()
@@ -0,0 +1,176 @@
+"""
+Compact week occupancy for the time recommendation system.
+
+Each day of the week is a single integer bitmask with one bit per time slot
+(bit i is slot START_HOUR + i * TIME_STEP), so blocking, unblocking and range
+blocking are a handful of bit operations, and times are looked up by slot index
+instead of by float dict keys. The reasons a slot is blocked are kept in a
+side table, one entry per block covering it, so overlapping blocks are
+reference counted: a slot is only freed once every block on it is removed.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from contextual_bandits_helpers import START_HOUR, TIME_STEP, TIME_SLOTS
+
+DAYS_PER_WEEK = 7
+
+
+class WeekOccupancy:
+    """Blocked time slots for one week, stored as a bitmask per day."""
+
+    def __init__(
+        self, num_slots=len(TIME_SLOTS), start_hour=START_HOUR, time_step=TIME_STEP
+    ):
+        """
+        Args:
+            num_slots: Number of time slots per day
+            start_hour: Time of the first slot in 24-hour format
+            time_step: Length of a slot in hours
+        """
+        self.num_slots = num_slots
+        self.start_hour = start_hour
+        self.time_step = time_step
+        self._full = (1 << num_slots) - 1
+        self._bits = [0] * DAYS_PER_WEEK
+        # Reasons of the blocks covering each slot, oldest first
+        self._reasons: List[List[List[str]]] = [
+            [[] for _ in range(num_slots)] for _ in range(DAYS_PER_WEEK)
+        ]
+
+    # ------------------------------------------------------------ slot indices
+
+    def slot_index(self, time: float) -> Optional[int]:
+        """Return the index of the slot starting at `time`, or None if off the grid."""
+        position = (time - self.start_hour) / self.time_step
+        index = int(round(position))
+        if abs(position - index) > 1e-6 or not 0 <= index < self.num_slots:
+            return None
+        return index
+
+    def _range_indices(self, start_time: float, end_time: float):
+        """Return the [first, last) slot indices with start_time <= slot < end_time."""
+        first = int(np.ceil((start_time - self.start_hour) / self.time_step - 1e-9))
+        last = int(np.ceil((end_time - self.start_hour) / self.time_step - 1e-9))
+        return max(first, 0), min(last, self.num_slots)
+
+    @staticmethod
+    def _run_mask(first: int, last: int) -> int:
+        return ((1 << (last - first)) - 1) << first if last > first else 0
+
+    # ----------------------------------------------------------------- updates
+
+    def block(self, day: int, time: float, reason: str = "blocked"):
+        """Block a single slot."""
+        index = self.slot_index(time)
+        if index is not None:
+            self._bits[day] |= 1 << index
+            self._reasons[day][index].append(reason)
+
+    def unblock(self, day: int, time: float):
+        """Unblock a single slot, whatever blocks cover it."""
+        index = self.slot_index(time)
+        if index is not None:
+            self._bits[day] &= ~(1 << index)
+            self._reasons[day][index].clear()
+
+    def block_range(
+        self, day: int, start_time: float, end_time: float, reason: str = "blocked"
+    ):
+        """Block every slot starting in [start_time, end_time)."""
+        first, last = self._range_indices(start_time, end_time)
+        if last <= first:
+            return
+        self._bits[day] |= self._run_mask(first, last)
+        for reasons in self._reasons[day][first:last]:
+            reasons.append(reason)
+
+    def unblock_range(
+        self,
+        day: int,
+        start_time: float,
+        end_time: float,
+        reason: Optional[str] = None,
+    ):
+        """
+        Unblock every slot starting in [start_time, end_time).
+
+        If `reason` is given, only one block with that reason is removed from
+        each slot, and slots other blocks still cover stay blocked.
+        """
+        first, last = self._range_indices(start_time, end_time)
+        if last <= first:
+            return
+        if reason is None:
+            self._bits[day] &= ~self._run_mask(first, last)
+            for reasons in self._reasons[day][first:last]:
+                reasons.clear()
+            return
+        for index in range(first, last):
+            reasons = self._reasons[day][index]
+            if reason not in reasons:
+                continue
+            # Drop the most recent block with that reason
+            del reasons[len(reasons) - 1 - reasons[::-1].index(reason)]
+            if not reasons:
+                self._bits[day] &= ~(1 << index)
+
+    def clear(self):
+        """Unblock the whole week."""
+        self._bits = [0] * DAYS_PER_WEEK
+        for day_reasons in self._reasons:
+            for reasons in day_reasons:
+                reasons.clear()
+
+    # ----------------------------------------------------------------- queries
+
+    def is_blocked(self, day: int, time: float) -> bool:
+        """Check if the slot starting at `time` is blocked."""
+        index = self.slot_index(time)
+        return index is not None and bool(self._bits[day] >> index & 1)
+
+    def reason(self, day: int, time: float) -> Optional[str]:
+        """Return the reason of the latest block on the slot at `time`, or None."""
+        index = self.slot_index(time)
+        if index is None or not self._bits[day] >> index & 1:
+            return None
+        reasons = self._reasons[day][index]
+        return reasons[-1] if reasons else None
+
+    def first_free_run(self, day: int, length: int, start_index: int = 0) -> Optional[int]:
+        """
+        Find the first run of `length` consecutive free slots on a day.
+
+        Args:
+            day: Day of the week (0=Monday, 6=Sunday)
+            length: Number of consecutive free slots needed
+            start_index: Only consider runs starting at or after this slot
+
+        Returns:
+            The index of the first slot of the run, or None if there is none
+        """
+        if length <= 0:
+            return start_index if start_index < self.num_slots else None
+        free = ~self._bits[day] & self._full & ~((1 << start_index) - 1)
+        # After the loop bit i is set iff slots i .. i+length-1 are all free
+        # (log2(length) shift-and steps)
+        covered = 1
+        while covered < length:
+            step = min(covered, length - covered)
+            free &= free >> step
+            covered += step
+        if not free:
+            return None
+        return (free & -free).bit_length() - 1
+
+    def as_mask(self) -> np.ndarray:
+        """Return the week as a (7, num_slots) boolean matrix of blocked slots."""
+        bits = np.array(self._bits, dtype=np.uint64)[:, None]
+        shifts = np.arange(self.num_slots, dtype=np.uint64)
+        return ((bits >> shifts) & np.uint64(1)).astype(bool)
+
+    def __len__(self):
+        """Number of blocked slots in the week."""
+        return sum(bin(bits).count("1") for bits in self._bits)
@@ -0,0 +1,292 @@
+"""
+Whole-week scheduling of a user's open tasks.
+
+Placing tasks one at a time lets whichever task comes first take the best
+slots, so urgent tasks further down the list can end up with no slot at all.
+This module places every open task together instead:
+
+1. All tasks are scored with the bandit model in a single batch (through the
+   prediction cache).
+2. Each task gets a (day, time slot) score grid: the model's probability for
+   the slot, weighted by how urgent the task is, and restricted to the days up
+   to and including its deadline's (without running past the deadline).
+3. A priority queue repeatedly places the task whose best still-feasible
+   start has the highest score, occupying the full run of slots the task
+   needs. Placements only ever remove options, so a task's score can only go
+   down; stale queue entries are re-scored lazily when they reach the top.
+
+Slots of today that have already started are never used.
+
+Tasks are read in the format stored by ``firestore_module.addTask``
+(taskName, taskDuration, taskCategory, taskDeadline).
+"""
+
+import heapq
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from contextual_bandits import SchedulerSession, predict_action_probs
+from contextual_bandits_helpers import (
+    TIME_SLOTS,
+    TIME_STEP,
+    action_prob_vector,
+    format_day_and_time,
+    format_duration,
+    is_relaxation,
+    resolve_task_window,
+    task_buffer_radius,
+)
+from event_categories import CATEGORIES, get_default_event_type_for_category
+
+DEADLINE_FORMATS = [
+    "%m/%d/%y",  # as entered in the app, e.g. '08/05/25'
+    "%m/%d/%Y",
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+]
+DEFAULT_HOURS_UNTIL_DUE = 7 * 24.0  # tasks without a usable deadline
+DEFAULT_DAILY_FREE_TIME = 6.0
+URGENCY_WEIGHT = 1.0  # how strongly a near deadline outweighs the model's preference
+
+Placement = Tuple[int, float, float]  # (day_of_week, start time, duration)
+
+
+def parse_deadline(deadline: Any) -> Optional[datetime]:
+    """
+    Parse a task deadline as stored in Firestore.
+
+    Args:
+        deadline: A datetime (Firestore timestamp) or a string such as
+            '08/05/25' or '2025-08-05'
+
+    Returns:
+        The deadline, or None if it could not be parsed. A date without a time
+        means the end of that day.
+    """
+    if isinstance(deadline, datetime):
+        return deadline.replace(tzinfo=None)
+    if not isinstance(deadline, str):
+        return None
+    for fmt in DEADLINE_FORMATS:
+        try:
+            parsed = datetime.strptime(deadline.strip(), fmt)
+        except ValueError:
+            continue
+        if "%H" not in fmt:
+            parsed = parsed.replace(hour=23, minute=59)
+        return parsed
+    return None
+
+
+def task_context_from_firestore(
+    task_data: Dict[str, Any],
+    now: datetime,
+    daily_free_time: float = DEFAULT_DAILY_FREE_TIME,
+) -> Dict[str, Any]:
+    """
+    Turn a Firestore task into the context predict_best_time expects.
+
+    Args:
+        task_data: Task dict with taskName, taskDuration, taskCategory and taskDeadline
+        now: Current time, used to compute the hours until the deadline
+        daily_free_time: Available free time per day
+
+    Returns:
+        A dict with task_type, task_duration, hours_until_due, daily_free_time
+        and deadline (the parsed deadline, or None)
+    """
+    category = task_data.get("taskCategory")
+    task_type = get_default_event_type_for_category(category) or "other"
+
+    try:
+        task_duration = float(task_data.get("taskDuration"))
+    except (TypeError, ValueError):
+        task_duration = CATEGORIES.get(category, CATEGORIES["Other"])["typical_duration"]
+
+    deadline = parse_deadline(task_data.get("taskDeadline"))
+    if deadline is None:
+        hours_until_due = DEFAULT_HOURS_UNTIL_DUE
+    else:
+        # Overdue tasks are as urgent as it gets, but still need a slot
+        hours_until_due = max((deadline - now).total_seconds() / 3600.0, 1.0)
+
+    return {
+        "task_type": task_type,
+        "task_duration": task_duration,
+        "hours_until_due": hours_until_due,
+        "daily_free_time": daily_free_time,
+        "deadline": deadline,
+    }
+
+
+def _deadline_window(
+    deadline: datetime, now: datetime, length: int
+) -> Tuple[int, np.ndarray]:
+    """
+    Return the days a task may be placed on, counted from today and including
+    the deadline's day (at most 7), and the slots a run of `length` slots may
+    start at on the last of them without ending after the deadline.
+    """
+    days_until_deadline = (deadline.date() - now.date()).days + 1
+    num_days = min(7, max(1, days_until_deadline))
+    last_day_starts = np.ones(len(TIME_SLOTS), dtype=bool)
+    if num_days == days_until_deadline:
+        # The deadline falls in the window; don't run past it on its day
+        deadline_time = deadline.hour + deadline.minute / 60.0
+        last_day_starts = TIME_SLOTS + length * TIME_STEP <= deadline_time
+    return num_days, last_day_starts
+
+
+def _run_starts(free: np.ndarray, length: int) -> np.ndarray:
+    """
+    Return a (7, len(TIME_SLOTS)) mask of slots where `length` consecutive free
+    slots start. Runs must end within the day.
+    """
+    counts = np.zeros((free.shape[0], free.shape[1] + 1), dtype=np.int32)
+    np.cumsum(free, axis=1, out=counts[:, 1:])
+    starts = np.zeros(free.shape, dtype=bool)
+    last = free.shape[1] - length + 1
+    if last > 0:
+        starts[:, :last] = counts[:, length:] - counts[:, :last] == length
+    return starts
+
+
+def schedule_week(
+    tasks: Dict[str, Dict[str, Any]],
+    session: Optional[SchedulerSession] = None,
+    now: Optional[datetime] = None,
+    daily_free_time: float = DEFAULT_DAILY_FREE_TIME,
+) -> Dict[str, Optional[Placement]]:
+    """
+    Schedule all of a user's open tasks for the coming week at once.
+
+    Args:
+        tasks: The user's tasks keyed by task id, as stored under "tasks" in
+            their UserTasks document
+        session: Session holding the user's calendar; placements are recorded
+            in it. A fresh session is used if None.
+        now: Current time (defaults to datetime.now())
+        daily_free_time: Available free time per day
+
+    Returns:
+        A dict mapping each task id to (day_of_week, start_time, duration), or
+        to None if the task could not be placed before its deadline
+    """
+    session = session if session is not None else SchedulerSession()
+    now = now or datetime.now()
+    today = now.weekday()
+    if not tasks:
+        return {}
+
+    task_ids = list(tasks)
+    contexts = [
+        task_context_from_firestore(tasks[task_id], now, daily_free_time)
+        for task_id in task_ids
+    ]
+
+    # 1. Score every task with a single model call
+    print(f"🔎 Scoring {len(contexts)} tasks for the week...")
+    all_action_probs = predict_action_probs(
+        [
+            (
+                context["task_type"],
+                context["task_duration"],
+                context["hours_until_due"],
+                context["daily_free_time"],
+                today,
+            )
+            for context in contexts
+        ],
+        session.user_id,
+    )
+
+    # 2. Build the (task, day offset, slot) score tensor. Day offsets count
+    # from today, so row k is weekday (today + k) % 7.
+    num_tasks, num_slots = len(task_ids), len(TIME_SLOTS)
+    scores = np.full((num_tasks, 7, num_slots), -np.inf)
+    lengths = np.empty(num_tasks, dtype=int)
+    relaxation = np.empty(num_tasks, dtype=bool)
+    for t, (context, action_probs) in enumerate(zip(contexts, all_action_probs)):
+        lengths[t] = min(
+            num_slots, max(1, int(np.ceil(context["task_duration"] / TIME_STEP)))
+        )
+        urgency = 1.0 + URGENCY_WEIGHT * 24.0 / context["hours_until_due"]
+        if context["deadline"] is None:
+            _, _, max_days_ahead = resolve_task_window(
+                context["task_type"],
+                context["task_duration"],
+                context["hours_until_due"],
+            )
+            scores[t, :max_days_ahead] = urgency * action_prob_vector(action_probs)
+        else:
+            # Every calendar day up to and including the deadline's
+            max_days_ahead, last_day_starts = _deadline_window(
+                context["deadline"], now, lengths[t]
+            )
+            scores[t, :max_days_ahead] = urgency * action_prob_vector(action_probs)
+            scores[t, max_days_ahead - 1, ~last_day_starts] = -np.inf
+        relaxation[t] = is_relaxation(context["task_type"])
+
+    # Calendar state, reordered so row k is day offset k
+    days = [(today + k) % 7 for k in range(7)]
+    occupied = (session.blocked_times.as_mask() | session.recommended_mask)[days]
+    # Slots of today that have already started can't be used
+    occupied[0] |= TIME_SLOTS < now.hour + now.minute / 60.0
+    near_task = session.task_buffer_mask[days].copy()
+    radius = task_buffer_radius()
+
+    def best_start(t):
+        unavailable = occupied if relaxation[t] else occupied | near_task
+        feasible = _run_starts(~unavailable, lengths[t])
+        candidates = np.where(feasible, scores[t], -np.inf)
+        cell = int(np.argmax(candidates))
+        return candidates.flat[cell], cell
+
+    # 3. Lazy greedy: the queue holds an upper bound on each task's best score
+    queue = []
+    for t in range(num_tasks):
+        score, cell = best_start(t)
+        if np.isfinite(score):
+            queue.append((-score, t, cell))
+    heapq.heapify(queue)
+
+    placements: Dict[str, Optional[Placement]] = dict.fromkeys(task_ids)
+    while queue:
+        _, t, _ = heapq.heappop(queue)
+        score, cell = best_start(t)
+        if not np.isfinite(score):
+            continue
+        if queue and score < -queue[0][0]:
+            # Stale: someone else's placement took this task's best slot
+            heapq.heappush(queue, (-score, t, cell))
+            continue
+
+        offset, slot = divmod(cell, num_slots)
+        length = lengths[t]
+        occupied[offset, slot : slot + length] = True
+        near_task[offset, max(0, slot - radius) : slot + length + radius] = True
+
+        day = days[offset]
+        task_type = contexts[t]["task_type"]
+        session.record_recommendation(day, slot, task_type, length)
+        placements[task_ids[t]] = (
+            day,
+            float(TIME_SLOTS[slot]),
+            contexts[t]["task_duration"],
+        )
+
+    for task_id in task_ids:
+        name = tasks[task_id].get("taskName", task_id)
+        placement = placements[task_id]
+        if placement is None:
+            print(f"⚠️ No suitable time slot found for {name}")
+            continue
+        day, start, duration = placement
+        print(
+            f"📅 {name}: {format_day_and_time(day, start)} for {format_duration(duration)}"
+        )
+    return placements
+